@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Annotated
+from typing import Annotated, Optional
 import os
 from dotenv import load_dotenv
 
@@ -12,6 +12,7 @@ pg_database = os.getenv('DB_MANAGER')
 pg_port = os.getenv('DB_PORT')
 pg_connection = os.getenv('DB_CONNECTION')
 pg_host = os.getenv('DB_HOST')
+pg_async_connection = os.getenv('DB_ASYNC_CONNECTION', 'postgresql+asyncpg')
 
 MPGS_API_VERSION = os.getenv('MPGS_API_VERSION')
 MPGS_BASE_URL = os.getenv('MPGS_BASE_URL')
@@ -25,6 +26,14 @@ SMTP_SENDER_MAIL = os.getenv('SMTP_SENDER_MAIL')
 SMTP_SENDER_PW = os.getenv('SMTP_SENDER_PW')
 OTP_INTERVAL = os.getenv('OTP_INTERVAL', '2')
 
+# Mailbox used by the get-in-touch contact form
+CONTACT_SMTP_HOST = os.getenv('CONTACT_SMTP_HOST', 'mail.ambrumsolutions.com')
+CONTACT_SMTP_PORT = os.getenv('CONTACT_SMTP_PORT')
+CONTACT_SMTP_ENCRYPTION = os.getenv('CONTACT_SMTP_ENCRYPTION', 'ssl')
+OUTLOOK_USER = os.getenv('OUTLOOK_USER')
+OUTLOOK_PASS = os.getenv('OUTLOOK_PASS')
+GMAIL_USER = os.getenv('GMAIL_USER')
+
 SECRET_KEY = os.getenv('SECRET_KEY')
 ALGORITHM = os.getenv('ALGORITHM')
 ACCESS_TOKEN_EXPIRE_MINUTES = os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES')
@@ -35,28 +44,35 @@ MERCHANT_CREDENTIALS = {
     "LKR": {
         "merchant_id": os.getenv("MPGS_LKR_MERCHANT_ID"),
         "api_username": os.getenv("MPGS_LKR_USERNAME"),
-        "api_password": os.getenv("MPGS_LKR_PASSWORD")
+        "api_password": os.getenv("MPGS_LKR_PASSWORD"),
+        "notification_secret": os.getenv("MPGS_LKR_NOTIFICATION_SECRET")
     },
     "GBP": {
         "merchant_id": os.getenv("MPGS_GBP_MERCHANT_ID"),
         "api_username": os.getenv("MPGS_GBP_USERNAME"),
-        "api_password": os.getenv("MPGS_GBP_PASSWORD")
+        "api_password": os.getenv("MPGS_GBP_PASSWORD"),
+        "notification_secret": os.getenv("MPGS_GBP_NOTIFICATION_SECRET")
     },
     "USD": {
         "merchant_id": os.getenv("MPGS_USD_MERCHANT_ID"),
         "api_username": os.getenv("MPGS_USD_USERNAME"),
-        "api_password": os.getenv("MPGS_USD_PASSWORD")
+        "api_password": os.getenv("MPGS_USD_PASSWORD"),
+        "notification_secret": os.getenv("MPGS_USD_NOTIFICATION_SECRET")
     },
     "EUR": {
         "merchant_id": os.getenv("MPGS_EUR_MERCHANT_ID"),
         "api_username": os.getenv("MPGS_EUR_USERNAME"),
-        "api_password": os.getenv("MPGS_EUR_PASSWORD")
+        "api_password": os.getenv("MPGS_EUR_PASSWORD"),
+        "notification_secret": os.getenv("MPGS_EUR_NOTIFICATION_SECRET")
     }
 }
 
 class Settings(BaseSettings):
     PG_URL: Annotated[str, ...] = f"{pg_connection}://{pg_username}:{pg_password}@{pg_host}:{pg_port}/{pg_database}"
     print('pg_url-->',PG_URL)
+    PG_ASYNC_URL: Annotated[str, ...] = f"{pg_async_connection}://{pg_username}:{pg_password}@{pg_host}:{pg_port}/{pg_database}"
+    DB_ASYNC_POOL_SIZE: int = 50
+    DB_ASYNC_MAX_OVERFLOW: int = 10
 
     # Email
     SMTP_HOST: str = SMTP_HOST
@@ -65,6 +81,138 @@ class Settings(BaseSettings):
     SMTP_SENDER_MAIL: str = SMTP_SENDER_MAIL
     SMTP_SENDER_PW: str = SMTP_SENDER_PW
     OTP_INTERVAL: int = int(OTP_INTERVAL)
+    CONTACT_SMTP_HOST: str = CONTACT_SMTP_HOST
+    CONTACT_SMTP_PORT: int = int(CONTACT_SMTP_PORT) if CONTACT_SMTP_PORT else 465
+    CONTACT_SMTP_ENCRYPTION: str = CONTACT_SMTP_ENCRYPTION
+    CONTACT_SMTP_USER: Optional[str] = OUTLOOK_USER
+    CONTACT_SMTP_PW: Optional[str] = OUTLOOK_PASS
+    CONTACT_INBOX: Optional[str] = GMAIL_USER
+
+    # Pooled SMTP delivery (SMTP_ENCRYPTION / CONTACT_SMTP_ENCRYPTION: ssl, tls or none)
+    SMTP_POOL_SIZE: int = 2
+    SMTP_TIMEOUT: float = 30
+    SMTP_IDLE_TIMEOUT: float = 60
+    MAIL_WORKERS: int = 2
+    MAIL_BATCH_SIZE: int = 20
+    MAIL_QUEUE_SIZE: int = 1000
+    MAIL_SHUTDOWN_TIMEOUT: float = 10
+    # how long /get-in-touch waits for the contact message to be accepted by the SMTP server
+    CONTACT_MAIL_SEND_TIMEOUT: float = 30
+
+    # Jinja2 templates: compile to importable modules, or cache bytecode, under these directories
+    TEMPLATE_PRECOMPILED_DIR: Optional[str] = None
+    TEMPLATE_BYTECODE_CACHE_DIR: Optional[str] = None
+
+    # Durable email outbox
+    EMAIL_OUTBOX_WORKERS: int = 2
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_POLL_INTERVAL: float = 2
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_BACKOFF_BASE: float = 30
+    EMAIL_OUTBOX_BACKOFF_MAX: float = 3600
+    EMAIL_OUTBOX_CLAIM_TIMEOUT: float = 300
+
+    # MPGS HTTP client pool
+    MPGS_HTTP2: bool = True
+    MPGS_MAX_CONNECTIONS: int = 20
+    MPGS_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    MPGS_KEEPALIVE_EXPIRY: float = 60.0
+    MPGS_CONNECT_TIMEOUT: float = 5.0
+    MPGS_READ_TIMEOUT: float = 30.0
+    MPGS_WRITE_TIMEOUT: float = 10.0
+    MPGS_POOL_TIMEOUT: float = 5.0
+
+    # MPGS resilience
+    MPGS_CREATE_SESSION_DEADLINE: float = 15.0
+    MPGS_VERIFY_DEADLINE: float = 10.0
+    MPGS_MAX_RETRIES: int = 2
+    MPGS_RETRY_BASE_DELAY: float = 0.2
+    MPGS_RETRY_MAX_DELAY: float = 2.0
+    MPGS_RETRY_BUDGET_RATIO: float = 0.1
+    MPGS_RETRY_BUDGET_MIN_PER_SECOND: float = 1.0
+    MPGS_RETRY_BUDGET_MAX_TOKENS: float = 20.0
+    MPGS_BREAKER_FAILURE_THRESHOLD: int = 5
+    MPGS_BREAKER_RESET_TIMEOUT: float = 30.0
+    MPGS_BREAKER_HALF_OPEN_MAX_CALLS: int = 1
+
+    # Payment callback
+    PAYMENT_VERIFY_CLAIM_TIMEOUT: int = 120
+    PAYMENT_CALLBACK_WAIT_SECONDS: float = 10.0
+
+    # Idempotency-Key handling for /send-donation
+    IDEMPOTENCY_WINDOW_HOURS: int = 24
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: int = 60
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0
+    IDEMPOTENCY_POLL_INTERVAL: float = 0.2
+
+    # Reconciliation of transactions stuck in initiated
+    RECONCILE_ENABLED: bool = True
+    RECONCILE_INTERVAL_SECONDS: float = 300
+    RECONCILE_BATCH_SIZE: int = 100
+    RECONCILE_CONCURRENCY: int = 5
+    RECONCILE_RATE_PER_CURRENCY: float = 5.0
+    RECONCILE_MIN_AGE_MINUTES: int = 30
+    RECONCILE_MAX_AGE_HOURS: int = 72
+    # transient lookup failures per transaction before the reconciler leaves it for manual review
+    RECONCILE_MAX_ATTEMPTS: int = 10
+
+    # Cache-Control max-age for the public list endpoints (conditional GET)
+    HTTP_CACHE_LIVE_MAX_AGE: int = 5
+    HTTP_CACHE_REFERENCE_MAX_AGE: int = 60
+    # how often each worker re-reads the shared data versions, and how old they may get before ETags are withheld
+    HTTP_CACHE_VERSION_REFRESH_SECONDS: float = 1
+    HTTP_CACHE_VERSION_MAX_STALE_SECONDS: float = 30
+
+    # In-process cache of currencies and donation types
+    REFERENCE_DATA_TTL_SECONDS: float = 300
+
+    # In-process role catalogue used by the Auth dependency
+    ROLE_CATALOGUE_TTL_SECONDS: float = 300
+
+    # Per-worker LRU of user status used to check tokens; 0 disables caching
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 30
+
+    # Sharded rider fundraising counters
+    RIDER_COUNTER_SLOTS: int = 16
+    RIDER_COUNTER_ROLLUP_INTERVAL: float = 60
+
+    # Server-Sent Events feed of donation totals and rider progress
+    LIVE_FEED_MAX_UPDATES_PER_SECOND: float = 2
+    LIVE_FEED_HEARTBEAT_SECONDS: float = 15
+    LIVE_FEED_CLIENT_QUEUE_SIZE: int = 32
+    LIVE_FEED_MAX_LAGS: int = 3
+    LIVE_FEED_RETRY_MS: int = 3000
+
+    # Donation analytics rollups
+    ANALYTICS_ROLLUP_INTERVAL: float = 300
+    ANALYTICS_ROLLUP_LAG_SECONDS: int = 120
+
+    # Streaming admin exports
+    EXPORT_YIELD_PER: int = 2000
+    EXPORT_CHUNK_BYTES: int = 65536
+
+    # In-memory rider leaderboard, rebuilt from the database on this interval
+    LEADERBOARD_RECONCILE_SECONDS: float = 300
+
+    # /get-riders-list: True returns every rider unpaginated (the old response shape)
+    RIDERS_LIST_LEGACY: bool = False
+
+    # API request logging ("async" = background batched writer, "sync" = commit on the request session)
+    API_LOG_MODE: str = "async"
+    API_LOG_QUEUE_SIZE: int = 10000
+    API_LOG_BATCH_SIZE: int = 200
+    API_LOG_FLUSH_INTERVAL: float = 1.0
+    API_LOG_OVERFLOW_POLICY: str = "drop_oldest"
+    API_LOG_SHUTDOWN_TIMEOUT: float = 10.0
+    API_LOG_MAX_BODY_BYTES: int = 16384
+
+    # api_logs partitioning and archiving
+    API_LOG_PARTITION_INTERVAL: str = "month"
+    API_LOG_PARTITIONS_AHEAD: int = 2
+    API_LOG_HOT_WINDOW_DAYS: int = 90
+    API_LOG_ARCHIVE_DIR: str = "archive/api_logs"
+    API_LOG_MAINTENANCE_INTERVAL: float = 3600
 
     # JWT
     SECRET_KEY: str = SECRET_KEY
@@ -72,6 +220,16 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(ACCESS_TOKEN_EXPIRE_MINUTES)
     REFRESH_TOKEN_EXPIRE_MINUTES: int = int(REFRESH_TOKEN_EXPIRE_MINUTES)
 
+    # bcrypt cost factor, picked per host with `python -m bin.helpers.password_hasher calibrate`
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_TARGET_MS: float = 250
+
+    # bcrypt process pool; requests beyond PASSWORD_HASH_MAX_PENDING queued hashes get a 503
+    PASSWORD_HASH_WORKERS: int = max((os.cpu_count() or 2) // 2, 1)
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_RETRY_AFTER: int = 2
+    PASSWORD_HASH_STATS_WINDOW: int = 1000
+
 
 # global instance
 settings = Settings()
@@ -0,0 +1,37 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bin.response.response_model import ResponseModel, ErrorResponseModel
+from bin.services.db_services.analytics_service import donation_summary, conversion_summary, rollup_status
+
+
+class AnalyticsManager():
+    async def donations(self, db: AsyncSession, period: str, group_by: Optional[str],
+                        start: Optional[date], end: Optional[date]):
+        try:
+            data = await donation_summary(db, period, group_by, start, end)
+            return ResponseModel(data, f"Donations by {period}" + (f" and {group_by}" if group_by else ""))
+        except Exception as e:
+            print(f"An error occurred: {str(e)}")
+            return ErrorResponseModel(str(e), 400)
+
+    async def conversion(self, db: AsyncSession, period: str, currency: Optional[str],
+                         start: Optional[date], end: Optional[date]):
+        try:
+            data = await conversion_summary(db, period, currency, start, end)
+            return ResponseModel(data, f"Transaction conversion by {period}")
+        except Exception as e:
+            print(f"An error occurred: {str(e)}")
+            return ErrorResponseModel(str(e), 400)
+
+    async def status(self, db: AsyncSession):
+        try:
+            return ResponseModel(await rollup_status(db), "Analytics rollup status")
+        except Exception as e:
+            print(f"An error occurred: {str(e)}")
+            return ErrorResponseModel(str(e), 400)
+
+
+analyticsManager = AnalyticsManager()
@@ -1,5 +1,7 @@
 from fastapi import Depends, HTTPException, status
 
+from bin.config import settings
+from bin.helpers.password_hasher import PasswordHasherBusy
 from bin.models.pg_user_model import User
 from bin.requests.user_requests.user_create import UserCreate
 from bin.requests.user_requests.user_login import UserLogin
@@ -12,18 +14,23 @@ class AuthController:
     def __init__(self, auth_service: AuthService = Depends(AuthService)):
         self.auth_service = auth_service
 
-    def register(self, user_data: UserCreate):
+    async def register(self, user_data: UserCreate):
         try:
-            user = self.auth_service.register_user(user_data)
+            user = await self.auth_service.register_user(user_data)
             return user
         except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=str(e)
             )
+        except PasswordHasherBusy:
+            raise self._busy_exception()
 
-    def login(self, login_request: UserLogin):
-        auth_result = self.auth_service.authenticate_user(login_request)
+    async def login(self, login_request: UserLogin):
+        try:
+            auth_result = await self.auth_service.authenticate_user(login_request)
+        except PasswordHasherBusy:
+            raise self._busy_exception()
 
         if not auth_result:
             raise HTTPException(
@@ -40,6 +47,14 @@ class AuthController:
             "tokens": token_response
         }
 
+    @staticmethod
+    def _busy_exception() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress, please retry shortly",
+            headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER)},
+        )
+
     def verify_otp_and_activate_account(self, otp_code: str):
         if self.auth_service.verify_otp_and_activate(otp_code):
             return {"message": "Account activated successfully"}
@@ -1,86 +1,71 @@
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from urllib.parse import quote
 
 from fastapi import HTTPException
-from requests import Session
-from sqlalchemy import select
-from starlette.responses import HTMLResponse, FileResponse, RedirectResponse
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import HTMLResponse, FileResponse, RedirectResponse, Response
 
-from bin.db.postgresDB import db_connection
 from bin.models import pg_models
-from bin.models.pg_models import DonationTable
 from bin.response.response_model import ResponseModel,ErrorResponseModel
-from bin.services.db_services.donation_service import create_new_donation_record, currency_list, donation_list, \
-    sum_of_donations, payment_callback_function, get_currency_by_id
+from bin.services.db_services.donation_service import create_new_donation_record, \
+    payment_callback_function, get_currency_by_id
+from bin.services.db_services.donation_totals_service import donation_totals
+from bin.services.db_services.reference_data_service import reference_data
+from bin.services.db_services.idempotency_service import donation_idempotency, request_fingerprint
+from bin.services.db_services.notification_service import process_gateway_notification
 from bin.services.db_services.payment_service import PaymentService
+from bin.helpers.template_renderer import template_renderer
 from bin.config import RETURN_URL, APP_URL, settings
 from bin.utils.response_codes import PaymentStatus, PaymentResponseCode, is_retryable_error, get_error_message
 
 
 class DonationManager():
-    def __init__(self, db: Session = None):
-        self.db = db if db else next(db_connection())
+    def __init__(self):
         self.payment_service = PaymentService()
 
-    async def _send_confirmation_email(self, donation: DonationTable):
-        """Send payment confirmation email to donor"""
+    async def donation(self, request, db: AsyncSession, idempotency_key: str = None):
+        if not idempotency_key:
+            return await self._create_donation(request, db)
+
+        snapshot = await donation_idempotency.claim(idempotency_key, request_fingerprint(request), db)
+        if snapshot is not None:
+            return snapshot
+
         try:
-            # Create email message
-            msg = MIMEMultipart()
-            msg['From'] = settings.SMTP_SENDER_MAIL
-            msg['To'] = donation.email
-            msg['Subject'] = "Thank you for your donation!"
-
-            # Email body
-            body = f"""
-               <html>
-                   <body>
-                       <h2>Thank you for your generous donation!</h2>
-                       <p>Dear {donation.first_name} {donation.second_name},</p>
-                       <p>We have successfully received your donation of {donation.amount} {get_currency_by_id(donation.currency_id)}.</p>
-                       <p>Your support means the world to us.</p>
-                       <p>With gratitude,<br/>CCC Foundation Team</p>
-                   </body>
-               </html>
-               """
-            msg.attach(MIMEText(body, 'html'))
-
-            # Send email
-            with smtplib.SMTP_SSL(
-                    host=settings.SMTP_HOST,
-                    port=settings.SMTP_PORT
-            ) as server:
-                server.login(settings.SMTP_SENDER_MAIL, settings.SMTP_SENDER_PW)
-                server.send_message(msg)
-
-            return True
-        except Exception as e:
-            print(f"Failed to send confirmation email: {str(e)}")
-            return False
+            response = await self._create_donation(request, db, idempotency_key)
+        except Exception:
+            await donation_idempotency.release(idempotency_key, db)
+            raise
+
+        donation_idempotency.finish(idempotency_key)
+        return response
 
-    async def donation(self, request):
+    async def _create_donation(self, request, db: AsyncSession, idempotency_key: str = None):
         try:
-            donation = None
+            donation_id = None
             try:
-                donation = create_new_donation_record(request, self.db)
-                self.db.flush()
-
-                currency = get_currency_by_id(donation.currency_id)
+                currency = await get_currency_by_id(request.currency_id, db)
 
                 currency_code = currency.currency_code
 
+                # Fail fast while the gateway circuit is open instead of creating an orphan donation
+                if not self.payment_service.is_available(currency_code):
+                    raise HTTPException(status_code=503, detail="Payment gateway is temporarily unavailable")
+
+                donation = await create_new_donation_record(request, db)
+                await db.flush()
+                donation_id = donation.record_id
+
                 return_url = f"{RETURN_URL}"
                 payment_result = await self.payment_service.create_payment_session(
                     donation=donation,
                     return_url=return_url,
                     currency=currency_code,
-                    db=self.db
+                    db=db
                 )
 
                 transaction = pg_models.Transaction(
-                    donation_id=donation.record_id,
+                    donation_id=donation_id,
                     mpgs_order_id=payment_result["order_id"],
                     session_id=payment_result["session_id"],
                     success_indicator=payment_result["success_indicator"],
@@ -88,19 +73,27 @@ class DonationManager():
                     currency=currency_code,
                     status="initiated"
                 )
-                self.db.add(transaction)
-                self.db.commit()
+                db.add(transaction)
 
-                return ResponseModel({
-                    "donation_id": donation.record_id,
-                    "payment_url": f"{APP_URL}/payment-page/{donation.record_id}",
+                response = ResponseModel({
+                    "donation_id": donation_id,
+                    "payment_url": f"{APP_URL}/payment-page/{donation_id}",
                 }, "Donation created successfully")
 
+                # The snapshot commits atomically with the donation and transaction rows
+                if idempotency_key:
+                    await donation_idempotency.store_response(idempotency_key, response, db)
+                await db.commit()
+
+                return response
+
             except Exception as e:
-                self.db.rollback()
-                if donation and donation.record_id:
-                    self.db.delete(donation)
-                    self.db.commit()
+                await db.rollback()
+                if donation_id:
+                    await db.execute(
+                        delete(pg_models.DonationTable).where(pg_models.DonationTable.record_id == donation_id)
+                    )
+                    await db.commit()
                 raise e
 
         except HTTPException as e:
@@ -108,8 +101,8 @@ class DonationManager():
         except Exception as e:
             return ErrorResponseModel(str(e), 400)
 
-    async def payment_page(self, donation_id: int):
-        transaction =  self.db.execute(
+    async def payment_page(self, donation_id: int, db: AsyncSession):
+        transaction = await db.execute(
             select(pg_models.Transaction)
             .where(pg_models.Transaction.donation_id == donation_id)
             .order_by(pg_models.Transaction.created_at.desc())
@@ -117,58 +110,21 @@ class DonationManager():
         transaction = transaction.scalar_one_or_none()
         if not transaction:
             raise HTTPException(status_code=404, detail="Transaction not found")
-        html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Redirecting to Payment</title>
-                <script 
-                    src="https://cbcmpgs.gateway.mastercard.com/static/checkout/checkout.min.js"
-                    data-error="errorCallback" 
-                    data-cancel="cancelCallback">
-                </script>
-                <script type="text/javascript">
-                    function errorCallback(error) {{
-                        console.error("Payment Error:", JSON.stringify(error));
-                    }}
-
-                    function cancelCallback() {{
-                        console.warn('Payment was cancelled.');
-                    }}
-
-                    window.onload = function() {{
-                        Checkout.configure({{
-                            session: {{
-                                id: '{transaction.session_id}'
-                            }}
-                        }});
-                        Checkout.showPaymentPage();
-                    }};
-                </script>
-            </head>
-            <body>
-                <p>Redirecting to payment page... Please wait.</p>
-            </body>
-            </html>
-            """
+        html_content = template_renderer.render("payment_page.html", session_id=transaction.session_id)
         return HTMLResponse(content=html_content)
 
-    async def payment_callback(self, request):
+    async def payment_callback(self, request, db: AsyncSession):
         try:
-            payment_result = await payment_callback_function(request, self.db)
+            payment_result = await payment_callback_function(request, db)
 
             if payment_result["status"] == PaymentStatus.COMPLETED:
-                # Get the donation record
-                donation = self.db.execute(
-                    select(pg_models.DonationTable)
-                    .where(pg_models.DonationTable.record_id == payment_result["transaction"].donation_id)
-                ).scalar_one_or_none()
-
-                if donation:
-                    # Send confirmation email (fire and forget)
-                    await self._send_confirmation_email(donation)
-
+                # the confirmation email was queued in the email outbox when the payment was finalized
                 return await self.payment_success_page(payment_result["transaction"].donation_id)
+            elif payment_result["status"] == PaymentStatus.PENDING:
+                return await self.payment_failure_page(
+                    payment_result["transaction"].donation_id,
+                    "Your payment is still being verified. Please check back shortly."
+                )
             else:
                 gateway_code = payment_result.get("gateway_code")
                 return await self.handle_payment_failure(
@@ -181,6 +137,15 @@ class DonationManager():
         except Exception as e:
             return await self.payment_failure_page(None,  str(e))
 
+    async def payment_notification(self, request, db: AsyncSession):
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid notification payload")
+
+        result = await process_gateway_notification(request.headers, payload, db)
+        return {"status": result["status"]}
+
     async def handle_payment_failure(self, donation_id: int | None, gateway_code: PaymentResponseCode):
         """Handle different failure scenarios with appropriate responses"""
         if is_retryable_error(gateway_code):
@@ -191,25 +156,25 @@ class DonationManager():
 
         return await self.payment_failure_page(donation_id, error_msg)
 
-    def get_currency_list(self):
+    async def get_currency_list(self, db: AsyncSession):
         try:
-            currency = currency_list()
-            return ResponseModel(currency,'All currency list')
+            data = await reference_data.get(db)
+            return Response(content=data.currency_list_body, media_type="application/json")
         except Exception as e:
             print(f"An error occurred: {str(e)}")
             return ErrorResponseModel(str(e), 400)
 
-    def donation_types(self):
+    async def donation_types(self, db: AsyncSession):
         try:
-            donations = donation_list()
-            return ResponseModel(donations, 'All donation types')
+            data = await reference_data.get(db)
+            return Response(content=data.donation_types_body, media_type="application/json")
         except Exception as e:
             print(f"An error occurred: {str(e)}")
             return ErrorResponseModel(str(e), 400)
 
-    def get_total_donations(self):
+    async def get_total_donations(self, db: AsyncSession):
         try:
-            total_donation = sum_of_donations()
+            total_donation = await donation_totals.general_total(db)
 
             return ResponseModel(total_donation,'sum of general donations')
 
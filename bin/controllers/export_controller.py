@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Optional
+
+from starlette.responses import StreamingResponse
+
+from bin.enums.transaction_status import TransactionStatus
+from bin.services.db_services.export_service import export_donations
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class ExportManager():
+    def donations(self,
+                  export_format: str,
+                  start: Optional[datetime],
+                  end: Optional[datetime],
+                  status: Optional[TransactionStatus],
+                  compress: bool):
+        filename = f"donations_{datetime.now():%Y%m%d%H%M%S}.{export_format}"
+        media_type = MEDIA_TYPES[export_format]
+        if compress:
+            filename = f"{filename}.gz"
+            media_type = "application/gzip"
+
+        return StreamingResponse(
+            export_donations(export_format, start, end, status, compress),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+
+
+exportManager = ExportManager()
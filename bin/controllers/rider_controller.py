@@ -2,7 +2,9 @@ import base64
 import os
 import uuid
 from bin.response.response_model import ResponseModel,ErrorResponseModel
-from bin.services.db_services.rider_service import  create_new_rider,all_riders
+from bin.config import settings
+from bin.services.db_services.leaderboard_service import rider_leaderboard
+from bin.services.db_services.rider_service import  create_new_rider,all_riders,list_riders
 
 class RiderManager():
     def rider_registration(self,request):
@@ -41,9 +43,17 @@ class RiderManager():
             return ErrorResponseModel(str(e), 400)
 
 
-    def get_all_riders(self):
+    def get_all_riders(self, limit: int, cursor: str = None, fields: str = None, name_prefix: str = None):
         try:
-            rider_list = all_riders()
+            if settings.RIDERS_LIST_LEGACY:
+                rider_list = all_riders()
+            else:
+                rider_list = list_riders(
+                    limit,
+                    cursor,
+                    [field.strip() for field in fields.split(",")] if fields else None,
+                    name_prefix
+                )
 
             return ResponseModel(rider_list,'All Rider List')
 
@@ -52,5 +62,19 @@ class RiderManager():
             return ErrorResponseModel(str(e), 400)
 
 
+    def get_leaderboard(self, top: int):
+        try:
+            return ResponseModel(rider_leaderboard.top(top), 'Rider leaderboard')
+
+        except Exception as e:
+            print(f"An error occurred: {str(e)}")
+            return ErrorResponseModel(str(e), 400)
+
+    def get_rider_rank(self, rider_id: int):
+        entry = rider_leaderboard.rank(rider_id)
+        if entry is None:
+            return ErrorResponseModel(f"Rider with ID {rider_id} not found", 404)
+        return ResponseModel(entry, 'Rider rank')
+
 
 riderManager = RiderManager()
\ No newline at end of file
@@ -0,0 +1,42 @@
+import zlib
+from contextlib import contextmanager, asynccontextmanager
+
+from sqlalchemy import text
+
+
+def lock_key(name: str) -> int:
+    """Stable bigint key for pg advisory locks derived from a readable name."""
+    return zlib.crc32(name.encode())
+
+
+@contextmanager
+def try_advisory_lock(conn, name: str):
+    """
+    *Session level pg advisory lock on a sync connection. Yields True only in the
+    one process that got the lock, so periodic jobs run once across app workers.
+    """
+    key = lock_key(name)
+    acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar()
+    try:
+        yield bool(acquired)
+    finally:
+        if acquired:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+            conn.commit()
+
+
+@asynccontextmanager
+async def try_async_advisory_lock(conn, name: str):
+    """
+    *Async variant of try_advisory_lock for AsyncConnection
+    """
+    key = lock_key(name)
+    acquired = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})).scalar()
+    try:
+        yield bool(acquired)
+    finally:
+        if acquired:
+            await conn.rollback()
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+            await conn.commit()
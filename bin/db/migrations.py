@@ -0,0 +1,94 @@
+from sqlalchemy import text
+
+from bin.db.advisory_lock import lock_key
+from bin.db.postgresDB import Base
+from bin.models import pg_user_model  # noqa: F401  registers the user tables on Base
+from bin.models.pg_models import ApiLog
+
+
+def _relkind(conn, table_name: str):
+    return conn.execute(text("""
+        SELECT c.relkind FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relname = :name AND n.nspname = current_schema()
+    """), {"name": table_name}).scalar()
+
+
+def partition_api_logs(conn):
+    """
+    *Convert a legacy unpartitioned api_logs table into a range partitioned one.
+    The old table is kept as a single partition covering everything up to the
+    start of next month, so the retention job can archive it like any other.
+    """
+    if _relkind(conn, "api_logs") != "r":
+        return
+
+    conn.execute(text("ALTER TABLE api_logs RENAME TO api_logs_legacy"))
+    conn.execute(text("ALTER SEQUENCE IF EXISTS api_logs_id_seq RENAME TO api_logs_legacy_id_seq"))
+    conn.execute(text("ALTER INDEX IF EXISTS api_logs_pkey RENAME TO api_logs_legacy_pkey"))
+    conn.execute(text("ALTER INDEX IF EXISTS ix_api_logs_id RENAME TO ix_api_logs_legacy_id"))
+    conn.execute(text("UPDATE api_logs_legacy SET created_at = now() WHERE created_at IS NULL"))
+    conn.execute(text("ALTER TABLE api_logs_legacy ALTER COLUMN created_at SET NOT NULL"))
+    conn.execute(text("ALTER TABLE api_logs_legacy ALTER COLUMN id DROP DEFAULT"))
+
+    ApiLog.__table__.create(conn)
+    conn.execute(text(
+        "SELECT setval('api_logs_id_seq', (SELECT coalesce(max(id), 0) + 1 FROM api_logs_legacy), false)"
+    ))
+    conn.execute(text("""
+        ALTER TABLE api_logs ATTACH PARTITION api_logs_legacy
+        FOR VALUES FROM (MINVALUE) TO (date_trunc('month', now()) + interval '1 month')
+    """))
+
+
+def ensure_api_logs_default_partition(conn):
+    """
+    *Catch-all partition so inserts never fail while a period partition is missing
+    """
+    conn.execute(text("CREATE TABLE IF NOT EXISTS api_logs_default PARTITION OF api_logs DEFAULT"))
+
+
+def add_transaction_state_columns(conn):
+    conn.execute(text("ALTER TABLE transactions ADD COLUMN IF NOT EXISTS gateway_code VARCHAR"))
+    conn.execute(text(
+        "ALTER TABLE transactions ADD COLUMN IF NOT EXISTS verification_started_at TIMESTAMP WITH TIME ZONE"
+    ))
+    conn.execute(text(
+        "ALTER TABLE transactions ADD COLUMN IF NOT EXISTS verify_attempts INTEGER NOT NULL DEFAULT 0"
+    ))
+
+
+def add_user_status_version(conn):
+    conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS status_version INTEGER NOT NULL DEFAULT 0"))
+
+
+def ensure_indexes(conn):
+    """
+    *create_all only builds indexes together with new tables, so add any that are missing
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+MIGRATIONS = [
+    partition_api_logs,
+    ensure_api_logs_default_partition,
+    add_transaction_state_columns,
+    add_user_status_version,
+    ensure_indexes,
+]
+
+
+def init_schema(engine):
+    """
+    *create_all plus the idempotent schema changes it can't apply to existing tables.
+    Run from the app lifespan, never at import, so scripts and the bcrypt worker
+    processes don't touch the schema; the advisory lock makes concurrently starting
+    workers take turns instead of racing the DDL.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": lock_key("init_schema")})
+        Base.metadata.create_all(bind=conn)
+        for migration in MIGRATIONS:
+            migration(conn)
@@ -2,6 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker,scoped_session
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from fastapi import Depends
 from bin.config import settings
 
@@ -22,6 +23,14 @@ engine = create_engine(
     })
 SessionLocal = sessionmaker(autocommit=False, autoflush=True, bind=engine)
 
+async_engine = create_async_engine(
+    str(settings.PG_ASYNC_URL),
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+    pool_recycle=1800,
+    pool_pre_ping=True)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=True, expire_on_commit=False)
+
 
 # Log Configs
 # dictConfig(logConfig.dict())
@@ -38,6 +47,14 @@ def db_connection():
         db.close()
 
 
+async def async_db_connection():
+    """
+    *Async postgres database connection
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 Base = declarative_base()
 
 pg_database: Session = Depends(db_connection())
\ No newline at end of file
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class TransactionStatus(str, Enum):
+    INITIATED = "initiated"
+    VERIFYING = "verifying"
+    COMPLETED = "completed"
+    FAILED = "failed"
@@ -1,14 +1,14 @@
 from enum import Enum
-from typing import List
+from typing import FrozenSet, List, Tuple
 
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi import Request
 import jwt
 from jwt import PyJWTError as JWTError
 
 from bin.config import settings
-from bin.services.db_services.role_service import RoleService
+from bin.services.db_services.role_catalogue_service import RoleCatalogue, role_catalogue
 
 
 class Roles(str, Enum):
@@ -21,9 +21,18 @@ class Auth(HTTPBearer):
                  auto_error: bool = False
                  ) -> None:
         self.required_roles = [role.value for role in required_roles]
+        # required role names resolved to ids, keyed by the catalogue generation they came from
+        self._required_role_ids: Tuple[int, FrozenSet[int]] = (-1, frozenset())
         super(Auth, self).__init__(auto_error=auto_error)
 
-    async def __call__(self, request: Request, role_service: RoleService = Depends(RoleService)):
+    def _required_ids(self, catalogue: RoleCatalogue) -> FrozenSet[int]:
+        generation, role_ids = self._required_role_ids
+        if generation != catalogue.generation:
+            role_ids = catalogue.ids_for(self.required_roles)
+            self._required_role_ids = (catalogue.generation, role_ids)
+        return role_ids
+
+    async def __call__(self, request: Request):
         credentials: HTTPAuthorizationCredentials = await super().__call__(request)
         if not credentials:
             raise HTTPException(
@@ -37,15 +46,12 @@ class Auth(HTTPBearer):
                 settings.SECRET_KEY,
                 algorithms=[settings.ALGORITHM]
             )
-            user_role_ids  = payload.get("roles", [])
-
-            all_roles = role_service.get_all_roles()
-            role_id_to_name = {role.id: role.name for role in all_roles}
+            user_role_ids = payload.get("roles", [])
 
-            user_role_names = [role_id_to_name[role_id] for role_id in user_role_ids if role_id in role_id_to_name]
+            catalogue = await role_catalogue.get()
 
             # Ensure the user has at least one of the required roles
-            if not any(role in user_role_names for role in self.required_roles):
+            if self._required_ids(catalogue).isdisjoint(user_role_ids):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Insufficient permissions. Required roles: " + ", ".join(self.required_roles)
@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import time
+from typing import Callable, Dict, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.routing import APIRoute
+from sqlalchemy import select, text
+
+from bin.config import settings
+from bin.db.postgresDB import AsyncSessionLocal
+from bin.models.pg_models import DATA_VERSION_SEQUENCES
+
+
+class DataVersions:
+    """
+    Versions of data that changes with traffic (riders, totals), kept in Postgres
+    sequences so every worker, and every CDN edge in front of them, derives the same
+    ETag for the same data. Writers advance() a sequence after their commit; each
+    worker re-reads them every HTTP_CACHE_VERSION_REFRESH_SECONDS (sooner when a
+    donation NOTIFY wakes it), so answering If-None-Match never touches the database.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._refreshed_at: Optional[float] = None
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+
+    async def advance(self, db, *names: str):
+        """Bump shared versions after the change is committed; db is an AsyncSession or AsyncConnection."""
+        for name in names:
+            self._versions[name] = (await db.execute(select(DATA_VERSION_SEQUENCES[name].next_value()))).scalar()
+        await db.commit()
+
+    def advance_sync(self, db, *names: str):
+        """advance() for sync sessions."""
+        for name in names:
+            self._versions[name] = db.execute(select(DATA_VERSION_SEQUENCES[name].next_value())).scalar()
+        db.commit()
+
+    def wake(self):
+        """Another worker changed something; refresh without waiting for the interval."""
+        self._wake.set()
+
+    def get(self, name: str) -> Optional[int]:
+        return self._versions.get(name)
+
+    def token(self, name: str) -> Optional[str]:
+        """None until loaded, or once the versions are too old to vouch for the data."""
+        age = time.monotonic() - self._refreshed_at if self._refreshed_at is not None else None
+        if age is None or age > settings.HTTP_CACHE_VERSION_MAX_STALE_SECONDS:
+            return None
+        version = self._versions.get(name)
+        return None if version is None else f"{name}:{version}"
+
+    async def refresh(self):
+        statement = " UNION ALL ".join(
+            # last_value is already 1 before the first nextval, is_called tells the two apart
+            f"SELECT '{name}' AS name, CASE WHEN is_called THEN last_value ELSE 0 END AS last_value "
+            f"FROM {sequence.name}"
+            for name, sequence in DATA_VERSION_SEQUENCES.items()
+        )
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(text(statement))).all()
+        self._versions.update({row.name: row.last_value for row in rows})
+        self._refreshed_at = time.monotonic()
+        self.refreshes += 1
+
+    async def _refresh_forever(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Data version refresh failed: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.HTTP_CACHE_VERSION_REFRESH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "versions": dict(self._versions),
+            "age_seconds": time.monotonic() - self._refreshed_at if self._refreshed_at else None,
+            "refreshes": self.refreshes,
+        }
+
+
+data_versions = DataVersions()
+
+
+def _etag(version: str, request: Request) -> str:
+    digest = hashlib.sha256(f"{request.url.path}?{request.url.query}|{version}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def conditional_get(version: Callable[[], Optional[str]], max_age: int):
+    """
+    *Route dependency that answers If-None-Match with 304 from an in-memory data version,
+    before the endpoint (and its database session) runs. version() returns None when
+    the version is unknown, e.g. an expired cache, and the request is served normally.
+    Needs the router to use ConditionalGetRoute so the headers reach the response.
+    """
+    async def dependency(request: Request):
+        current = version()
+        cache_control = f"public, max-age={max_age}"
+        if current is not None:
+            etag = _etag(current, request)
+            if _matches(request.headers.get("if-none-match"), etag):
+                raise HTTPException(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+        request.state.conditional_get = (current, version, cache_control)
+
+    return dependency
+
+
+class ConditionalGetRoute(APIRoute):
+    """Adds the ETag and Cache-Control computed by conditional_get to successful responses."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request):
+            response = await handler(request)
+            conditional = getattr(request.state, "conditional_get", None)
+            if conditional is not None and response.status_code == 200:
+                current, version, cache_control = conditional
+                # an unknown version is usually filled in by the endpoint itself (cache reload)
+                current = current if current is not None else version()
+                if current is not None:
+                    response.headers["ETag"] = _etag(current, request)
+                    response.headers["Cache-Control"] = cache_control
+            return response
+
+        return route_handler
@@ -0,0 +1,122 @@
+import base64
+from typing import Dict, Optional
+
+import httpx
+
+from bin.config import MERCHANT_CREDENTIALS, MPGS_BASE_URL, settings
+
+
+class GatewayClient:
+    """Pooled keep-alive client for a single MPGS merchant."""
+
+    def __init__(self, currency: str, credentials: dict):
+        self.currency = currency
+        self.merchant_id = credentials["merchant_id"]
+        self.notification_secret = credentials.get("notification_secret")
+
+        auth_string = f"{credentials['api_username']}:{credentials['api_password']}"
+        self.auth_header = f"Basic {base64.b64encode(auth_string.encode()).decode()}"
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._requests = 0
+        self._connections_opened = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=MPGS_BASE_URL or "",
+                http2=settings.MPGS_HTTP2,
+                limits=httpx.Limits(
+                    max_connections=settings.MPGS_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.MPGS_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.MPGS_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(
+                    connect=settings.MPGS_CONNECT_TIMEOUT,
+                    read=settings.MPGS_READ_TIMEOUT,
+                    write=settings.MPGS_WRITE_TIMEOUT,
+                    pool=settings.MPGS_POOL_TIMEOUT
+                )
+            )
+        return self._client
+
+    async def _trace(self, event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            self._connections_opened += 1
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        self._requests += 1
+        extensions = kwargs.pop("extensions", None) or {}
+        extensions.setdefault("trace", self._trace)
+        return await self.client.request(method, url, extensions=extensions, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    def stats(self) -> dict:
+        open_connections = idle_connections = waiting = 0
+
+        # httpx does not expose pool state publicly, so read it from the httpcore pool when available
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        if pool is not None:
+            connections = list(getattr(pool, "connections", []))
+            open_connections = len(connections)
+            idle_connections = sum(1 for connection in connections if connection.is_idle())
+            waiting = sum(
+                1 for pool_request in getattr(pool, "_requests", [])
+                if getattr(pool_request, "connection", None) is None
+            )
+
+        return {
+            "merchant_id": self.merchant_id,
+            "http2": settings.MPGS_HTTP2,
+            "requests": self._requests,
+            "connections_opened": self._connections_opened,
+            "connections_reused": max(self._requests - self._connections_opened, 0),
+            "connections_open": open_connections,
+            "connections_idle": idle_connections,
+            "requests_waiting": waiting,
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class HttpClientRegistry:
+    """One shared GatewayClient per merchant currency, owned by the app lifespan."""
+
+    def __init__(self, credentials: Dict[str, dict]):
+        self._clients: Dict[str, GatewayClient] = {
+            currency: GatewayClient(currency, creds)
+            for currency, creds in credentials.items()
+            if creds.get("merchant_id")
+        }
+
+    def get(self, currency: str) -> Optional[GatewayClient]:
+        return self._clients.get(currency)
+
+    def by_merchant_id(self, merchant_id: str) -> Optional[GatewayClient]:
+        return next(
+            (gateway_client for gateway_client in self._clients.values() if gateway_client.merchant_id == merchant_id),
+            None
+        )
+
+    async def startup(self):
+        for gateway_client in self._clients.values():
+            _ = gateway_client.client
+
+    async def shutdown(self):
+        for gateway_client in self._clients.values():
+            await gateway_client.aclose()
+
+    def stats(self) -> dict:
+        return {currency: gateway_client.stats() for currency, gateway_client in self._clients.items()}
+
+
+http_client_registry = HttpClientRegistry(MERCHANT_CREDENTIALS)
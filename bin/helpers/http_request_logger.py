@@ -1,20 +1,33 @@
 # app/services/http_request_logger.py
+from datetime import datetime, timezone
 from typing import Optional
 
 import httpx
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from bin.models.pg_models import ApiLog
+from bin.services.db_services.api_log_retention import compact_body
+from bin.services.db_services.api_log_service import api_log_sink
+
+
+def _response_body(response: httpx.Response):
+    # gateways and proxies answer errors with HTML or plain text; store that as a string
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
 
 
 class HttpRequestLogger:
 
-    def __init__(self, base_url: str,  db: Optional[Session] = None):
+    def __init__(self, base_url: str,  db: Optional[AsyncSession] = None, client=None):
         self.base_url = base_url
         self.headers = {}
         self.payload = {}
         self.api = ""
         self.db = db
+        # Shared pooled client (see http_client_registry); falls back to a one-off client when not set
+        self.client = client
 
     def set_api(self, api: str):
         self.api = api
@@ -29,28 +42,40 @@ class HttpRequestLogger:
         return self
 
     async def _log(self, method: str, response=None, error=None):
-        log = ApiLog(
+        record = dict(
             request_url=f"{self.base_url}{self.api}",
             request_method=method.upper(),
             request_headers=self.headers,
-            request_payload=self.payload,
-            response_status=response.status_code if response else None,
-            response_headers=dict(response.headers) if response else None,
-            response_body=response.json() if response else None,
-            error=str(error) if error else None
+            request_payload=compact_body(self.payload),
+            response_status=response.status_code if response is not None else None,
+            response_headers=dict(response.headers) if response is not None else None,
+            response_body=compact_body(_response_body(response)) if response is not None else None,
+            error=str(error) if error else None,
+            created_at=datetime.now(timezone.utc)
         )
-        self.db.add(log)
-        self.db.commit()
+
+        # Hand the row to the background writer; the request session is only used in sync mode
+        if api_log_sink.running:
+            api_log_sink.submit(record)
+        elif self.db is not None:
+            self.db.add(ApiLog(**record))
+            await self.db.commit()
 
     async def post(self):
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
+            if self.client:
+                response = await self.client.post(
                     url=f"{self.base_url}{self.api}",
                     headers=self.headers,
                     json=self.payload
                 )
-                print(response.json())
+            else:
+                async with httpx.AsyncClient() as client:
+                    response = await client.post(
+                        url=f"{self.base_url}{self.api}",
+                        headers=self.headers,
+                        json=self.payload
+                    )
             await self._log("POST", response=response)
             return response
         except Exception as e:
@@ -59,12 +84,19 @@ class HttpRequestLogger:
 
     async def get(self):
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
+            if self.client:
+                response = await self.client.get(
                     url=f"{self.base_url}{self.api}",
                     headers=self.headers,
                     params=self.payload
                 )
+            else:
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(
+                        url=f"{self.base_url}{self.api}",
+                        headers=self.headers,
+                        params=self.payload
+                    )
             await self._log("GET", response=response)
             return response
         except Exception as e:
@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from bin.config import settings
+
+
+class PasswordHasherBusy(Exception):
+    """Raised instead of queueing when too many hash operations are already waiting."""
+
+
+def _init_worker():
+    # import the password context up front so the first login doesn't pay for it
+    from bin.utils import password_utils  # noqa: F401
+
+
+def _timed_hash(password: str):
+    from bin.utils.password_utils import get_password_hash
+    started = time.perf_counter()
+    return get_password_hash(password), time.perf_counter() - started
+
+
+def _timed_verify(plain_password: str, hashed_password: str):
+    from bin.utils.password_utils import verify_password
+    started = time.perf_counter()
+    return verify_password(plain_password, hashed_password), time.perf_counter() - started
+
+
+def _timed_verify_and_update(plain_password: str, hashed_password: str):
+    from bin.utils.password_utils import verify_and_update_password
+    started = time.perf_counter()
+    return verify_and_update_password(plain_password, hashed_password), time.perf_counter() - started
+
+
+def measure_bcrypt(rounds: int, samples: int = 3) -> float:
+    """Median seconds for one bcrypt hash at this cost on the current host."""
+    from passlib.hash import bcrypt
+    handler = bcrypt.using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.hash("calibration-password")
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2]
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """Highest cost whose hash time fits in target_ms; each extra round doubles the work."""
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        if measure_bcrypt(rounds) * 1000 > target_ms:
+            break
+        chosen = rounds
+    return chosen
+
+
+class _OperationStats:
+    def __init__(self, window: int):
+        self.calls = 0
+        self.rejected = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=window)
+        self._hash_times = deque(maxlen=window)
+
+    def record(self, latency: float, hash_time: float):
+        self.calls += 1
+        self._latencies.append(latency)
+        self._hash_times.append(hash_time)
+
+    @staticmethod
+    def _percentile(values, fraction: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000, 2)
+
+    def stats(self) -> dict:
+        latencies = list(self._latencies)
+        queue_waits = [latency - hash_time for latency, hash_time in zip(latencies, self._hash_times)]
+        return {
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "latency_p50_ms": self._percentile(latencies, 0.5),
+            "latency_p95_ms": self._percentile(latencies, 0.95),
+            "latency_max_ms": self._percentile(latencies, 1),
+            "hash_p50_ms": self._percentile(self._hash_times, 0.5),
+            "queue_wait_p95_ms": self._percentile(queue_waits, 0.95),
+        }
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool so login bursts neither hold the
+    GIL nor tie up the threadpool that serves the sync routes. At most
+    PASSWORD_HASH_MAX_PENDING operations may be queued or running; beyond that
+    callers get PasswordHasherBusy straight away instead of waiting in line.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._stats: Dict[str, _OperationStats] = {
+            "hash": _OperationStats(settings.PASSWORD_HASH_STATS_WINDOW),
+            "verify": _OperationStats(settings.PASSWORD_HASH_STATS_WINDOW),
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self):
+        if self._executor is None:
+            # spawn, not fork: the app process already has an event loop, DB pools and threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+
+    async def stop(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def _run(self, operation: str, fn, *args):
+        stats = self._stats[operation]
+        if self._pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            stats.rejected += 1
+            raise PasswordHasherBusy(f"{self._pending} password operations pending")
+
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            if self._executor is None:
+                # scripts and CLI tools without the app lifespan
+                result, hash_time = await asyncio.to_thread(fn, *args)
+            else:
+                result, hash_time = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        stats.record(time.perf_counter() - started, hash_time)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", _timed_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", _timed_verify, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """verify() that also returns a rehash when the stored hash was made at a cost other than BCRYPT_ROUNDS."""
+        return await self._run("verify", _timed_verify_and_update, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "workers": settings.PASSWORD_HASH_WORKERS,
+            "pending": self._pending,
+            "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+            **{operation: stats.stats() for operation, stats in self._stats.items()},
+        }
+
+
+password_hasher = PasswordHasher()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="bcrypt cost calibration")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    calibrate_parser = subparsers.add_parser("calibrate", help="pick BCRYPT_ROUNDS for a hash time budget")
+    calibrate_parser.add_argument("--target-ms", type=float, default=settings.BCRYPT_TARGET_MS)
+    calibrate_parser.add_argument("--env-file", default=".env")
+    calibrate_parser.add_argument("--dry-run", action="store_true", help="print the result without writing it")
+    benchmark_parser = subparsers.add_parser("benchmark", help="logins/sec/core at each cost")
+    benchmark_parser.add_argument("--min-rounds", type=int, default=10)
+    benchmark_parser.add_argument("--max-rounds", type=int, default=14)
+    args = parser.parse_args()
+
+    if args.command == "calibrate":
+        rounds = calibrate_rounds(args.target_ms)
+        print(f"BCRYPT_ROUNDS={rounds} ({measure_bcrypt(rounds) * 1000:.0f} ms per hash, target {args.target_ms:.0f} ms)")
+        if not args.dry_run:
+            from dotenv import set_key
+            set_key(args.env_file, "BCRYPT_ROUNDS", str(rounds), quote_mode="never")
+            print(f"Written to {args.env_file}; existing hashes are upgraded on each user's next login")
+    else:
+        print(f"{'rounds':>6} {'ms/hash':>9} {'logins/sec/core':>16}")
+        for rounds in range(args.min_rounds, args.max_rounds + 1):
+            seconds = measure_bcrypt(rounds)
+            print(f"{rounds:>6} {seconds * 1000:>9.1f} {1 / seconds:>16.1f}")
@@ -0,0 +1,170 @@
+import queue
+import smtplib
+import threading
+import time
+from email.message import Message
+from typing import Dict, List, Optional
+
+from bin.config import settings
+
+
+def _is_connection_error(error: Exception) -> bool:
+    """Errors after which the session is thrown away and the message retried on a fresh one."""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # SMTPException subclasses OSError, but a rejected recipient/message doesn't mean a dead session
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class SmtpConnectionPool:
+    """
+    Up to `size` logged-in SMTP sessions for one account, reused across sends.
+    Blocking smtplib; meant to be driven from worker threads by MailPipeline.
+    encryption is "ssl" (SMTP_SSL), "tls" (STARTTLS) or "none", the latter
+    for a local stand-in such as `python -m aiosmtpd -n -l localhost:1025`.
+    """
+
+    def __init__(self, name: str, host: str, port: int, encryption: Optional[str],
+                 username: Optional[str], password: Optional[str], size: int):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.encryption = (encryption or "ssl").lower()
+        self.username = username
+        self.password = password
+        self.size = size
+
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+        self.connections_opened = 0
+        self.reconnects = 0
+        self.batches = 0
+        self.sent = 0
+        self.failed = 0
+        self.send_seconds = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.encryption == "ssl":
+            server = smtplib.SMTP_SSL(host=self.host, port=self.port, timeout=settings.SMTP_TIMEOUT)
+        else:
+            server = smtplib.SMTP(host=self.host, port=self.port, timeout=settings.SMTP_TIMEOUT)
+            if self.encryption == "tls":
+                server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        self.connections_opened += 1
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _acquire(self) -> smtplib.SMTP:
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    server, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                # servers drop idle sessions; don't bother probing old ones
+                if time.monotonic() - last_used < settings.SMTP_IDLE_TIMEOUT:
+                    return server
+                self._close(server)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, server: Optional[smtplib.SMTP]):
+        if server is not None:
+            self._idle.put((server, time.monotonic()))
+        self._slots.release()
+
+    def send_batch(self, messages: List[Message]) -> List[Optional[Exception]]:
+        """Send messages over one session; returns None or the exception for each message."""
+        started = time.monotonic()
+        results: List[Optional[Exception]] = []
+        server = self._acquire()
+        try:
+            for message in messages:
+                try:
+                    try:
+                        server.send_message(message)
+                    except Exception as e:
+                        if not _is_connection_error(e):
+                            raise
+                        self._close(server)
+                        self.reconnects += 1
+                        server = None
+                        server = self._connect()
+                        server.send_message(message)
+                    results.append(None)
+                    self.sent += 1
+                except Exception as e:
+                    print(f"Failed to send email via {self.name}: {str(e)}")
+                    results.append(e)
+                    self.failed += 1
+                    if server is None:
+                        # could not reconnect; fail the rest of the batch the same way
+                        remaining = len(messages) - len(results)
+                        results.extend([e] * remaining)
+                        self.failed += remaining
+                        break
+        finally:
+            self._release(server)
+            self.batches += 1
+            self.send_seconds += time.monotonic() - started
+        return results
+
+    def close(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+    def stats(self) -> dict:
+        return {
+            "host": self.host,
+            "connections_opened": self.connections_opened,
+            "connections_idle": self._idle.qsize(),
+            "reconnects": self.reconnects,
+            "batches": self.batches,
+            "sent": self.sent,
+            "failed": self.failed,
+            "messages_per_second": self.sent / self.send_seconds if self.send_seconds else None,
+        }
+
+
+def _build_pools() -> Dict[str, SmtpConnectionPool]:
+    return {
+        "default": SmtpConnectionPool(
+            "default",
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            settings.SMTP_ENCRYPTION,
+            settings.SMTP_SENDER_MAIL,
+            settings.SMTP_SENDER_PW,
+            settings.SMTP_POOL_SIZE
+        ),
+        "contact": SmtpConnectionPool(
+            "contact",
+            settings.CONTACT_SMTP_HOST,
+            settings.CONTACT_SMTP_PORT,
+            settings.CONTACT_SMTP_ENCRYPTION,
+            settings.CONTACT_SMTP_USER,
+            settings.CONTACT_SMTP_PW,
+            settings.SMTP_POOL_SIZE
+        ),
+    }
+
+
+smtp_pools = _build_pools()
@@ -0,0 +1,95 @@
+import argparse
+import os
+from typing import Iterable, List, Optional
+
+from jinja2 import (ChoiceLoader, Environment, FileSystemBytecodeCache, FileSystemLoader, ModuleLoader,
+                    StrictUndefined, Template, select_autoescape)
+
+from bin.config import settings
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+
+
+class TemplateRenderer:
+    """
+    Jinja2 environment for emails and HTML pages. Templates are compiled once by
+    load() at startup and held in memory (auto_reload is off). With
+    TEMPLATE_PRECOMPILED_DIR set, workers only import the Python modules found
+    there; they are written at build time by
+    `python -m bin.helpers.template_renderer compile`, never by the app, and
+    must be rebuilt whenever a template changes. Templates missing from the
+    directory fall back to the sources. With TEMPLATE_BYTECODE_CACHE_DIR they
+    go through Jinja's bytecode cache instead.
+    """
+
+    def __init__(self, template_dir: str = TEMPLATE_DIR):
+        self.template_dir = template_dir
+        self._env: Optional[Environment] = None
+
+    def _build_env(self) -> Environment:
+        source_loader = FileSystemLoader(self.template_dir)
+        loader = source_loader
+        bytecode_cache = None
+
+        if settings.TEMPLATE_PRECOMPILED_DIR and os.path.isdir(settings.TEMPLATE_PRECOMPILED_DIR):
+            loader = ChoiceLoader([ModuleLoader(settings.TEMPLATE_PRECOMPILED_DIR), source_loader])
+        elif settings.TEMPLATE_PRECOMPILED_DIR:
+            print(f"TEMPLATE_PRECOMPILED_DIR {settings.TEMPLATE_PRECOMPILED_DIR} not found, compiling templates from source")
+        elif settings.TEMPLATE_BYTECODE_CACHE_DIR:
+            os.makedirs(settings.TEMPLATE_BYTECODE_CACHE_DIR, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(settings.TEMPLATE_BYTECODE_CACHE_DIR)
+
+        return Environment(
+            loader=loader,
+            bytecode_cache=bytecode_cache,
+            autoescape=select_autoescape(["html"]),
+            undefined=StrictUndefined,
+            auto_reload=False,
+            cache_size=-1
+        )
+
+    @property
+    def env(self) -> Environment:
+        if self._env is None:
+            self._env = self._build_env()
+        return self._env
+
+    def load(self) -> List[str]:
+        """Compile every template up front so the first request doesn't pay for it."""
+        names = FileSystemLoader(self.template_dir).list_templates()
+        for name in names:
+            self.env.get_template(name)
+        return names
+
+    def compile(self, target_dir: str) -> List[str]:
+        """Write every template as an importable module to target_dir, for ModuleLoader."""
+        compiler = Environment(loader=FileSystemLoader(self.template_dir), autoescape=select_autoescape(["html"]))
+        compiler.compile_templates(target_dir, zip=None, ignore_errors=False)
+        return compiler.list_templates()
+
+    def get(self, name: str) -> Template:
+        return self.env.get_template(name)
+
+    def render(self, name: str, /, **context) -> str:
+        # positional-only, since templates may use "name" as a variable themselves
+        return self.get(name).render(**context)
+
+    def render_batch(self, name: str, contexts: Iterable[dict]) -> List[str]:
+        """Render one template for many contexts, e.g. a bulk mailing, looking it up only once."""
+        template = self.get(name)
+        return [template.render(**context) for context in contexts]
+
+
+template_renderer = TemplateRenderer()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="template build steps")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compile_parser = subparsers.add_parser("compile", help="precompile templates for TEMPLATE_PRECOMPILED_DIR")
+    compile_parser.add_argument("--target-dir", default=settings.TEMPLATE_PRECOMPILED_DIR,
+                                required=not settings.TEMPLATE_PRECOMPILED_DIR)
+    args = parser.parse_args()
+
+    names = template_renderer.compile(args.target_dir)
+    print(f"Compiled {len(names)} templates to {args.target_dir}")
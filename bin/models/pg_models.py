@@ -1,5 +1,5 @@
-from sqlalchemy import Column, func, JSON, ForeignKey, Numeric
-from sqlalchemy import String, Integer, Float, DateTime, Boolean, Text
+from sqlalchemy import Column, func, JSON, ForeignKey, Numeric, Index
+from sqlalchemy import String, Integer, Float, DateTime, Date, Boolean, Text, Sequence
 
 from bin.db.postgresDB import Base
 
@@ -16,8 +16,8 @@ class DonationTable(Base):
     currency_id = Column(Integer, nullable=False)
     amount = Column(Float, nullable=False)
     donation_id = Column(Integer,nullable=False)
-    created_at = Column(DateTime, default=func.now())
-    payment_done_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=func.now(), index=True)
+    payment_done_at = Column(DateTime, nullable=True, index=True)
 
 
 class CurrencyTable(Base):
@@ -46,16 +46,93 @@ class RidersTable(Base):
     rider_raise = Column(Float, nullable=False)
     rider_img = Column(String, index=True)
 
+# Keyset pagination order of /get-riders-list, covering the public fields so pages are index-only
+Index(
+    "ix_riders_info_raise_keyset",
+    RidersTable.rider_raise.desc(),
+    RidersTable.rider_id.desc(),
+    postgresql_include=["rider_name", "rider_goal", "rider_img"]
+)
+# Case-insensitive name prefix search (lower(rider_name) LIKE 'abc%')
+Index(
+    "ix_riders_info_name_prefix",
+    func.lower(RidersTable.rider_name).label("rider_name_lower"),
+    postgresql_ops={"rider_name_lower": "text_pattern_ops"}
+)
+
 class RiderDonation(Base):
     __tablename__ = "riders_donations"
 
     rider_id = Column(Integer, primary_key=True)
     donation_id = Column(Integer, primary_key=True)
 
+# Shared change counters behind the ETags of the live public endpoints (see helpers/conditional_get).
+# Sequences, not rows, so bumping them never takes a lock that writers would queue on.
+DATA_VERSION_SEQUENCES = {
+    name: Sequence(f"data_version_{name}", metadata=Base.metadata)
+    for name in ("riders", "donation_totals")
+}
+
+class RiderRaiseCounter(Base):
+    """
+    Confirmed donations not yet rolled up into riders_info.rider_raise, spread over
+    RIDER_COUNTER_SLOTS rows per rider so concurrent payments don't queue on one row lock.
+    """
+    __tablename__ = "rider_raise_counters"
+
+    rider_id = Column(Integer, primary_key=True)
+    slot = Column(Integer, primary_key=True)
+    amount = Column(Float, nullable=False, default=0)
+
+class DonationTotal(Base):
+    """
+    Paid donation totals per donation type and currency, maintained by finalize_transactions
+    and rebuilt by donation_totals_service recompute.
+    """
+    __tablename__ = "donation_totals"
+
+    donation_type_id = Column(Integer, primary_key=True)
+    currency_id = Column(Integer, primary_key=True)
+    total_amount = Column(Float, nullable=False, default=0)
+    donation_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class DonationRollup(Base):
+    """Daily donation counts and paid amounts, built by analytics_service from rows past the watermark."""
+    __tablename__ = "donation_rollups"
+
+    day = Column(Date, primary_key=True)
+    donation_type_id = Column(Integer, primary_key=True)
+    currency_id = Column(Integer, primary_key=True)
+    # 0 for donations not made to a rider
+    rider_id = Column(Integer, primary_key=True)
+    donations_created = Column(Integer, nullable=False, default=0)
+    donations_paid = Column(Integer, nullable=False, default=0)
+    amount_paid = Column(Float, nullable=False, default=0)
+
+class TransactionRollup(Base):
+    """Daily initiated/completed/failed transaction counts per currency, for conversion rates."""
+    __tablename__ = "transaction_rollups"
+
+    day = Column(Date, primary_key=True)
+    currency = Column(String, primary_key=True)
+    initiated = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class ApiLog(Base):
     __tablename__ = "api_logs"
+    # Range partitioned by created_at, partitions are managed by api_log_retention
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     request_url = Column(String, nullable=False)
     request_method = Column(String, nullable=False)
     request_headers = Column(JSON, nullable=True)
@@ -64,7 +141,7 @@ class ApiLog(Base):
     response_headers = Column(JSON, nullable=True)
     response_body = Column(JSON, nullable=True)
     error = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
 
 class Transaction(Base):
     __tablename__ = "transactions"
@@ -73,14 +150,66 @@ class Transaction(Base):
     donation_id = Column(Integer, ForeignKey('donation.record_id'))
     mpgs_order_id = Column(String, unique=True)
     session_id = Column(String)
-    success_indicator = Column(String)
+    success_indicator = Column(String, index=True)
     status = Column(String, default="initiated")
+    gateway_code = Column(String, nullable=True)
+    verification_started_at = Column(DateTime(timezone=True), nullable=True)
+    # gateway lookups made by the reconciler; it stops at RECONCILE_MAX_ATTEMPTS
+    verify_attempts = Column(Integer, nullable=False, default=0, server_default="0")
     amount = Column(Numeric(10, 2))
     currency = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
+
 
+class GatewayNotification(Base):
+    __tablename__ = "gateway_notifications"
 
+    id = Column(Integer, primary_key=True)
+    notification_id = Column(String, unique=True, nullable=False)
+    order_id = Column(String, index=True)
+    merchant_id = Column(String, nullable=True)
+    outcome = Column(String, nullable=True)
+    payload = Column(JSON, nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String(50), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False, default="in_progress")
+    response = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
 
 
+class EmailOutbox(Base):
+    """
+    Emails written in the same transaction as the change that triggers them and
+    delivered by email_outbox_service workers.
+    """
+    __tablename__ = "email_outbox"
 
+    id = Column(Integer, primary_key=True)
+    mailer = Column(String(50), nullable=False, default="default")
+    recipient = Column(String(255), nullable=False)
+    template = Column(String(100), nullable=False)
+    context = Column(JSON, nullable=False)
+    # pending, sending, sent, dead
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+# Only unsent rows are ever scanned by the workers
+Index(
+    "ix_email_outbox_due",
+    EmailOutbox.next_attempt_at,
+    postgresql_where=EmailOutbox.status.in_(["pending", "sending"])
+)
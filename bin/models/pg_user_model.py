@@ -50,6 +50,8 @@ class User(Base):
     user_status = Column(String(50), default="pending")  # pending, active, suspended, banned
     user_image = Column(String(255), nullable=True)
     email_verified = Column(Boolean, default=False)
+    # bumped on every status or role change; tokens carry it so older ones stop working
+    status_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     roles = relationship("Role", secondary=user_roles, back_populates="users")
@@ -0,0 +1,42 @@
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bin.controllers.analytics_controller import analyticsManager
+from bin.db.postgresDB import async_db_connection
+from bin.helpers.auth_helper import Auth, Roles
+
+analytics_router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"],
+    dependencies=[Depends(Auth([Roles.ADMIN]))]
+)
+
+
+@analytics_router.get("/donations")
+async def get_donation_analytics(
+        period: Literal["day", "week"] = "day",
+        group_by: Optional[Literal["currency", "donation_type", "rider"]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        db: AsyncSession = Depends(async_db_connection)
+):
+    return await analyticsManager.donations(db, period, group_by, start, end)
+
+
+@analytics_router.get("/conversion")
+async def get_conversion_analytics(
+        period: Literal["day", "week"] = "day",
+        currency: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        db: AsyncSession = Depends(async_db_connection)
+):
+    return await analyticsManager.conversion(db, period, currency, start, end)
+
+
+@analytics_router.get("/status")
+async def get_analytics_status(db: AsyncSession = Depends(async_db_connection)):
+    return await analyticsManager.status(db)
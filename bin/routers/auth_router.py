@@ -12,9 +12,9 @@ auth_router = APIRouter(
 )
 
 @auth_router.put('/register', status_code=status.HTTP_200_OK)
-def update_profile(user_data: UserCreate,
+async def update_profile(user_data: UserCreate,
                     auth_controller: AuthController = Depends(AuthController)):
-    return auth_controller.register(user_data)
+    return await auth_controller.register(user_data)
 
 
 @auth_router.put('/verify_otp', status_code=status.HTTP_200_OK)
@@ -23,9 +23,9 @@ def verify_otp_and_activate_account(otp_code: str,
     return auth_controller.verify_otp_and_activate_account(otp_code)
 
 @auth_router.post('/login', status_code=status.HTTP_200_OK)
-def login( login_request: UserLogin,
+async def login( login_request: UserLogin,
           auth_controller: AuthController = Depends(AuthController)):
-    return auth_controller.login(login_request)
+    return await auth_controller.login(login_request)
 
 @auth_router.get('/refresh-token')
 async def refresh_token(token: str = Depends(HTTPBearer(bearerFormat='token')),
@@ -1,40 +1,73 @@
-from fastapi import APIRouter, Request
-from starlette.responses import HTMLResponse
+from typing import Optional
+
+from fastapi import APIRouter, Request, Depends, Header
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import HTMLResponse, StreamingResponse
+
+from bin.config import settings
+from bin.db.postgresDB import async_db_connection
+from bin.helpers.conditional_get import ConditionalGetRoute, conditional_get, data_versions
 
 from bin.requests.donation_request import DonationRequest
 from bin.controllers.donation_controller import donationManager
+from bin.services.db_services.live_feed_service import live_feed
+from bin.services.db_services.reference_data_service import reference_data
 
 router = APIRouter(
     prefix="/ccc-line",
-    tags=["Donations"]
+    tags=["Donations"],
+    route_class=ConditionalGetRoute
 )
 
+reference_data_etag = conditional_get(lambda: reference_data.version, settings.HTTP_CACHE_REFERENCE_MAX_AGE)
+donation_totals_etag = conditional_get(lambda: data_versions.token("donation_totals"), settings.HTTP_CACHE_LIVE_MAX_AGE)
+
 @router.post("/send-donation")
-async def send_donation(request:DonationRequest):
-    return await donationManager.donation(request)
+async def send_donation(request:DonationRequest,
+                        db: AsyncSession = Depends(async_db_connection),
+                        idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", max_length=255)):
+    return await donationManager.donation(request, db, idempotency_key)
 
 @router.get("/payment-page/{donation_id}", response_class=HTMLResponse)
-async def payment_page(donation_id: int):
-    return await donationManager.payment_page(donation_id)
+async def payment_page(donation_id: int, db: AsyncSession = Depends(async_db_connection)):
+    return await donationManager.payment_page(donation_id, db)
 
 @router.get("/payment_callback")
 async def payment_callback(
-        request: Request
+        request: Request,
+        db: AsyncSession = Depends(async_db_connection)
 ):
-    return await donationManager.payment_callback(request)
+    return await donationManager.payment_callback(request, db)
+
+
+@router.post("/payment-notification")
+async def payment_notification(
+        request: Request,
+        db: AsyncSession = Depends(async_db_connection)
+):
+    return await donationManager.payment_notification(request, db)
+
 
+@router.get("/get-currency-list", dependencies=[Depends(reference_data_etag)])
+async def all_currency_list(db: AsyncSession = Depends(async_db_connection)):
+    return await donationManager.get_currency_list(db)
 
-@router.get("/get-currency-list")
-def all_currency_list():
-    return donationManager.get_currency_list()
+@router.get("/get-donation-types", dependencies=[Depends(reference_data_etag)])
+async def get_donation_types(db: AsyncSession = Depends(async_db_connection)):
+    return await donationManager.donation_types(db)
 
-@router.get("/get-donation-types")
-def get_donation_types():
-    return donationManager.donation_types()
+@router.get("/get-total-general-donations", dependencies=[Depends(donation_totals_etag)])
+async def get_total_general_donations(db: AsyncSession = Depends(async_db_connection)):
+    return await donationManager.get_total_donations(db)
 
-@router.get("/get-total-general-donations")
-def get_total_general_donations():
-    return donationManager.get_total_donations()
+@router.get("/live-feed")
+async def donation_live_feed():
+    """Server-Sent Events: 'donations' deltas for totals and riders, 'resync' when a snapshot refetch is needed."""
+    return StreamingResponse(
+        live_feed.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/payment-success/{donation_id}", response_class=HTMLResponse)
 async def payment_success(donation_id: int):
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from bin.controllers.export_controller import exportManager
+from bin.enums.transaction_status import TransactionStatus
+from bin.helpers.auth_helper import Auth, Roles
+
+export_router = APIRouter(
+    prefix="/exports",
+    tags=["Exports"],
+    dependencies=[Depends(Auth([Roles.ADMIN]))]
+)
+
+
+@export_router.get("/donations")
+def export_donations(
+        export_format: Literal["csv", "ndjson"] = Query(default="csv", alias="format"),
+        start: Optional[datetime] = Query(default=None, description="donation created_at, inclusive"),
+        end: Optional[datetime] = Query(default=None, description="donation created_at, exclusive"),
+        status: Optional[TransactionStatus] = Query(default=None, description="latest transaction status"),
+        gzip: bool = False
+):
+    return exportManager.donations(export_format, start, end, status, gzip)
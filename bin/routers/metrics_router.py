@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bin.db.postgresDB import async_db_connection
+from bin.helpers.auth_helper import Auth, Roles
+from bin.helpers.conditional_get import data_versions
+from bin.helpers.http_client_registry import http_client_registry
+from bin.helpers.password_hasher import password_hasher
+from bin.services.db_services.api_log_service import api_log_sink
+from bin.services.db_services.email_outbox_service import email_outbox_worker
+from bin.services.db_services.leaderboard_service import rider_leaderboard
+from bin.services.db_services.live_feed_service import live_feed
+from bin.services.db_services.payment_service import PaymentService
+from bin.services.db_services.reconciliation_service import reconciliation_worker
+from bin.services.db_services.reference_data_service import reference_data
+from bin.services.db_services.role_catalogue_service import role_catalogue
+from bin.services.db_services.user_cache_service import user_cache
+from bin.services.mail_pipeline import mail_pipeline
+
+metrics_router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+    dependencies=[Depends(Auth([Roles.ADMIN]))]
+)
+
+
+@metrics_router.get("/http-clients")
+def get_http_client_stats():
+    return http_client_registry.stats()
+
+
+@metrics_router.get("/api-logs")
+def get_api_log_stats():
+    return api_log_sink.stats()
+
+
+@metrics_router.get("/reconciliation")
+def get_reconciliation_stats():
+    return reconciliation_worker.stats()
+
+
+@metrics_router.get("/payment-gateway")
+def get_payment_gateway_stats():
+    return PaymentService.stats()
+
+
+@metrics_router.get("/live-feed")
+def get_live_feed_stats():
+    return live_feed.stats()
+
+
+@metrics_router.get("/leaderboard")
+def get_leaderboard_stats():
+    return rider_leaderboard.stats()
+
+
+@metrics_router.get("/mail")
+def get_mail_stats():
+    return mail_pipeline.stats()
+
+
+@metrics_router.get("/password-hasher")
+def get_password_hasher_stats():
+    return password_hasher.stats()
+
+
+@metrics_router.get("/email-outbox")
+async def get_email_outbox_stats(db: AsyncSession = Depends(async_db_connection)):
+    return {**email_outbox_worker.stats(), "backlog": await email_outbox_worker.backlog(db)}
+
+
+@metrics_router.get("/reference-data")
+def get_reference_data_stats():
+    return reference_data.stats()
+
+
+@metrics_router.post("/reference-data/invalidate")
+def invalidate_reference_data():
+    reference_data.invalidate()
+    return reference_data.stats()
+
+
+@metrics_router.get("/role-catalogue")
+def get_role_catalogue_stats():
+    return role_catalogue.stats()
+
+
+@metrics_router.post("/role-catalogue/invalidate")
+def invalidate_role_catalogue():
+    role_catalogue.invalidate()
+    return role_catalogue.stats()
+
+
+@metrics_router.get("/user-cache")
+def get_user_cache_stats():
+    return user_cache.stats()
+
+
+@metrics_router.get("/data-versions")
+def get_data_version_stats():
+    return data_versions.stats()
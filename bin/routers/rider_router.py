@@ -1,16 +1,36 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from bin.config import settings
+from bin.helpers.conditional_get import ConditionalGetRoute, conditional_get, data_versions
 from bin.requests.rider_request import RiderRequest
 from bin.controllers.rider_controller import riderManager
 
 router = APIRouter(
     prefix="/ccc-line",
-    tags=["Riders"]
+    tags=["Riders"],
+    route_class=ConditionalGetRoute
 )
 
+riders_etag = conditional_get(lambda: data_versions.token("riders"), settings.HTTP_CACHE_LIVE_MAX_AGE)
+
 @router.post("/create-new-rider")
 def send_donation(request:RiderRequest):
     return riderManager.rider_registration(request)
 
-@router.get("/get-riders-list")
-def get_all_riders_list():
-    return riderManager.get_all_riders()
\ No newline at end of file
+@router.get("/get-riders-list", dependencies=[Depends(riders_etag)])
+def get_all_riders_list(limit: int = Query(default=50, ge=1, le=200),
+                        cursor: Optional[str] = None,
+                        fields: Optional[str] = Query(default=None, description="comma separated, e.g. rider_name,rider_raise"),
+                        name_prefix: Optional[str] = Query(default=None, max_length=100)):
+    return riderManager.get_all_riders(limit, cursor, fields, name_prefix)
+
+# The leaderboard is changed on the event loop, so its readers stay on it too (async def, not the threadpool)
+@router.get("/rider-leaderboard")
+async def get_rider_leaderboard(top: int = Query(default=10, ge=1, le=500)):
+    return riderManager.get_leaderboard(top)
+
+@router.get("/rider-leaderboard/{rider_id}")
+async def get_rider_rank(rider_id: int):
+    return riderManager.get_rider_rank(rider_id)
@@ -0,0 +1,248 @@
+import asyncio
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import DateTime, Date, cast, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bin.config import settings
+from bin.db.advisory_lock import try_async_advisory_lock
+from bin.db.postgresDB import async_engine
+from bin.enums.transaction_status import TransactionStatus
+from bin.models import pg_models
+
+ROLLUP_NAME = "donation_analytics"
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+DIMENSIONS = {
+    "currency": pg_models.DonationRollup.currency_id,
+    "donation_type": pg_models.DonationRollup.donation_type_id,
+    "rider": pg_models.DonationRollup.rider_id,
+}
+
+
+def _additive_upsert(model, keys: list, values: list, source):
+    table = model.__table__
+    stmt = insert(table).from_select(keys + values, source)
+    return stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={column: table.c[column] + stmt.excluded[column] for column in values}
+    )
+
+
+def _naive(moment: datetime):
+    # donation timestamps are timestamp without time zone; convert the bound on the
+    # server side so the comparison stays on the plain column and can use its index
+    return cast(literal(moment, DateTime(timezone=True)), DateTime())
+
+
+def _rollup_statements(lower: datetime, upper: datetime):
+    donations = pg_models.DonationTable.__table__
+    rider_donations = pg_models.RiderDonation.__table__
+    transactions = pg_models.Transaction.__table__
+    rider_id = func.coalesce(rider_donations.c.rider_id, 0)
+    with_rider = donations.outerjoin(rider_donations, rider_donations.c.donation_id == donations.c.record_id)
+    donation_keys = ["day", "donation_type_id", "currency_id", "rider_id"]
+
+    created_day = func.date(donations.c.created_at)
+    yield _additive_upsert(
+        pg_models.DonationRollup, donation_keys, ["donations_created"],
+        select(created_day, donations.c.donation_id, donations.c.currency_id, rider_id, func.count())
+        .select_from(with_rider)
+        .where(donations.c.created_at > _naive(lower), donations.c.created_at <= _naive(upper))
+        .group_by(created_day, donations.c.donation_id, donations.c.currency_id, rider_id)
+    )
+
+    paid_day = func.date(donations.c.payment_done_at)
+    yield _additive_upsert(
+        pg_models.DonationRollup, donation_keys, ["donations_paid", "amount_paid"],
+        select(
+            paid_day, donations.c.donation_id, donations.c.currency_id, rider_id,
+            func.count(), func.sum(donations.c.amount)
+        )
+        .select_from(with_rider)
+        .where(donations.c.payment_done_at > _naive(lower), donations.c.payment_done_at <= _naive(upper))
+        .group_by(paid_day, donations.c.donation_id, donations.c.currency_id, rider_id)
+    )
+
+    initiated_day = func.date(transactions.c.created_at)
+    yield _additive_upsert(
+        pg_models.TransactionRollup, ["day", "currency"], ["initiated"],
+        select(initiated_day, func.coalesce(transactions.c.currency, ""), func.count())
+        .where(transactions.c.created_at > lower, transactions.c.created_at <= upper)
+        .group_by(initiated_day, func.coalesce(transactions.c.currency, ""))
+    )
+
+    # a transaction is not updated again after it reaches a final state,
+    # so its updated_at is the moment it was finalized
+    finalized_day = func.date(transactions.c.updated_at)
+    yield _additive_upsert(
+        pg_models.TransactionRollup, ["day", "currency"], ["completed", "failed"],
+        select(
+            finalized_day,
+            func.coalesce(transactions.c.currency, ""),
+            func.count().filter(transactions.c.status == TransactionStatus.COMPLETED.value),
+            func.count().filter(transactions.c.status == TransactionStatus.FAILED.value)
+        )
+        .where(
+            transactions.c.status.in_([TransactionStatus.COMPLETED.value, TransactionStatus.FAILED.value]),
+            transactions.c.updated_at > lower,
+            transactions.c.updated_at <= upper
+        )
+        .group_by(finalized_day, func.coalesce(transactions.c.currency, ""))
+    )
+
+
+class AnalyticsRollupJob:
+    """
+    Folds donation and transaction events between the stored watermark and
+    now() - ANALYTICS_ROLLUP_LAG_SECONDS into the daily rollup tables. Each run
+    only reads the new window (through the timestamp indexes), and the upserts
+    and the watermark move commit together, so a failed run is simply retried.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.groups_upserted = 0
+        self.watermark: Optional[datetime] = None
+        self.last_run_seconds = None
+
+    async def run_once(self) -> bool:
+        started = time.monotonic()
+        watermarks = pg_models.RollupWatermark.__table__
+
+        async with async_engine.connect() as conn:
+            async with try_async_advisory_lock(conn, "analytics_rollup") as acquired:
+                if not acquired:
+                    return False
+
+                await conn.execute(
+                    insert(watermarks).values(name=ROLLUP_NAME, watermark=EPOCH).on_conflict_do_nothing()
+                )
+                lower = (await conn.execute(
+                    select(watermarks.c.watermark).where(watermarks.c.name == ROLLUP_NAME).with_for_update()
+                )).scalar()
+                upper = (await conn.execute(
+                    select(func.now() - timedelta(seconds=settings.ANALYTICS_ROLLUP_LAG_SECONDS))
+                )).scalar()
+
+                if upper > lower:
+                    for stmt in _rollup_statements(lower, upper):
+                        self.groups_upserted += (await conn.execute(stmt)).rowcount
+                    await conn.execute(
+                        update(watermarks).where(watermarks.c.name == ROLLUP_NAME).values(watermark=upper)
+                    )
+                    lower = upper
+                await conn.commit()
+
+        self.watermark = lower
+        self.runs += 1
+        self.last_run_seconds = time.monotonic() - started
+        return True
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Analytics rollup failed: {str(e)}")
+            await asyncio.sleep(settings.ANALYTICS_ROLLUP_INTERVAL)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "runs": self.runs,
+            "groups_upserted": self.groups_upserted,
+            "last_run_seconds": self.last_run_seconds,
+        }
+
+
+async def rollup_status(db_session: AsyncSession) -> dict:
+    watermark = (await db_session.execute(
+        select(pg_models.RollupWatermark.watermark).where(pg_models.RollupWatermark.name == ROLLUP_NAME)
+    )).scalar()
+    await db_session.commit()
+    return {
+        "watermark": watermark,
+        "lag_seconds": (datetime.now(timezone.utc) - watermark).total_seconds() if watermark else None,
+        **analytics_rollup.stats(),
+    }
+
+
+def _period_column(column, period: str):
+    return cast(func.date_trunc(period, column), Date).label("period")
+
+
+async def donation_summary(db_session: AsyncSession, period: str, group_by: Optional[str],
+                           start: Optional[date], end: Optional[date]) -> list:
+    """*Donations created/paid and amount paid per day or week, optionally split by one dimension"""
+    rollups = pg_models.DonationRollup
+    period_column = _period_column(rollups.day, period)
+    columns = [period_column]
+    if group_by:
+        columns.append(DIMENSIONS[group_by].label(group_by))
+
+    stmt = select(
+        *columns,
+        func.sum(rollups.donations_created).label("donations_created"),
+        func.sum(rollups.donations_paid).label("donations_paid"),
+        func.sum(rollups.amount_paid).label("amount_paid")
+    ).group_by(*columns).order_by(*columns)
+
+    if group_by == "rider":
+        stmt = stmt.where(rollups.rider_id != 0)
+    if start:
+        stmt = stmt.where(rollups.day >= start)
+    if end:
+        stmt = stmt.where(rollups.day < end)
+
+    rows = (await db_session.execute(stmt)).mappings().all()
+    await db_session.commit()
+    return [dict(row) for row in rows]
+
+
+async def conversion_summary(db_session: AsyncSession, period: str, currency: Optional[str],
+                             start: Optional[date], end: Optional[date]) -> list:
+    """*Initiated vs completed transactions per day or week"""
+    rollups = pg_models.TransactionRollup
+    period_column = _period_column(rollups.day, period)
+
+    stmt = select(
+        period_column,
+        func.sum(rollups.initiated).label("initiated"),
+        func.sum(rollups.completed).label("completed"),
+        func.sum(rollups.failed).label("failed")
+    ).group_by(period_column).order_by(period_column)
+
+    if currency:
+        stmt = stmt.where(rollups.currency == currency)
+    if start:
+        stmt = stmt.where(rollups.day >= start)
+    if end:
+        stmt = stmt.where(rollups.day < end)
+
+    rows = (await db_session.execute(stmt)).mappings().all()
+    await db_session.commit()
+    return [
+        {**row, "conversion_rate": row["completed"] / row["initiated"] if row["initiated"] else None}
+        for row in rows
+    ]
+
+
+analytics_rollup = AnalyticsRollupJob()
@@ -0,0 +1,261 @@
+import argparse
+import asyncio
+import base64
+import glob
+import gzip
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from bin.config import settings
+from bin.db.advisory_lock import try_advisory_lock
+from bin.db.postgresDB import engine
+
+PARENT_TABLE = "api_logs"
+DEFAULT_PARTITION = "api_logs_default"
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def compact_body(value):
+    """
+    *Keep large request/response bodies out of the hot table: gzip them when they
+    exceed API_LOG_MAX_BODY_BYTES and keep only a preview if that is still too big.
+    """
+    if value is None:
+        return None
+
+    encoded = json.dumps(value, default=_json_default).encode()
+    limit = settings.API_LOG_MAX_BODY_BYTES
+    if len(encoded) <= limit:
+        return value
+
+    compressed = base64.b64encode(gzip.compress(encoded)).decode()
+    if len(compressed) <= limit:
+        return {"_encoding": "gzip+base64", "size": len(encoded), "data": compressed}
+
+    return {"_encoding": "truncated", "size": len(encoded), "preview": encoded[:limit].decode(errors="ignore")}
+
+
+def expand_body(value):
+    """Reverse compact_body for gzipped bodies; truncated bodies are returned as stored."""
+    if isinstance(value, dict) and value.get("_encoding") == "gzip+base64":
+        return json.loads(gzip.decompress(base64.b64decode(value["data"])))
+    return value
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    value = value.strip("'")
+    # postgres renders offsets as +00, fromisoformat wants +00:00
+    if len(value) > 3 and value[-3] in "+-" and value[-2:].isdigit():
+        value = f"{value}:00"
+    return datetime.fromisoformat(value)
+
+
+class ApiLogRetention:
+    """
+    Creates time partitions for api_logs ahead of time, and moves partitions that
+    fall out of the hot window into gzipped JSONL archives before dropping them.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def daily(self) -> bool:
+        return settings.API_LOG_PARTITION_INTERVAL == "day"
+
+    def _period_start(self, moment: datetime) -> datetime:
+        moment = moment.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        return moment if self.daily else moment.replace(day=1)
+
+    def _next_period(self, start: datetime) -> datetime:
+        if self.daily:
+            return start + timedelta(days=1)
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    def _partition_name(self, start: datetime) -> str:
+        return f"{PARENT_TABLE}_p{start:%Y%m%d}" if self.daily else f"{PARENT_TABLE}_p{start:%Y%m}"
+
+    @staticmethod
+    def list_partitions(conn) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+        rows = conn.execute(text("""
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = :parent
+        """), {"parent": PARENT_TABLE}).all()
+
+        partitions = []
+        for name, bound in rows:
+            if bound == "DEFAULT":
+                continue
+            lower, upper = bound.split(" FROM (", 1)[1].split(") TO (", 1)
+            partitions.append((name, _parse_bound(lower), _parse_bound(upper.rstrip(")"))))
+        return sorted(partitions, key=lambda p: p[2] or datetime.max.replace(tzinfo=timezone.utc))
+
+    def ensure_partitions(self, conn, now: Optional[datetime] = None) -> List[str]:
+        """Create the current period and API_LOG_PARTITIONS_AHEAD future periods."""
+        existing = self.list_partitions(conn)
+        created = []
+
+        start = self._period_start(now or datetime.now(timezone.utc))
+        for _ in range(settings.API_LOG_PARTITIONS_AHEAD + 1):
+            end = self._next_period(start)
+            overlaps = any(
+                (lower is None or lower < end) and (upper is None or upper > start)
+                for _, lower, upper in existing
+            )
+            if not overlaps:
+                self._create_partition(conn, self._partition_name(start), start, end)
+                created.append(self._partition_name(start))
+            start = end
+
+        conn.commit()
+        return created
+
+    @staticmethod
+    def _create_partition(conn, name: str, start: datetime, end: datetime):
+        # Rows that already landed in the default partition for this range have to move
+        # into the new partition before it can be attached.
+        quoted = conn.dialect.identifier_preparer.quote(name)
+        conn.execute(text(
+            f"CREATE TABLE {quoted} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        ))
+        conn.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE created_at >= :start AND created_at < :end
+                RETURNING *
+            )
+            INSERT INTO {quoted} SELECT * FROM moved
+        """), {"start": start, "end": end})
+        conn.execute(text(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {quoted} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+
+    def archive_expired(self, conn, now: Optional[datetime] = None) -> List[str]:
+        """Export partitions older than the hot window to API_LOG_ARCHIVE_DIR, then drop them."""
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=settings.API_LOG_HOT_WINDOW_DAYS)
+        os.makedirs(settings.API_LOG_ARCHIVE_DIR, exist_ok=True)
+        archived = []
+
+        for name, _, upper in self.list_partitions(conn):
+            if upper is None or upper > cutoff:
+                continue
+
+            path = os.path.join(settings.API_LOG_ARCHIVE_DIR, f"{name}.jsonl.gz")
+            if not os.path.exists(path):
+                self._export_partition(conn, name, path)
+
+            quoted = conn.dialect.identifier_preparer.quote(name)
+            conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {quoted}"))
+            conn.execute(text(f"DROP TABLE {quoted}"))
+            conn.commit()
+            archived.append(name)
+
+        return archived
+
+    @staticmethod
+    def _export_partition(conn, name: str, path: str):
+        quoted = conn.dialect.identifier_preparer.quote(name)
+        result = conn.execution_options(stream_results=True, yield_per=1000).execute(
+            text(f"SELECT * FROM {quoted} ORDER BY created_at, id")
+        )
+
+        # Write to a temp file and rename so a half written archive is never mistaken for a complete one
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as archive:
+            for row in result.mappings():
+                archive.write(json.dumps(dict(row), default=_json_default))
+                archive.write("\n")
+        with open(tmp_path, "rb") as written:
+            os.fsync(written.fileno())
+        os.replace(tmp_path, path)
+        conn.commit()
+
+    def run_once(self) -> bool:
+        with engine.connect() as conn:
+            with try_advisory_lock(conn, "api_log_retention") as acquired:
+                if not acquired:
+                    return False
+                self.ensure_partitions(conn)
+                self.archive_expired(conn)
+        return True
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                print(f"api_logs maintenance failed: {str(e)}")
+            await asyncio.sleep(settings.API_LOG_MAINTENANCE_INTERVAL)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def iter_archived_logs(start: Optional[datetime] = None,
+                       end: Optional[datetime] = None,
+                       expand: bool = True) -> Iterator[dict]:
+    """
+    *Stream archived api log rows back (oldest archive first) for audits
+    """
+    start = start.replace(tzinfo=timezone.utc) if start and start.tzinfo is None else start
+    end = end.replace(tzinfo=timezone.utc) if end and end.tzinfo is None else end
+
+    for path in sorted(glob.glob(os.path.join(settings.API_LOG_ARCHIVE_DIR, f"{PARENT_TABLE}_*.jsonl.gz"))):
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            for line in archive:
+                record = json.loads(line)
+                created_at = datetime.fromisoformat(record["created_at"])
+                if start and created_at < start:
+                    continue
+                if end and created_at >= end:
+                    continue
+                if expand:
+                    record["request_payload"] = expand_body(record.get("request_payload"))
+                    record["response_body"] = expand_body(record.get("response_body"))
+                yield record
+
+
+api_log_retention = ApiLogRetention()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="api_logs partition maintenance and archive reader")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("run", help="create upcoming partitions and archive expired ones")
+    read_parser = subparsers.add_parser("read", help="print archived rows as JSONL")
+    read_parser.add_argument("--start", type=datetime.fromisoformat)
+    read_parser.add_argument("--end", type=datetime.fromisoformat)
+    read_parser.add_argument("--raw", action="store_true", help="don't expand compressed bodies")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        if not api_log_retention.run_once():
+            print("Another worker holds the api_logs maintenance lock")
+    else:
+        for log in iter_archived_logs(args.start, args.end, expand=not args.raw):
+            print(json.dumps(log))
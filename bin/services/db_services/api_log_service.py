@@ -0,0 +1,128 @@
+import asyncio
+from typing import List, Optional
+
+from sqlalchemy import insert
+
+from bin.config import settings
+from bin.db.postgresDB import async_engine
+from bin.models.pg_models import ApiLog
+
+
+class ApiLogSink:
+    """
+    Bounded in-memory queue of ApiLog rows drained by a background task that
+    bulk-inserts them on its own connection, off the request path.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.API_LOG_MODE == "async"
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._closing
+
+    async def start(self):
+        if not self.enabled or self.running:
+            return
+        self._closing = False
+        self._queue = asyncio.Queue(maxsize=settings.API_LOG_QUEUE_SIZE)
+        self._task = asyncio.create_task(self._run())
+
+    def submit(self, record: dict) -> bool:
+        """Queue a row without waiting. Returns False when the row was dropped."""
+        if not self.running:
+            self.dropped += 1
+            return False
+
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            if settings.API_LOG_OVERFLOW_POLICY != "drop_oldest":
+                self.dropped += 1
+                return False
+            self._queue.get_nowait()
+            self.dropped += 1
+            self._queue.put_nowait(record)
+
+        self.enqueued += 1
+        return True
+
+    async def stop(self):
+        """Flush everything already queued, then stop the writer."""
+        if self._task is None:
+            return
+        self._closing = True
+        await self._queue.put(None)
+        try:
+            await asyncio.wait_for(self._task, timeout=settings.API_LOG_SHUTDOWN_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            self.failed += self._queue.qsize()
+            print(f"ApiLog sink did not flush within {settings.API_LOG_SHUTDOWN_TIMEOUT}s")
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            record = await self._queue.get()
+            if record is None:
+                return
+
+            batch = [record]
+            deadline = loop.time() + settings.API_LOG_FLUSH_INTERVAL
+            stop = False
+            while len(batch) < settings.API_LOG_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                batch.append(record)
+
+            await self._write(batch)
+            if stop:
+                return
+
+    async def _write(self, batch: List[dict]):
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(insert(ApiLog), batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Failed to write {len(batch)} api log rows: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "mode": settings.API_LOG_MODE,
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_capacity": settings.API_LOG_QUEUE_SIZE,
+            "overflow_policy": settings.API_LOG_OVERFLOW_POLICY,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+api_log_sink = ApiLogSink()
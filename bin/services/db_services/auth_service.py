@@ -4,43 +4,53 @@ from datetime import datetime, timedelta
 from typing import Optional, Tuple
 
 import jwt
-from fastapi import Depends, BackgroundTasks
+from fastapi import Depends
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from bin.config import settings
 from bin.db.postgresDB import db_connection
 from bin.enums.user_status import UserStatus
+from bin.helpers.password_hasher import password_hasher
 from bin.mappers.user_mapper import UserMapper
 from bin.models.pg_user_model import User, OTP, Role
 from bin.requests.user_requests.user_create import UserCreate
 from bin.requests.user_requests.user_login import UserLogin
 from bin.response.token_reponse import TokenResponse
 from bin.response.user_response import UserResponse
-from bin.services.db_services.email_service import EmailService
-from bin.utils.auth_utils import get_password_hash, verify_password, create_access_token, verify_token
+from bin.services.db_services.email_outbox_service import enqueue_email
+from bin.utils.auth_utils import create_access_token, verify_token
+from bin.utils.password_utils import get_password_hash
 
 
 class AuthService:
     def __init__(self,
-                 background_tasks: BackgroundTasks,
                  db: Session = Depends(db_connection),
-                 user_mapper: UserMapper = Depends(UserMapper),
-                 email_service: EmailService = Depends(EmailService)):
+                 user_mapper: UserMapper = Depends(UserMapper)):
         self.db = db
         self.user_mapper = user_mapper
-        self.email_service = email_service
-        self._background_tasks = background_tasks
 
-    def register_user(self, user_data: UserCreate ) -> UserResponse:
-        user = self.db.query(User).filter(User.email == user_data.email).first()
+    async def register_user(self, user_data: UserCreate) -> UserResponse:
+        # bcrypt runs in the password hasher's process pool; the short DB steps run in the threadpool
+        user = await run_in_threadpool(self._get_user_by_email, user_data.email)
 
         if user:
             if user.user_status == UserStatus.PENDING:
-                self._send_otp(user, self._background_tasks)
-                return self.user_mapper.to_user_response(user)
+                return await run_in_threadpool(self._resend_otp, user)
             raise ValueError("Email already registered")
 
-        hashed_password = get_password_hash(user_data.password) if user_data.password else None
+        hashed_password = await password_hasher.hash(user_data.password) if user_data.password else None
+        return await run_in_threadpool(self._create_user, user_data, hashed_password)
+
+    def _get_user_by_email(self, email: str) -> Optional[User]:
+        return self.db.query(User).filter(User.email == email).first()
+
+    def _resend_otp(self, user: User) -> UserResponse:
+        self._send_otp(user)
+        self.db.commit()
+        return self.user_mapper.to_user_response(user)
+
+    def _create_user(self, user_data: UserCreate, hashed_password: Optional[str]) -> UserResponse:
         user = User(
             first_name=user_data.first_name,
             last_name=user_data.last_name,
@@ -56,18 +66,22 @@ class AuthService:
         # if admin_role:
         #     user.roles.append(admin_role)
 
+        # user, OTP and its email are committed together
         self.db.add(user)
+        self.db.flush()
+        self._send_otp(user)
         self.db.commit()
         self.db.refresh(user)
 
-        self._send_otp(user, self._background_tasks)
         return self.user_mapper.to_user_response(user)
 
-    def _send_otp(self, user: User, background_tasks: BackgroundTasks) -> None:
+    def _send_otp(self, user: User) -> None:
+        """Create an activation OTP and queue its email on the session; the caller commits."""
         otp_code = self._generate_otp(user.id)
-        background_tasks.add_task(self.email_service.send_otp_mail, user.email, otp_code)
+        enqueue_email(self.db, "otp_activation", user.email, {"otp_code": otp_code})
 
     def _generate_otp(self, user_id: int, otp_type: str = "activation") -> str:
+        """Replace the user's OTP of this type on the session; the caller commits."""
         self.db.query(OTP).filter(
             OTP.user_id == user_id,
             OTP.otp_type == otp_type
@@ -81,19 +95,28 @@ class AuthService:
             otp_type=otp_type
         )
         self.db.add(otp)
-        self.db.commit()
 
         return otp_code
 
 
-    def authenticate_user(self, login_request: UserLogin) -> Optional[Tuple[UserResponse, TokenResponse]]:
-        user = self.db.query(User).filter(User.email == login_request.email).first()
-        if not user or not verify_password(login_request.password, user.hashed_password):
+    async def authenticate_user(self, login_request: UserLogin) -> Optional[Tuple[UserResponse, TokenResponse]]:
+        user = await run_in_threadpool(self._get_user_by_email, login_request.email)
+        if not user or not user.hashed_password:
+            return None
+        valid, new_hash = await password_hasher.verify_and_update(login_request.password, user.hashed_password)
+        if not valid:
             return None
 
         if user.user_status != "active":
             raise ValueError("User account is not active")
 
+        return await run_in_threadpool(self._login_response, user, new_hash)
+
+    def _login_response(self, user: User, new_hash: Optional[str] = None) -> Tuple[UserResponse, TokenResponse]:
+        if new_hash:
+            # stored hash predates the current bcrypt policy; upgrade it now that we have the plaintext
+            user.hashed_password = new_hash
+            self.db.commit()
         tokens = self.generate_tokens(user)
         user_response = self.user_mapper.to_user_response(user)
         return user_response, tokens
@@ -106,6 +129,7 @@ class AuthService:
             "sub": str(user.id),
             "email": user.email,
             "email_verified": user.email_verified,
+            "status_version": user.status_version or 0,
         }
 
         access_token = create_access_token(
@@ -161,7 +185,9 @@ class AuthService:
         if not user:
             return False
 
-        self.email_service.send_password_reset_mail(user.email, self._generate_otp(user.id, "password_reset"))
+        otp_code = self._generate_otp(user.id, "password_reset")
+        enqueue_email(self.db, "password_reset", user.email, {"otp_code": otp_code})
+        self.db.commit()
         return True
 
     def reset_password(self, email: str, otp_code: str, new_password: str) -> bool:
@@ -1,18 +1,25 @@
+import asyncio
+from datetime import timedelta
+
 from fastapi import HTTPException
-from sqlalchemy import update, func, select, bindparam
+from sqlalchemy import update, func, select, bindparam, delete, or_, and_, values, column, Integer, String
 
-from bin.db.postgresDB import db_connection
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from bin.helpers.conditional_get import data_versions
 from bin.models import pg_models
 from sqlalchemy.exc import SQLAlchemyError
+from bin.config import settings
+from bin.enums.transaction_status import TransactionStatus
 from bin.response.response_model import ErrorResponseModel
+from bin.services.db_services.email_outbox_service import enqueue_email
+from bin.services.db_services.live_feed_service import publish_donation_event
 from bin.services.db_services.payment_service import PaymentService
-from bin.utils.response_codes import PaymentStatus
-
-db: Session = next(db_connection())
-
+from bin.services.db_services.donation_totals_service import add_donation_totals
+from bin.services.db_services.reference_data_service import reference_data
+from bin.services.db_services.rider_counter_service import add_rider_raises
+from bin.utils.response_codes import PaymentStatus, PaymentResponseCode
 
-def create_new_donation_record(request, db_session: Session = None):
+async def create_new_donation_record(request, db_session: AsyncSession = None):
     donation = None
     try:
         donation = pg_models.DonationTable(
@@ -27,7 +34,7 @@ def create_new_donation_record(request, db_session: Session = None):
         )
 
         db_session.add(donation)
-        db_session.flush()
+        await db_session.flush()
 
         if request.donation_id == 2:
             rider_donation = pg_models.RiderDonation(
@@ -36,109 +43,277 @@ def create_new_donation_record(request, db_session: Session = None):
             )
             db_session.add(rider_donation)
 
-            update_query = update(pg_models.RidersTable).where(
-                pg_models.RidersTable.rider_id == request.rider_id
-            ).values(
-                rider_raise=pg_models.RidersTable.rider_raise + request.amount
-            )
-            db_session.execute(update_query)
-
         return donation
 
     except SQLAlchemyError as e:
-        db_session.rollback()
-        if donation and donation.record_id:
-            db_session.delete(donation)
-            db_session.commit()
+        record_id = donation.record_id if donation else None
+        await db_session.rollback()
+        if record_id:
+            await db_session.execute(
+                delete(pg_models.DonationTable).where(pg_models.DonationTable.record_id == record_id)
+            )
+            await db_session.commit()
         raise HTTPException(status_code=400, detail=str(e))
 
 
-def currency_list():
-    try:
-        data = db.query(
-            pg_models.CurrencyTable
-        ).all()
-
-        return data
-
-    except SQLAlchemyError as e:
-        raise ErrorResponseModel(str(e), 404)
+def _gateway_code_value(gateway_code):
+    return getattr(gateway_code, "value", gateway_code)
 
 
-def donation_list():
+def _to_gateway_code(gateway_code):
     try:
-        data = db.query(
-            pg_models.DonationTypeTable
-        ).all()
+        return PaymentResponseCode(gateway_code)
+    except ValueError:
+        return gateway_code
+
+
+async def claim_transaction_for_verification(result_indicator: str, db_session: AsyncSession):
+    """
+    *initiated -> verifying as a single compare-and-set UPDATE. Only one caller gets the
+    row back; a verifying claim older than PAYMENT_VERIFY_CLAIM_TIMEOUT counts as abandoned.
+    """
+    transactions = pg_models.Transaction.__table__
+    stmt = (
+        update(transactions)
+        .where(
+            transactions.c.success_indicator == result_indicator,
+            or_(
+                transactions.c.status == TransactionStatus.INITIATED.value,
+                and_(
+                    transactions.c.status == TransactionStatus.VERIFYING.value,
+                    transactions.c.verification_started_at
+                    < func.now() - timedelta(seconds=settings.PAYMENT_VERIFY_CLAIM_TIMEOUT)
+                )
+            )
+        )
+        .values(status=TransactionStatus.VERIFYING.value, verification_started_at=func.now())
+        .returning(
+            transactions.c.id,
+            transactions.c.donation_id,
+            transactions.c.mpgs_order_id,
+            transactions.c.currency
+        )
+    )
+    claimed = (await db_session.execute(stmt)).first()
+    await db_session.commit()
+    return claimed
+
+
+async def release_transaction_claims(transaction_ids: list, db_session: AsyncSession):
+    """Hand verifying transactions back to initiated when verification could not finish."""
+    transactions = pg_models.Transaction.__table__
+    await db_session.execute(
+        update(transactions)
+        .where(
+            transactions.c.id.in_(transaction_ids),
+            transactions.c.status == TransactionStatus.VERIFYING.value
+        )
+        .values(status=TransactionStatus.INITIATED.value, verification_started_at=None)
+    )
+    await db_session.commit()
+
+
+async def finalize_transactions(outcomes: list, db_session: AsyncSession,
+                                expected_statuses=(TransactionStatus.VERIFYING,)):
+    """
+    *Apply verification outcomes ({"id", "status", "gateway_code"}) in bulk.
+    One UPDATE ... RETURNING moves each transaction to completed/failed and sets
+    payment_done_at on the donations that were paid; the payment side effects
+    (totals, rider counters, email, live feed) follow in the same transaction.
+    Only transactions still in one of expected_statuses are changed and returned,
+    so when two callers race on a transaction exactly one of them finalizes it.
+    """
+    if not outcomes:
+        return []
+
+    transactions = pg_models.Transaction.__table__
+    donations = pg_models.DonationTable.__table__
+
+    outcome = values(
+        column("id", Integer),
+        column("status", String),
+        column("gateway_code", String),
+        name="outcome"
+    ).data([
+        (item["id"], item["status"].value, _gateway_code_value(item["gateway_code"]))
+        for item in outcomes
+    ])
+
+    finalized = (
+        update(transactions)
+        .where(
+            transactions.c.id == outcome.c.id,
+            transactions.c.status.in_([status.value for status in expected_statuses])
+        )
+        .values(status=outcome.c.status, gateway_code=outcome.c.gateway_code, updated_at=func.now())
+        .returning(
+            transactions.c.id,
+            transactions.c.donation_id,
+            transactions.c.status,
+            transactions.c.gateway_code
+        )
+        .cte("finalized")
+    )
+    paid = (
+        update(donations)
+        .where(
+            donations.c.record_id == finalized.c.donation_id,
+            finalized.c.status == TransactionStatus.COMPLETED.value
+        )
+        .values(payment_done_at=func.now())
+        .returning(donations.c.record_id)
+        .cte("paid")
+    )
+
+    finalized_transactions = (await db_session.execute(select(finalized).add_cte(paid))).all()
+    await _apply_completed_payments(
+        [row.donation_id for row in finalized_transactions if row.status == TransactionStatus.COMPLETED.value],
+        db_session
+    )
+    await db_session.commit()
+    if any(row.status == TransactionStatus.COMPLETED.value for row in finalized_transactions):
+        await data_versions.advance(db_session, "donation_totals", "riders")
+    return finalized_transactions
+
+
+async def _apply_completed_payments(donation_ids: list, db_session: AsyncSession):
+    """
+    *Side effects of a confirmed payment that belong in the same transaction as the
+    status change: donation totals, rider fundraising counters, the confirmation email
+    and the live feed event
+    """
+    if not donation_ids:
+        return
+
+    paid_donations = (await db_session.execute(
+        select(
+            pg_models.DonationTable.record_id,
+            pg_models.DonationTable.donation_id,
+            pg_models.DonationTable.currency_id,
+            pg_models.DonationTable.amount,
+            pg_models.DonationTable.email,
+            pg_models.DonationTable.first_name,
+            pg_models.DonationTable.second_name,
+            pg_models.CurrencyTable.currency_code,
+            pg_models.RiderDonation.rider_id
+        )
+        .outerjoin(pg_models.RiderDonation, pg_models.RiderDonation.donation_id == pg_models.DonationTable.record_id)
+        .outerjoin(pg_models.CurrencyTable, pg_models.CurrencyTable.currency_id == pg_models.DonationTable.currency_id)
+        .where(pg_models.DonationTable.record_id.in_(donation_ids))
+    )).all()
+
+    totals = {}
+    rider_amounts = {}
+    for donation in paid_donations:
+        if donation.record_id not in totals and donation.email:
+            enqueue_email(db_session, "donation_confirmation", donation.email, {
+                "first_name": donation.first_name,
+                "second_name": donation.second_name,
+                "amount": donation.amount,
+                "currency_code": donation.currency_code
+            })
+        totals[donation.record_id] = (donation.donation_id, donation.currency_id, donation.amount)
+        if donation.rider_id is not None:
+            rider_amounts[donation.rider_id] = rider_amounts.get(donation.rider_id, 0) + (donation.amount or 0)
+
+    await add_donation_totals(totals.values(), db_session)
+    await add_rider_raises(rider_amounts, db_session)
+    await publish_donation_event(totals.values(), rider_amounts, db_session)
+
+
+async def finalize_transaction(transaction_id: int, status: PaymentStatus, gateway_code, db_session: AsyncSession):
+    """Single transaction form of finalize_transactions. Returns None when it was no longer verifying."""
+    finalized_transactions = await finalize_transactions(
+        [{"id": transaction_id, "status": status, "gateway_code": gateway_code}],
+        db_session
+    )
+    return finalized_transactions[0] if finalized_transactions else None
+
+
+async def _wait_for_verification(result_indicator: str, db_session: AsyncSession):
+    """
+    *Another request owns the verification; poll the row until it reaches a final state
+    """
+    deadline = asyncio.get_running_loop().time() + settings.PAYMENT_CALLBACK_WAIT_SECONDS
+    while True:
+        transaction = (await db_session.execute(
+            select(
+                pg_models.Transaction.id,
+                pg_models.Transaction.donation_id,
+                pg_models.Transaction.status,
+                pg_models.Transaction.gateway_code
+            ).where(pg_models.Transaction.success_indicator == result_indicator)
+        )).first()
+        await db_session.commit()
 
-        return data
+        if not transaction:
+            raise HTTPException(status_code=404, detail="Transaction not found")
 
-    except SQLAlchemyError as e:
-        raise ErrorResponseModel(str(e), 404)
+        if transaction.status in (TransactionStatus.COMPLETED.value, TransactionStatus.FAILED.value):
+            return {
+                "status": PaymentStatus(transaction.status),
+                "gateway_code": _to_gateway_code(transaction.gateway_code),
+                "transaction": transaction,
+                "finalized": False
+            }
 
-def sum_of_donations():
-    try:
-        total_amount = db.query(
-            func.sum(pg_models.DonationTable.amount)
-        ).filter(
-            pg_models.DonationTable.donation_id == 1
-        ).scalar()
+        if asyncio.get_running_loop().time() >= deadline:
+            return {
+                "status": PaymentStatus.PENDING,
+                "gateway_code": PaymentResponseCode.PENDING,
+                "transaction": transaction,
+                "finalized": False
+            }
 
-        return total_amount or 0
-    except SQLAlchemyError as e:
-        db.rollback()
-        raise ErrorResponseModel(str(e), 404)
+        await asyncio.sleep(0.25)
 
 
-async def payment_callback_function(request, db_session: Session):
+async def payment_callback_function(request, db_session: AsyncSession):
     try:
         resultIndicator = request.query_params.get("resultIndicator")
         if not resultIndicator:
             raise HTTPException(status_code=400, detail="Missing resultIndicator parameter")
 
-        stmt = select(pg_models.Transaction).where(
-            pg_models.Transaction.success_indicator == resultIndicator
-        ).with_for_update()
-
-        transaction = db_session.execute(stmt).scalar_one_or_none()
-        if not transaction:
-            raise HTTPException(status_code=404, detail="Transaction not found")
+        # No transaction or row lock is held while the gateway is called
+        claimed = await claim_transaction_for_verification(resultIndicator, db_session)
+        if not claimed:
+            return await _wait_for_verification(resultIndicator, db_session)
 
         try:
             payment_details = await PaymentService.verify_payment(
-                transaction.mpgs_order_id,
-                transaction.currency,
+                claimed.mpgs_order_id,
+                claimed.currency,
                 db_session
             )
+        except Exception:
+            await release_transaction_claims([claimed.id], db_session)
+            raise
 
-            transaction.status = payment_details["status"].value
-            transaction.gateway_code = payment_details["gateway_code"].value
-
-            if payment_details["status"] == PaymentStatus.COMPLETED:
-                await update_payment_timestamp(transaction.donation_id, db_session)
-
-            db_session.commit()
-
-            return {
-                "status": payment_details["status"],
-                "gateway_code": payment_details["gateway_code"],
-                "transaction": transaction
-            }
+        transaction = await finalize_transaction(
+            claimed.id,
+            payment_details["status"],
+            payment_details["gateway_code"],
+            db_session
+        )
+        if not transaction:
+            return await _wait_for_verification(resultIndicator, db_session)
 
-        except Exception as e:
-            db_session.rollback()
-            raise
+        return {
+            "status": payment_details["status"],
+            "gateway_code": payment_details["gateway_code"],
+            "transaction": transaction,
+            "finalized": True
+        }
 
     except HTTPException:
         raise
     except Exception as e:
+        await db_session.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-def get_currency_by_id(currency_id: int):
+async def get_currency_by_id(currency_id: int, db_session: AsyncSession):
     try:
-        currency = db.query(pg_models.CurrencyTable).filter(
-            pg_models.CurrencyTable.currency_id == currency_id
-        ).first()
+        currency = await reference_data.currency(currency_id, db_session)
 
         if not currency:
             raise HTTPException(status_code=404, detail=f"Currency with ID {currency_id} not found")
@@ -146,24 +321,5 @@ def get_currency_by_id(currency_id: int):
         return currency
 
     except SQLAlchemyError as e:
-        db.rollback()
+        await db_session.rollback()
         raise ErrorResponseModel(str(e), 400)
-
-async def update_payment_timestamp(donation_id: int, db_session: Session = None):
-    """Update the payment_done_at timestamp for a donation"""
-    try:
-        donation = db_session.execute(
-            select(pg_models.DonationTable)
-            .where(pg_models.DonationTable.record_id == donation_id)
-        ).scalar_one_or_none()
-
-        if donation:
-            donation.payment_done_at = func.now()
-            db_session.commit()
-            return True
-        return False
-
-    except SQLAlchemyError as e:
-        db_session.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
-
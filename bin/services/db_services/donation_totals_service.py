@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import delete, exists, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bin.db.advisory_lock import try_async_advisory_lock
+from bin.db.postgresDB import async_engine
+from bin.helpers.conditional_get import data_versions
+from bin.enums.transaction_status import TransactionStatus
+from bin.models import pg_models
+from bin.utils.single_flight import SingleFlight
+
+GENERAL_DONATION_TYPE = 1
+
+
+async def add_donation_totals(paid: Iterable[Tuple[int, int, float]], db_session: AsyncSession):
+    """
+    *Add (donation_type_id, currency_id, amount) rows for newly paid donations to the totals.
+    Runs inside the caller's transaction and does not commit.
+    """
+    totals = {}
+    for donation_type_id, currency_id, amount in paid:
+        total_amount, donation_count = totals.get((donation_type_id, currency_id), (0, 0))
+        totals[(donation_type_id, currency_id)] = (total_amount + (amount or 0), donation_count + 1)
+    if not totals:
+        return
+
+    stmt = pg_insert(pg_models.DonationTotal).values([
+        {
+            "donation_type_id": donation_type_id,
+            "currency_id": currency_id,
+            "total_amount": total_amount,
+            "donation_count": donation_count
+        }
+        for (donation_type_id, currency_id), (total_amount, donation_count) in totals.items()
+    ])
+    await db_session.execute(stmt.on_conflict_do_update(
+        index_elements=[pg_models.DonationTotal.donation_type_id, pg_models.DonationTotal.currency_id],
+        set_={
+            "total_amount": pg_models.DonationTotal.total_amount + stmt.excluded.total_amount,
+            "donation_count": pg_models.DonationTotal.donation_count + stmt.excluded.donation_count,
+            "updated_at": func.now()
+        }
+    ))
+
+
+class DonationTotalsService:
+    """
+    Reads donation_totals for the public endpoints and rebuilds it from donation +
+    transactions. Concurrent reads in a worker share one query, and wait for a
+    recompute running in the same worker instead of racing it.
+    """
+
+    def __init__(self):
+        self._flight = SingleFlight()
+        self.recomputes = 0
+
+    async def _read_total(self, donation_type_id: int, db_session: AsyncSession) -> float:
+        total = (await db_session.execute(
+            select(func.coalesce(func.sum(pg_models.DonationTotal.total_amount), 0))
+            .where(pg_models.DonationTotal.donation_type_id == donation_type_id)
+        )).scalar()
+        await db_session.commit()
+        return total
+
+    async def total_for_type(self, donation_type_id: int, db_session: AsyncSession) -> float:
+        await self._flight.wait("recompute")
+        return await self._flight.do(
+            ("total", donation_type_id),
+            lambda: self._read_total(donation_type_id, db_session)
+        )
+
+    async def general_total(self, db_session: AsyncSession) -> float:
+        return await self.total_for_type(GENERAL_DONATION_TYPE, db_session)
+
+    async def _recompute(self) -> Optional[int]:
+        donations = pg_models.DonationTable.__table__
+        transactions = pg_models.Transaction.__table__
+        totals = pg_models.DonationTotal.__table__
+
+        paid = exists().where(
+            transactions.c.donation_id == donations.c.record_id,
+            transactions.c.status == TransactionStatus.COMPLETED.value
+        )
+
+        async with async_engine.connect() as conn:
+            async with try_async_advisory_lock(conn, "donation_totals_recompute") as acquired:
+                if not acquired:
+                    return None
+                # EXCLUSIVE still lets readers in but waits out, and then blocks, the
+                # finalize_transactions upserts, so no payment is counted twice or missed
+                await conn.execute(text("LOCK TABLE donation_totals IN EXCLUSIVE MODE"))
+                await conn.execute(delete(totals))
+                result = await conn.execute(
+                    insert(totals).from_select(
+                        ["donation_type_id", "currency_id", "total_amount", "donation_count"],
+                        select(
+                            donations.c.donation_id,
+                            donations.c.currency_id,
+                            func.sum(donations.c.amount),
+                            func.count()
+                        )
+                        .where(paid)
+                        .group_by(donations.c.donation_id, donations.c.currency_id)
+                    )
+                )
+                await conn.commit()
+                await data_versions.advance(conn, "donation_totals")
+
+        self.recomputes += 1
+        return result.rowcount
+
+    async def recompute(self) -> Optional[int]:
+        """
+        *Rebuild donation_totals from paid donations. Returns the number of rows written,
+        or None when another worker is already recomputing.
+        """
+        return await self._flight.do("recompute", self._recompute)
+
+    async def ensure_backfilled(self, db_session: AsyncSession):
+        """Build the totals on first start after the table is introduced."""
+        has_totals = (await db_session.execute(select(pg_models.DonationTotal.donation_type_id).limit(1))).first()
+        await db_session.commit()
+        if not has_totals:
+            await self.recompute()
+
+
+donation_totals = DonationTotalsService()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="donation_totals maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("recompute", help="rebuild donation_totals from donation and transactions")
+    args = parser.parse_args()
+
+    written = asyncio.run(donation_totals.recompute())
+    if written is None:
+        print("Another worker is already recomputing donation_totals")
+    else:
+        print(f"donation_totals rebuilt with {written} rows")
@@ -0,0 +1,197 @@
+import asyncio
+from typing import Optional
+
+from sqlalchemy import update, select, func, or_, and_, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bin.config import settings
+from bin.db.postgresDB import AsyncSessionLocal
+from bin.models import pg_models
+from bin.services.db_services.email_service import EmailService
+from bin.services.mail_pipeline import mail_pipeline
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+DEAD = "dead"
+
+
+def enqueue_email(db, template: str, recipient: str, context: dict, mailer: str = "default"):
+    """
+    *Add an email to the outbox on the caller's session (sync or async). It is only
+    sent if, and once, the caller's transaction commits.
+    """
+    db.add(pg_models.EmailOutbox(
+        mailer=mailer,
+        recipient=recipient,
+        template=template,
+        context=context,
+        status=PENDING
+    ))
+
+
+class EmailOutboxWorker:
+    """
+    Delivers email_outbox rows. Each of EMAIL_OUTBOX_WORKERS loops claims a batch with
+    FOR UPDATE SKIP LOCKED, so any number of app processes can share the table.
+    Failed sends are retried with exponential backoff and end up as dead after
+    EMAIL_OUTBOX_MAX_ATTEMPTS; a sending claim older than EMAIL_OUTBOX_CLAIM_TIMEOUT
+    (process died mid-batch) is picked up again.
+    """
+
+    def __init__(self):
+        self._tasks = []
+
+        self.claimed = 0
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+
+    async def claim_batch(self, db: AsyncSession):
+        outbox = pg_models.EmailOutbox.__table__
+        due = (
+            select(outbox.c.id)
+            .where(or_(
+                and_(outbox.c.status == PENDING, outbox.c.next_attempt_at <= func.now()),
+                and_(
+                    outbox.c.status == SENDING,
+                    outbox.c.claimed_at < func.now() - settings.EMAIL_OUTBOX_CLAIM_TIMEOUT * literal_column("interval '1 second'")
+                )
+            ))
+            .order_by(outbox.c.next_attempt_at)
+            .limit(settings.EMAIL_OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = (await db.execute(
+            update(outbox)
+            .where(outbox.c.id.in_(due))
+            .values(status=SENDING, claimed_at=func.now(), attempts=outbox.c.attempts + 1)
+            .returning(
+                outbox.c.id,
+                outbox.c.mailer,
+                outbox.c.recipient,
+                outbox.c.template,
+                outbox.c.context,
+                outbox.c.attempts
+            )
+        )).all()
+        await db.commit()
+        return claimed
+
+    @staticmethod
+    def _build_one(row):
+        try:
+            return EmailService.build_message(row.template, row.recipient, row.context)
+        except Exception as e:
+            return e
+
+    def _build_messages(self, claimed) -> dict:
+        """Render the batch one template at a time; a row whose template fails maps to the error."""
+        by_template = {}
+        for row in claimed:
+            by_template.setdefault(row.template, []).append(row)
+
+        messages = {}
+        for template, rows in by_template.items():
+            try:
+                built = EmailService.build_messages(template, [(row.recipient, row.context) for row in rows])
+            except Exception:
+                # One bad context fails the whole batch render, so fall back to row by row
+                built = [self._build_one(row) for row in rows]
+            messages.update({row.id: message for row, message in zip(rows, built)})
+        return messages
+
+    @staticmethod
+    async def _send(row, message) -> Optional[Exception]:
+        if isinstance(message, Exception):
+            return message
+        try:
+            return await mail_pipeline.submit(row.mailer, message)
+        except Exception as e:
+            return e
+
+    async def _record_results(self, db: AsyncSession, claimed, results):
+        outbox = pg_models.EmailOutbox.__table__
+        sent_ids = [row.id for row, error in zip(claimed, results) if error is None]
+        failed = [(row, error) for row, error in zip(claimed, results) if error is not None]
+
+        if sent_ids:
+            await db.execute(
+                update(outbox)
+                .where(outbox.c.id.in_(sent_ids))
+                .values(status=SENT, sent_at=func.now(), last_error=None)
+            )
+        for row, error in failed:
+            dead = row.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+            backoff = func.least(
+                settings.EMAIL_OUTBOX_BACKOFF_BASE * func.power(2, row.attempts - 1),
+                settings.EMAIL_OUTBOX_BACKOFF_MAX
+            )
+            await db.execute(
+                update(outbox)
+                .where(outbox.c.id == row.id)
+                .values(
+                    status=DEAD if dead else PENDING,
+                    next_attempt_at=func.now() + backoff * literal_column("interval '1 second'"),
+                    last_error=str(error)[:2000]
+                )
+            )
+            if dead:
+                self.dead += 1
+            else:
+                self.retried += 1
+        await db.commit()
+        self.sent += len(sent_ids)
+
+    async def run_batch(self, db: AsyncSession) -> int:
+        claimed = await self.claim_batch(db)
+        if not claimed:
+            return 0
+        self.claimed += len(claimed)
+        messages = self._build_messages(claimed)
+        results = await asyncio.gather(*(self._send(row, messages[row.id]) for row in claimed))
+        await self._record_results(db, claimed, results)
+        return len(claimed)
+
+    async def _run_forever(self):
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    processed = await self.run_batch(db)
+            except Exception as e:
+                print(f"Email outbox batch failed: {str(e)}")
+                processed = 0
+            if processed < settings.EMAIL_OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(settings.EMAIL_OUTBOX_POLL_INTERVAL)
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run_forever()) for _ in range(settings.EMAIL_OUTBOX_WORKERS)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def backlog(self, db: AsyncSession) -> dict:
+        outbox = pg_models.EmailOutbox.__table__
+        rows = (await db.execute(
+            select(outbox.c.status, func.count())
+            .where(outbox.c.status.in_([PENDING, SENDING, DEAD]))
+            .group_by(outbox.c.status)
+        )).all()
+        await db.commit()
+        return {status: count for status, count in rows}
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "claimed": self.claimed,
+            "sent": self.sent,
+            "retried": self.retried,
+            "dead": self.dead,
+        }
+
+
+email_outbox_worker = EmailOutboxWorker()
@@ -1,8 +1,56 @@
-import smtplib
-from email.mime.multipart import MIMEMultipart
+from email.charset import Charset, QP
+from email.header import Header
 from email.mime.text import MIMEText
+from typing import Dict, Iterable, List, Tuple
 
 from bin.config import settings
+from bin.helpers.template_renderer import template_renderer
+
+
+class MailTemplate:
+    """
+    A Jinja2 body template plus the parts of the message that never change, with
+    the From and Subject headers encoded once instead of per message.
+    """
+
+    _charset = Charset("utf-8")
+    _charset.body_encoding = QP
+
+    def __init__(self, template: str, subject: str, subtype: str = "html"):
+        self.template = template
+        self.subject = subject
+        self.subtype = subtype
+        self._encoded_subject = None
+        self._encoded_from = None
+
+    def _headers(self):
+        if self._encoded_subject is None:
+            self._encoded_subject = Header(self.subject, "utf-8").encode()
+            self._encoded_from = Header(settings.SMTP_SENDER_MAIL or "", "utf-8").encode()
+        return self._encoded_from, self._encoded_subject
+
+    def _message(self, recipient: str, body: str) -> MIMEText:
+        sender, subject = self._headers()
+        msg = MIMEText(body, self.subtype, self._charset)
+        msg['From'] = sender
+        msg['To'] = recipient
+        msg['Subject'] = subject
+        return msg
+
+    def build(self, recipient: str, context: dict) -> MIMEText:
+        return self._message(recipient, template_renderer.render(self.template, **context))
+
+    def build_batch(self, items: Iterable[Tuple[str, dict]]) -> List[MIMEText]:
+        items = list(items)
+        bodies = template_renderer.render_batch(self.template, (context for _, context in items))
+        return [self._message(recipient, body) for (recipient, _), body in zip(items, bodies)]
+
+
+MAIL_TEMPLATES: Dict[str, MailTemplate] = {
+    "otp_activation": MailTemplate("email/otp_activation.html", "Your Account Activation OTP"),
+    "password_reset": MailTemplate("email/password_reset.html", "Password Reset Request"),
+    "donation_confirmation": MailTemplate("email/donation_confirmation.html", "Thank you for your donation!"),
+}
 
 
 class EmailService:
@@ -48,73 +96,33 @@ class EmailService:
     #         return False
 
     @staticmethod
-    def send_otp_mail(email: str, otp_code: str):
-        try:
-            # Create message container
-            msg = MIMEMultipart()
-            msg['From'] = settings.SMTP_SENDER_MAIL
-            msg['To'] = email
-            msg['Subject'] = "Your Account Activation OTP"
-
-            # Email body
-            body = f"""
-                     <html>
-                         <body>
-                             <h2>Account Activation</h2>
-                             <p>Your OTP for account activation is: <strong>{otp_code}</strong></p>
-                             <p>This OTP is valid for 15 minutes.</p>
-                             <p>If you didn't request this, please ignore this email.</p>
-                         </body>
-                     </html>
-                     """
-
-            msg.attach(MIMEText(body, 'html'))
-
-            # Send email
-            with smtplib.SMTP_SSL(
-                    host=settings.SMTP_HOST,
-                    port=settings.SMTP_PORT
-            ) as server:
-                server.login(settings.SMTP_SENDER_MAIL, settings.SMTP_SENDER_PW)
-                server.send_message(msg)
-
-            return True
-        except Exception as e:
-            print(f"Failed to send confirmation email: {str(e)}")
-            return False
+    def build_otp_mail(email: str, otp_code: str) -> MIMEText:
+        return MAIL_TEMPLATES["otp_activation"].build(email, {"otp_code": otp_code})
+
+    @staticmethod
+    def build_password_reset_mail(email: str, otp_code: str) -> MIMEText:
+        return MAIL_TEMPLATES["password_reset"].build(email, {"otp_code": otp_code})
+
+    @staticmethod
+    def build_donation_confirmation_mail(email: str, first_name: str, second_name: str,
+                                         amount: float, currency_code: str) -> MIMEText:
+        return MAIL_TEMPLATES["donation_confirmation"].build(email, {
+            "first_name": first_name,
+            "second_name": second_name,
+            "amount": amount,
+            "currency_code": currency_code
+        })
+
+    @staticmethod
+    def build_message(template: str, recipient: str, context: dict) -> MIMEText:
+        """Build the message for an email_outbox row."""
+        if template not in MAIL_TEMPLATES:
+            raise ValueError(f"Unknown email template {template}")
+        return MAIL_TEMPLATES[template].build(recipient, context)
 
     @staticmethod
-    def send_password_reset_mail(email: str, otp_code: str):
-            try:
-                # Create message container
-                msg = MIMEMultipart()
-                msg['From'] = settings.SMTP_SENDER_MAIL
-                msg['To'] = email
-                msg['Subject'] = "Password Reset Request"
-
-                # Email body
-                body = f"""
-                            <html>
-                                <body>
-                                    <h2>Password Reset</h2>
-                                    <p>Your OTP for password reset is: <strong>{otp_code}</strong></p>
-                                    <p>This OTP is valid for 15 minutes.</p>
-                                    <p>If you didn't request this, please ignore this email.</p>
-                                </body>
-                            </html>
-                            """
-
-                msg.attach(MIMEText(body, 'html'))
-
-                # Send email
-                with smtplib.SMTP_SSL(
-                        host=settings.SMTP_HOST,
-                        port=settings.SMTP_PORT
-                ) as server:
-                    server.login(settings.SMTP_SENDER_MAIL, settings.SMTP_SENDER_PW)
-                    server.send_message(msg)
-
-                return True
-            except Exception as e:
-                print(f"Failed to send confirmation email: {str(e)}")
-                return False
\ No newline at end of file
+    def build_messages(template: str, items: Iterable[Tuple[str, dict]]) -> List[MIMEText]:
+        """Batch form of build_message for many (recipient, context) pairs of one template."""
+        if template not in MAIL_TEMPLATES:
+            raise ValueError(f"Unknown email template {template}")
+        return MAIL_TEMPLATES[template].build_batch(items)
@@ -0,0 +1,132 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+from bin.config import settings
+from bin.db.postgresDB import engine
+from bin.enums.transaction_status import TransactionStatus
+from bin.models import pg_models
+
+DONATION_EXPORT_COLUMNS = (
+    "record_id", "created_at", "payment_done_at", "first_name", "second_name", "email", "mobile_no",
+    "donation_type_id", "amount", "currency_code", "transaction_status", "gateway_code", "mpgs_order_id",
+)
+
+
+def _donation_export_query(start: Optional[datetime], end: Optional[datetime], status: Optional[TransactionStatus]):
+    donations = pg_models.DonationTable.__table__
+    transactions = pg_models.Transaction.__table__
+    currencies = pg_models.CurrencyTable.__table__
+
+    latest = (
+        select(
+            transactions.c.donation_id,
+            transactions.c.status,
+            transactions.c.gateway_code,
+            transactions.c.mpgs_order_id
+        )
+        .distinct(transactions.c.donation_id)
+        .order_by(transactions.c.donation_id, transactions.c.created_at.desc(), transactions.c.id.desc())
+        .subquery("latest_transaction")
+    )
+
+    stmt = (
+        select(
+            donations.c.record_id,
+            donations.c.created_at,
+            donations.c.payment_done_at,
+            donations.c.first_name,
+            donations.c.second_name,
+            donations.c.email,
+            donations.c.mobile_no,
+            donations.c.donation_id.label("donation_type_id"),
+            donations.c.amount,
+            currencies.c.currency_code,
+            latest.c.status.label("transaction_status"),
+            latest.c.gateway_code,
+            latest.c.mpgs_order_id
+        )
+        .outerjoin(latest, latest.c.donation_id == donations.c.record_id)
+        .outerjoin(currencies, currencies.c.currency_id == donations.c.currency_id)
+        .order_by(donations.c.record_id)
+    )
+    if start:
+        stmt = stmt.where(donations.c.created_at >= start)
+    if end:
+        stmt = stmt.where(donations.c.created_at < end)
+    if status:
+        stmt = stmt.where(latest.c.status == status.value)
+    return stmt
+
+
+def _iter_donation_rows(start, end, status) -> Iterator[tuple]:
+    # server side cursor: only yield_per rows are held in memory at a time
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=settings.EXPORT_YIELD_PER).execute(
+            _donation_export_query(start, end, status)
+        )
+        for row in result:
+            yield tuple(row)
+
+
+def _format_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_lines(rows: Iterator[tuple]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(DONATION_EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([_format_value(value) for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_lines(rows: Iterator[tuple]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(DONATION_EXPORT_COLUMNS, row)), default=_format_value) + "\n"
+
+
+def _chunked(lines: Iterator[str], compress: bool) -> Iterator[bytes]:
+    """Group lines into EXPORT_CHUNK_BYTES writes, gzipping them incrementally when asked."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+    pending = []
+    size = 0
+    for line in lines:
+        encoded = line.encode()
+        pending.append(encoded)
+        size += len(encoded)
+        if size >= settings.EXPORT_CHUNK_BYTES:
+            chunk = b"".join(pending)
+            pending, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+
+    chunk = b"".join(pending)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def export_donations(export_format: str,
+                     start: Optional[datetime] = None,
+                     end: Optional[datetime] = None,
+                     status: Optional[TransactionStatus] = None,
+                     compress: bool = False) -> Iterator[bytes]:
+    """
+    *Donations with their latest transaction and currency code as CSV or NDJSON bytes.
+    A plain generator, so StreamingResponse drives it from a worker thread.
+    """
+    rows = _iter_donation_rows(start, end, status)
+    lines = _csv_lines(rows) if export_format == "csv" else _ndjson_lines(rows)
+    return _chunked(lines, compress)
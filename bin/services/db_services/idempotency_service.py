@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import json
+from datetime import timedelta
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, update, delete, func, or_, and_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bin.config import settings
+from bin.models.pg_models import IdempotencyKey
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+def request_fingerprint(request) -> str:
+    """Stable hash of a request body, so a key reused with a different body is rejected."""
+    body = json.dumps(jsonable_encoder(request), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class IdempotencyService:
+    """
+    Idempotency-Key store for one endpoint (scope). The first request claims the key
+    and stores its response snapshot when it commits; repeats inside the window get
+    the snapshot back, and concurrent duplicates wait for the first one to finish.
+    """
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        # Lets duplicates arriving on this worker wake up as soon as the owner finishes
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def claim(self, key: str, request_hash: str, db: AsyncSession) -> Optional[dict]:
+        """
+        *Returns None when the caller now owns the key, otherwise the stored response of
+        the original request. Expired keys and abandoned in-progress claims are taken over.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.IDEMPOTENCY_WAIT_SECONDS
+
+        while True:
+            claimed = (await db.execute(
+                insert(IdempotencyKey)
+                .values(scope=self.scope, key=key, request_hash=request_hash, status=IN_PROGRESS)
+                .on_conflict_do_update(
+                    index_elements=[IdempotencyKey.scope, IdempotencyKey.key],
+                    set_={
+                        "request_hash": request_hash,
+                        "status": IN_PROGRESS,
+                        "response": None,
+                        "created_at": func.now(),
+                        "completed_at": None
+                    },
+                    where=or_(
+                        IdempotencyKey.created_at < func.now() - timedelta(hours=settings.IDEMPOTENCY_WINDOW_HOURS),
+                        and_(
+                            IdempotencyKey.status == IN_PROGRESS,
+                            IdempotencyKey.created_at
+                            < func.now() - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS)
+                        )
+                    )
+                )
+                .returning(IdempotencyKey.key)
+            )).first()
+            await db.commit()
+
+            if claimed:
+                self._inflight[key] = loop.create_future()
+                return None
+
+            existing = (await db.execute(
+                select(IdempotencyKey.request_hash, IdempotencyKey.status, IdempotencyKey.response)
+                .where(IdempotencyKey.scope == self.scope, IdempotencyKey.key == key)
+            )).first()
+            await db.commit()
+
+            if existing is None:
+                continue
+
+            if existing.request_hash != request_hash:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key has already been used with a different request"
+                )
+
+            if existing.status == COMPLETED:
+                return existing.response
+
+            if loop.time() >= deadline:
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is still being processed"
+                )
+
+            inflight = self._inflight.get(key)
+            if inflight:
+                await asyncio.wait({inflight}, timeout=settings.IDEMPOTENCY_POLL_INTERVAL * 10)
+            else:
+                await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+
+    async def store_response(self, key: str, response: dict, db: AsyncSession):
+        """Stage the response snapshot; it is committed together with the caller's own changes."""
+        await db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.scope == self.scope, IdempotencyKey.key == key)
+            .values(status=COMPLETED, response=jsonable_encoder(response), completed_at=func.now())
+        )
+
+    def finish(self, key: str):
+        inflight = self._inflight.pop(key, None)
+        if inflight and not inflight.done():
+            inflight.set_result(True)
+
+    async def release(self, key: str, db: AsyncSession):
+        """Forget a failed attempt so the client can retry with the same key."""
+        await db.rollback()
+        await db.execute(
+            delete(IdempotencyKey)
+            .where(
+                IdempotencyKey.scope == self.scope,
+                IdempotencyKey.key == key,
+                IdempotencyKey.status == IN_PROGRESS
+            )
+        )
+        await db.commit()
+        self.finish(key)
+
+
+donation_idempotency = IdempotencyService("send-donation")
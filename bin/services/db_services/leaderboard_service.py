@@ -0,0 +1,173 @@
+import asyncio
+import time
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from sortedcontainers import SortedList
+from sqlalchemy import Text, cast, func, select
+
+from bin.config import settings
+from bin.db.postgresDB import AsyncSessionLocal
+from bin.models import pg_models
+from bin.services.db_services.rider_counter_service import pending_raise_subquery
+
+
+class TxSnapshot(NamedTuple):
+    """A parsed txid_current_snapshot(): xmin:xmax:in-progress ids."""
+    xmin: int
+    xmax: int
+    in_progress: FrozenSet[int]
+
+    @classmethod
+    def parse(cls, value: str) -> "TxSnapshot":
+        xmin, xmax, in_progress = value.split(":")
+        return cls(int(xmin), int(xmax), frozenset(int(txid) for txid in in_progress.split(",") if txid))
+
+    def includes(self, txid: int) -> bool:
+        """True when the transaction had committed before the snapshot was taken."""
+        return txid < self.xmin or (txid < self.xmax and txid not in self.in_progress)
+
+
+class RiderLeaderboard:
+    """
+    Riders ordered by raise in a SortedList of (-raise, rider_id), so top-N and rank
+    lookups are O(log n) without touching riders_info. Kept current from the live
+    feed's rider deltas and rebuilt from the database every
+    LEADERBOARD_RECONCILE_SECONDS to correct any drift. Not thread safe: read and
+    update it only from the event loop (async routes), never from the threadpool.
+    """
+
+    def __init__(self):
+        self._order = SortedList()
+        self._raise: Dict[int, float] = {}
+        self._riders: Dict[int, dict] = {}
+        # (txid, deltas) that arrive while a rebuild is reading the database
+        self._buffered: Optional[List[Tuple[Optional[int], Dict[int, float]]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._reload_task: Optional[asyncio.Task] = None
+
+        self.loaded_at = None
+        self.reloads = 0
+        self.deltas_applied = 0
+        self.deltas_in_snapshot = 0
+
+    def _set(self, rider_id: int, amount: float):
+        previous = self._raise.get(rider_id)
+        if previous is not None:
+            self._order.remove((-previous, rider_id))
+        self._raise[rider_id] = amount
+        self._order.add((-amount, rider_id))
+
+    def apply_deltas(self, rider_amounts: Dict[int, float], txid: Optional[int] = None):
+        if self._buffered is not None:
+            self._buffered.append((txid, rider_amounts))
+        for rider_id, amount in rider_amounts.items():
+            if rider_id not in self._raise:
+                # registered after the last rebuild, its details come with the next one
+                self.schedule_reload()
+                continue
+            self._set(rider_id, self._raise[rider_id] + amount)
+            self.deltas_applied += 1
+
+    def on_live_event(self, rider_amounts: Dict[int, float], resync: bool, txid: Optional[int] = None):
+        if resync:
+            self.schedule_reload()
+        else:
+            self.apply_deltas(rider_amounts, txid)
+
+    async def _reload(self):
+        try:
+            await self.load()
+        except Exception as e:
+            print(f"Leaderboard reload failed: {str(e)}")
+
+    def schedule_reload(self):
+        if self._buffered is None and (self._reload_task is None or self._reload_task.done()):
+            self._reload_task = asyncio.create_task(self._reload())
+
+    async def load(self):
+        self._buffered = []
+        try:
+            async with AsyncSessionLocal() as db_session:
+                # REPEATABLE READ so the rows come from exactly the snapshot whose txids we record
+                await db_session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+                snapshot = TxSnapshot.parse((await db_session.execute(
+                    select(cast(func.txid_current_snapshot(), Text))
+                )).scalar())
+                rows = await self._read_riders(db_session)
+                await db_session.commit()
+
+            # swap in a freshly built index, then replay only deltas the snapshot can't contain
+            self._order = SortedList((-(row.rider_raise or 0), row.rider_id) for row in rows)
+            self._raise = {row.rider_id: row.rider_raise or 0 for row in rows}
+            self._riders = {
+                row.rider_id: {"rider_name": row.rider_name, "rider_goal": row.rider_goal, "rider_img": row.rider_img}
+                for row in rows
+            }
+            buffered = self._buffered
+        finally:
+            self._buffered = None
+
+        for txid, rider_amounts in buffered:
+            # a payment committed before the snapshot whose NOTIFY arrived during the read is already counted
+            if txid is not None and snapshot.includes(txid):
+                self.deltas_in_snapshot += 1
+                continue
+            self.apply_deltas(rider_amounts, txid)
+        self.loaded_at = time.time()
+        self.reloads += 1
+
+    @staticmethod
+    async def _read_riders(db_session):
+        pending = pending_raise_subquery()
+        return (await db_session.execute(
+            select(
+                pg_models.RidersTable.rider_id,
+                pg_models.RidersTable.rider_name,
+                pg_models.RidersTable.rider_goal,
+                pg_models.RidersTable.rider_img,
+                (pg_models.RidersTable.rider_raise + func.coalesce(pending.c.pending_raise, 0)).label("rider_raise")
+            ).outerjoin(pending, pending.c.rider_id == pg_models.RidersTable.rider_id)
+        )).all()
+
+    def _entry(self, rank: int, rider_id: int) -> dict:
+        return {"rank": rank, "rider_id": rider_id, "rider_raise": self._raise[rider_id], **self._riders[rider_id]}
+
+    def top(self, n: int) -> List[dict]:
+        return [self._entry(rank, rider_id) for rank, (_, rider_id) in enumerate(self._order.islice(0, n), start=1)]
+
+    def rank(self, rider_id: int) -> Optional[dict]:
+        if rider_id not in self._raise:
+            return None
+        return self._entry(self._order.index((-self._raise[rider_id], rider_id)) + 1, rider_id)
+
+    async def _reconcile_forever(self):
+        while True:
+            await asyncio.sleep(settings.LEADERBOARD_RECONCILE_SECONDS)
+            await self._reload()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._reconcile_forever())
+
+    async def stop(self):
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "riders": len(self._order),
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "deltas_applied": self.deltas_applied,
+            "deltas_in_snapshot": self.deltas_in_snapshot,
+        }
+
+
+rider_leaderboard = RiderLeaderboard()
@@ -0,0 +1,239 @@
+import asyncio
+import json
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bin.config import settings
+from bin.db.postgresDB import async_engine
+from bin.helpers.conditional_get import data_versions
+
+CHANNEL = "donation_events"
+# pg_notify payloads must stay under 8000 bytes
+MAX_NOTIFY_BYTES = 7900
+
+
+async def publish_donation_event(paid: Iterable[Tuple[int, int, float]], rider_amounts: Dict[int, float],
+                                 db_session: AsyncSession):
+    """
+    *Queue a NOTIFY with the totals/rider deltas of newly paid donations. Postgres only
+    delivers it when the caller's transaction commits, so listeners never see a payment
+    that was rolled back. The payload carries the transaction id so a consumer that
+    also read a snapshot can tell whether that snapshot already included the payment.
+    """
+    totals = {}
+    for donation_type_id, currency_id, amount in paid:
+        key = f"{donation_type_id}:{currency_id}"
+        total_amount, donation_count = totals.get(key, (0, 0))
+        totals[key] = (total_amount + (amount or 0), donation_count + 1)
+    if not totals and not rider_amounts:
+        return
+
+    txid = (await db_session.execute(select(func.txid_current()))).scalar()
+    payload = json.dumps({"totals": totals, "riders": rider_amounts, "txid": txid}, separators=(",", ":"))
+    if len(payload.encode()) > MAX_NOTIFY_BYTES:
+        payload = json.dumps({"resync": True})
+    await db_session.execute(select(func.pg_notify(CHANNEL, payload)))
+
+
+class _Subscriber:
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.LIVE_FEED_CLIENT_QUEUE_SIZE)
+        self.lagged = 0
+
+
+class LiveFeedBroadcaster:
+    """
+    One per worker: LISTENs on donation_events over a dedicated connection, merges
+    incoming deltas and fans them out to SSE clients at most
+    LIVE_FEED_MAX_UPDATES_PER_SECOND times a second. A client whose queue is full
+    gets its backlog replaced by a resync event (refetch the REST snapshot) and is
+    dropped after LIVE_FEED_MAX_LAGS of those.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[_Subscriber] = set()
+        self._pending_totals: Dict[str, list] = {}
+        self._pending_riders: Dict[str, float] = {}
+        self._pending_resync = False
+        self._changed = asyncio.Event()
+        self._delta_handlers: List[Callable[[Dict[int, float], bool], None]] = []
+        self._listen_task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self.notifications = 0
+        self.events_sent = 0
+        self.resyncs = 0
+        self.disconnected_slow = 0
+
+    def on_rider_deltas(self, handler: Callable[[Dict[int, float], bool, Optional[int]], None]):
+        """Register an in-process consumer of raw rider deltas, called with (deltas, resync, txid)."""
+        self._delta_handlers.append(handler)
+
+    def _notify_handlers(self, rider_amounts: Dict[int, float], resync: bool, txid: Optional[int] = None):
+        for handler in self._delta_handlers:
+            try:
+                handler(rider_amounts, resync, txid)
+            except Exception as e:
+                print(f"Live feed delta handler failed: {str(e)}")
+
+    def _on_notification(self, connection, pid, channel, payload):
+        self.notifications += 1
+        data_versions.wake()
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            event = {"resync": True}
+
+        if event.get("resync"):
+            self._pending_resync = True
+        for key, (amount, count) in event.get("totals", {}).items():
+            pending = self._pending_totals.setdefault(key, [0, 0])
+            pending[0] += amount
+            pending[1] += count
+        for rider_id, amount in event.get("riders", {}).items():
+            self._pending_riders[rider_id] = self._pending_riders.get(rider_id, 0) + amount
+        self._notify_handlers(
+            {int(rider_id): amount for rider_id, amount in event.get("riders", {}).items()},
+            bool(event.get("resync")),
+            event.get("txid")
+        )
+        self._changed.set()
+
+    async def _listen_forever(self):
+        while True:
+            try:
+                async with async_engine.connect() as conn:
+                    raw = await conn.get_raw_connection()
+                    listener = raw.driver_connection
+                    await listener.add_listener(CHANNEL, self._on_notification)
+                    try:
+                        # notifications arrive on the connection's callback; just keep it alive
+                        while not listener.is_closed():
+                            await asyncio.sleep(settings.LIVE_FEED_HEARTBEAT_SECONDS)
+                            await listener.execute("SELECT 1")
+                    finally:
+                        if not listener.is_closed():
+                            await listener.remove_listener(CHANNEL, self._on_notification)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Live feed listener failed, reconnecting: {str(e)}")
+            # anything may have been missed while not listening
+            self._pending_resync = True
+            self._notify_handlers({}, True)
+            self._changed.set()
+            await asyncio.sleep(1)
+
+    def _take_event(self) -> Optional[str]:
+        if self._pending_resync:
+            event = ("resync", {})
+        elif self._pending_totals or self._pending_riders:
+            event = ("donations", {
+                "totals": [
+                    {
+                        "donation_type_id": int(key.split(":")[0]),
+                        "currency_id": int(key.split(":")[1]),
+                        "amount": amount,
+                        "count": count
+                    }
+                    for key, (amount, count) in self._pending_totals.items()
+                ],
+                "riders": [
+                    {"rider_id": int(rider_id), "amount": amount}
+                    for rider_id, amount in self._pending_riders.items()
+                ],
+            })
+        else:
+            return None
+
+        self._pending_totals = {}
+        self._pending_riders = {}
+        self._pending_resync = False
+        name, data = event
+        return f"event: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+    async def _flush_forever(self):
+        interval = 1 / settings.LIVE_FEED_MAX_UPDATES_PER_SECOND
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+            message = self._take_event()
+            if message:
+                self._fan_out(message)
+            # coalescing window: deltas arriving meanwhile are merged into the next event
+            await asyncio.sleep(interval)
+
+    def _fan_out(self, message: str):
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(message)
+                self.events_sent += 1
+            except asyncio.QueueFull:
+                subscriber.lagged += 1
+                self.resyncs += 1
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                if subscriber.lagged > settings.LIVE_FEED_MAX_LAGS:
+                    self.disconnected_slow += 1
+                    subscriber.queue.put_nowait(None)
+                    self._subscribers.discard(subscriber)
+                else:
+                    subscriber.queue.put_nowait("event: resync\ndata: {}\n\n")
+
+    async def stream(self):
+        """SSE byte stream for one client; ends when the client disconnects or is too slow."""
+        subscriber = _Subscriber()
+        self._subscribers.add(subscriber)
+        try:
+            yield f"retry: {settings.LIVE_FEED_RETRY_MS}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscriber.queue.get(),
+                        timeout=settings.LIVE_FEED_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def start(self):
+        if self._listen_task is None:
+            self._listen_task = asyncio.create_task(self._listen_forever())
+            self._flush_task = asyncio.create_task(self._flush_forever())
+
+    async def stop(self):
+        for subscriber in list(self._subscribers):
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(None)
+        self._subscribers.clear()
+
+        for task in (self._listen_task, self._flush_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listen_task = None
+        self._flush_task = None
+
+    def stats(self) -> dict:
+        return {
+            "listening": self._listen_task is not None and not self._listen_task.done(),
+            "clients": len(self._subscribers),
+            "notifications": self.notifications,
+            "events_sent": self.events_sent,
+            "resyncs": self.resyncs,
+            "disconnected_slow": self.disconnected_slow,
+        }
+
+
+live_feed = LiveFeedBroadcaster()
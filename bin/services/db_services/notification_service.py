@@ -0,0 +1,112 @@
+import hmac
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bin.enums.transaction_status import TransactionStatus
+from bin.helpers.http_client_registry import http_client_registry
+from bin.models import pg_models
+from bin.services.db_services.donation_service import finalize_transactions
+from bin.services.db_services.payment_service import PaymentService
+from bin.utils.response_codes import PaymentStatus
+
+
+OPEN_STATUSES = (TransactionStatus.INITIATED.value, TransactionStatus.VERIFYING.value)
+
+
+def _authenticate(headers, payload: dict):
+    gateway = http_client_registry.by_merchant_id(payload.get("merchant"))
+    secret = headers.get("X-Notification-Secret", "")
+
+    if not gateway or not gateway.notification_secret or not hmac.compare_digest(
+            secret.encode(), gateway.notification_secret.encode()):
+        raise HTTPException(status_code=401, detail="Invalid notification secret")
+
+    return gateway
+
+
+async def process_gateway_notification(headers, payload: dict, db_session: AsyncSession):
+    """
+    *Apply an MPGS server-to-server notification. Each notification is recorded in
+    gateway_notifications (unique on notification_id) in the same transaction as the
+    status change, so redelivered notifications are acknowledged without reprocessing.
+    """
+    gateway = _authenticate(headers, payload)
+
+    order_id = payload.get("order", {}).get("id")
+    if not order_id:
+        raise HTTPException(status_code=400, detail="Missing order id")
+
+    notification_id = headers.get("X-Notification-Id") or \
+        f"{order_id}:{payload.get('transaction', {}).get('id', '')}:{payload.get('result', '')}"
+
+    already_seen = (await db_session.execute(
+        select(pg_models.GatewayNotification.id)
+        .where(pg_models.GatewayNotification.notification_id == notification_id)
+    )).first()
+    if already_seen:
+        await db_session.commit()
+        return {"status": "duplicate", "finalized": []}
+
+    transaction = (await db_session.execute(
+        select(
+            pg_models.Transaction.id,
+            pg_models.Transaction.status,
+            pg_models.Transaction.amount,
+            pg_models.Transaction.currency
+        ).where(pg_models.Transaction.mpgs_order_id == order_id)
+    )).first()
+    await db_session.commit()
+
+    payment_details = None
+    if not transaction:
+        outcome = "unknown_order"
+    elif transaction.status in OPEN_STATUSES:
+        payment_details = PaymentService.interpret_notification(payload, transaction.currency, transaction.amount)
+        if payment_details is None:
+            # Not authoritative on its own; fall back to one verify call, made with no DB transaction open
+            payment_details = await PaymentService.verify_payment(order_id, transaction.currency, db_session)
+        if payment_details["status"] == PaymentStatus.COMPLETED:
+            outcome = payment_details["status"].value
+        else:
+            # The payer can still retry on the same order after a decline, so the order is
+            # only failed by the payment callback or the reconciler
+            outcome = "declined"
+            payment_details = None
+    elif transaction.status == TransactionStatus.FAILED.value:
+        # paid on a later attempt after the order was already failed
+        payment_details = PaymentService.interpret_notification(payload, transaction.currency, transaction.amount)
+        outcome = payment_details["status"].value if payment_details else "already_final"
+    else:
+        outcome = "already_final"
+
+    recorded = (await db_session.execute(
+        insert(pg_models.GatewayNotification)
+        .values(
+            notification_id=notification_id,
+            order_id=order_id,
+            merchant_id=gateway.merchant_id,
+            outcome=outcome,
+            payload=payload
+        )
+        .on_conflict_do_nothing(index_elements=["notification_id"])
+        .returning(pg_models.GatewayNotification.id)
+    )).first()
+
+    if not recorded:
+        await db_session.rollback()
+        return {"status": "duplicate", "finalized": []}
+
+    if payment_details is None:
+        await db_session.commit()
+        return {"status": outcome, "finalized": []}
+
+    # finalize_transactions commits the notification row together with the status change
+    finalized = await finalize_transactions(
+        [{"id": transaction.id, "status": payment_details["status"], "gateway_code": payment_details["gateway_code"]}],
+        db_session,
+        expected_statuses=(TransactionStatus.INITIATED, TransactionStatus.VERIFYING, TransactionStatus.FAILED)
+    )
+    return {"status": outcome, "finalized": finalized}
@@ -1,29 +1,171 @@
-import base64
+import asyncio
+import random
 import uuid
-from typing import Dict, Any
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Any, Optional, Callable, Awaitable
 
 import httpx
 from fastapi import HTTPException
 
-from bin.config import MERCHANT_CREDENTIALS, MPGS_API_VERSION, MPGS_BASE_URL
+from bin.config import MERCHANT_CREDENTIALS, MPGS_API_VERSION, MPGS_BASE_URL, settings
+from bin.helpers.http_client_registry import http_client_registry
 from bin.helpers.http_request_logger import HttpRequestLogger
+from bin.utils.circuit_breaker import CircuitBreaker, RetryBudget
 from bin.utils.response_codes import PaymentStatus, PaymentResponseCode, get_error_message
 
+# One breaker per merchant so a degraded merchant account doesn't block the others
+gateway_breakers = {
+    currency: CircuitBreaker(
+        name=currency,
+        failure_threshold=settings.MPGS_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.MPGS_BREAKER_RESET_TIMEOUT,
+        half_open_max_calls=settings.MPGS_BREAKER_HALF_OPEN_MAX_CALLS
+    )
+    for currency in MERCHANT_CREDENTIALS
+}
+
+retry_budget = RetryBudget(
+    ratio=settings.MPGS_RETRY_BUDGET_RATIO,
+    min_per_second=settings.MPGS_RETRY_BUDGET_MIN_PER_SECOND,
+    max_tokens=settings.MPGS_RETRY_BUDGET_MAX_TOKENS
+)
+
+
+def _is_retryable_response(response: httpx.Response) -> bool:
+    """
+    Whether the gateway itself failed the call. The order's gatewayCode is not looked at:
+    on an order retrieval TIMED_OUT/SYSTEM_ERROR describe the donor's payment attempt,
+    and neither retrying the lookup nor tripping the breaker would change that.
+    """
+    if response.status_code >= 500:
+        return True
+    try:
+        data = response.json()
+    except ValueError:
+        return False
+    return data.get("result") == "ERROR" and data.get("error", {}).get("cause") in ("SERVER_BUSY", "SERVER_FAILED")
+
+
+# transaction types that take the payer's money; refunds, voids and verifications don't pay an order
+PAYMENT_TRANSACTION_TYPES = ("PAYMENT", "AUTHORIZATION", "CAPTURE")
+
+
+def _is_approved_payment(transaction: dict) -> bool:
+    """A transaction (an order's transaction entry or a notification) that approved a payment."""
+    transaction_type = transaction.get("transaction", {}).get("type")
+    return (
+        transaction.get("result") == "SUCCESS"
+        and transaction.get("response", {}).get("gatewayCode") == PaymentResponseCode.APPROVED.value
+        and (transaction_type is None or transaction_type in PAYMENT_TRANSACTION_TYPES)
+    )
+
+
+# explanations MPGS gives when the order id in the path doesn't exist
+UNKNOWN_ORDER_PHRASES = ("unable to find", "not found", "does not exist", "no order")
+
+
+def _is_unknown_order(response: httpx.Response) -> bool:
+    """
+    Whether a 4xx to an order lookup says the order doesn't exist. MPGS reports that as
+    INVALID_REQUEST naming the order; the same cause with any other explanation is a
+    problem with our request (credentials, API version, a field) and says nothing about it.
+    """
+    try:
+        error = response.json().get("error", {})
+    except ValueError:
+        return False
+    if error.get("cause") != "INVALID_REQUEST":
+        return False
+    explanation = (error.get("explanation") or "").lower()
+    field = (error.get("field") or "").lower()
+    return field in ("orderid", "order.id") or (
+        "order" in explanation and any(phrase in explanation for phrase in UNKNOWN_ORDER_PHRASES)
+    )
+
+
+class GatewayOrderNotFound(HTTPException):
+    """
+    The gateway says it has no such order, which is what an abandoned checkout (donor
+    never paid) looks like. Retrying won't change it.
+    """
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=400, detail=detail)
+
 
 class PaymentService:
 
+    @staticmethod
+    def is_available(currency: str) -> bool:
+        """False while the merchant's circuit is open, so callers can fail fast."""
+        breaker = gateway_breakers.get(currency)
+        return breaker is None or breaker.state != CircuitBreaker.OPEN
+
+    @staticmethod
+    async def _call_gateway(currency: str, deadline: float,
+                            send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """
+        Send a gateway request under the merchant's circuit breaker, with jittered
+        retries drawn from the global retry budget, all within one overall deadline.
+        """
+        breaker = gateway_breakers[currency]
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + deadline
+        retry_budget.record_request()
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise HTTPException(status_code=503, detail="Payment gateway is temporarily unavailable")
+
+            response = None
+            error = None
+            try:
+                async with asyncio.timeout(max(deadline_at - loop.time(), 0)):
+                    response = await send()
+                retryable = _is_retryable_response(response)
+            except (httpx.TransportError, TimeoutError) as e:
+                error = e
+            except BaseException:
+                # cancellation, decode or logging errors: the allowed slot still needs an outcome,
+                # or a half-open breaker keeps its probe slot forever
+                breaker.record_failure()
+                raise
+
+            if error is None and not retryable:
+                breaker.record_success()
+                return response
+
+            breaker.record_failure()
+            attempt += 1
+            backoff = random.uniform(0, min(settings.MPGS_RETRY_MAX_DELAY, settings.MPGS_RETRY_BASE_DELAY * 2 ** attempt))
+            if (attempt > settings.MPGS_MAX_RETRIES
+                    or loop.time() + backoff >= deadline_at
+                    or not retry_budget.try_spend()):
+                if response is not None:
+                    return response
+                if isinstance(error, TimeoutError):
+                    raise HTTPException(status_code=504, detail="Payment gateway timed out")
+                raise HTTPException(status_code=502, detail=f"Payment gateway unreachable: {str(error)}")
+
+            await asyncio.sleep(backoff)
+
+    @staticmethod
+    def stats() -> dict:
+        return {
+            "breakers": {currency: breaker.stats() for currency, breaker in gateway_breakers.items()},
+            "retry_budget": retry_budget.stats(),
+        }
+
     @staticmethod
     async def create_payment_session(donation, return_url: str, currency: str, db):
-        credentials = MERCHANT_CREDENTIALS.get(currency)
-        if not credentials:
+        gateway = http_client_registry.get(currency)
+        if not gateway:
             raise HTTPException(status_code=400, detail=f"Unsupported currency: {currency}")
 
-        auth_string = f"{credentials['api_username']}:{credentials['api_password']}"
-        auth_token = base64.b64encode(auth_string.encode()).decode()
-
         order_id = str(uuid.uuid4())
 
-        api_path = f"/version/{MPGS_API_VERSION}/merchant/{credentials['merchant_id']}/session"
+        api_path = f"/version/{MPGS_API_VERSION}/merchant/{gateway.merchant_id}/session"
         payload = {
             "apiOperation": "INITIATE_CHECKOUT",
             "interaction": {
@@ -46,13 +188,14 @@ class PaymentService:
             }
         }
 
-        logger = HttpRequestLogger(base_url=MPGS_BASE_URL, db=db)
-        logger.set_api(api_path).set_payload(payload).add_header("Authorization", f"Basic {auth_token}").add_header(
+        logger = HttpRequestLogger(base_url=MPGS_BASE_URL, db=db, client=gateway)
+        logger.set_api(api_path).set_payload(payload).add_header("Authorization", gateway.auth_header).add_header(
             "Content-Type", "application/json")
 
         try:
-            response = await logger.post()
-            print("Create Payment Session Response:", response.text)
+            response = await PaymentService._call_gateway(
+                currency, settings.MPGS_CREATE_SESSION_DEADLINE, logger.post
+            )
             response.raise_for_status()
             data = response.json()
             return {
@@ -62,71 +205,100 @@ class PaymentService:
             }
         except httpx.HTTPStatusError as e:
             raise HTTPException(status_code=400, detail=f"Payment gateway error: {e.response.text}")
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
     @staticmethod
     async def verify_payment(order_id: str, currency: str, db) -> Dict[str, Any]:
-        credentials = MERCHANT_CREDENTIALS.get(currency)
-        if not credentials:
+        gateway = http_client_registry.get(currency)
+        if not gateway:
             raise HTTPException(status_code=400, detail=f"Unsupported currency: {currency}")
 
-        auth_string = f"{credentials['api_username']}:{credentials['api_password']}"
-        auth_token = base64.b64encode(auth_string.encode()).decode()
+        api_path = f"/version/{MPGS_API_VERSION}/merchant/{gateway.merchant_id}/order/{order_id}"
 
-        api_path = f"/version/{MPGS_API_VERSION}/merchant/{credentials['merchant_id']}/order/{order_id}"
-
-        logger = HttpRequestLogger(base_url=MPGS_BASE_URL, db=db)
-        logger.set_api(api_path).add_header("Authorization", f"Basic {auth_token}")
+        logger = HttpRequestLogger(base_url=MPGS_BASE_URL, db=db, client=gateway)
+        logger.set_api(api_path).add_header("Authorization", gateway.auth_header)
 
         try:
-            response = await logger.get()
+            response = await PaymentService._call_gateway(currency, settings.MPGS_VERIFY_DEADLINE, logger.get)
             response.raise_for_status()
             data = response.json()
 
-            result = data.get("result", "")
-            transactions = data.get("transaction", [])
-
-            gateway_code = (
-                transactions[0].get("response", {}).get("gatewayCode", "")
-                if transactions
-                else data.get("response", {}).get("gatewayCode", "")
-            )
-
-            if not gateway_code:
-                raise ValueError("No gateway code found in response")
-
-            # Convert to enum
-            try:
-                payment_response_code = PaymentResponseCode(gateway_code)
-            except ValueError:
-                payment_response_code = "An Error Occurred"
-
-            # Check all transactions for approval (if they exist)
-            all_approved = all(
-                tx.get("response", {}).get("gatewayCode") == "APPROVED"
-                for tx in transactions
-            ) if transactions else True
-
-            is_success = (
-                    result == "SUCCESS"
-                    and payment_response_code == PaymentResponseCode.APPROVED
-                    and all_approved
-            )
-
-            return {
-                "status": PaymentStatus.COMPLETED if is_success else PaymentStatus.FAILED,
-                "gateway_code": payment_response_code,
-                "raw_response": data,
-                "decline_reason": None if is_success else get_error_message(payment_response_code)
-            }
+            return PaymentService.interpret_order(data)
 
         except httpx.HTTPStatusError as e:
+            if e.response.status_code in (400, 404) and _is_unknown_order(e.response):
+                raise GatewayOrderNotFound(f"Payment verification error: {e.response.text}")
             raise HTTPException(status_code=400, detail=f"Payment verification error: {e.response.text}")
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
+    @staticmethod
+    def interpret_order(data: dict) -> Dict[str, Any]:
+        """
+        Map an MPGS order (retrieve order response) to our payment status. The order is
+        paid once any payment attempt on it was approved: Hosted Checkout lets the payer
+        retry on the same order, so a declined attempt before it doesn't count against it.
+        """
+        transactions = data.get("transaction", [])
+        approved = next((tx for tx in transactions if _is_approved_payment(tx)), None)
+
+        if approved is not None:
+            gateway_code = approved["response"]["gatewayCode"]
+        elif transactions:
+            # the most recent attempt says why the order isn't paid
+            gateway_code = transactions[-1].get("response", {}).get("gatewayCode", "")
+        else:
+            gateway_code = data.get("response", {}).get("gatewayCode", "")
+
+        if not gateway_code:
+            raise ValueError("No gateway code found in response")
+
+        # Convert to enum
+        try:
+            payment_response_code = PaymentResponseCode(gateway_code)
+        except ValueError:
+            payment_response_code = "An Error Occurred"
+
+        is_success = approved is not None or (
+            not transactions
+            and data.get("result") == "SUCCESS"
+            and payment_response_code == PaymentResponseCode.APPROVED
+        )
+
+        return {
+            "status": PaymentStatus.COMPLETED if is_success else PaymentStatus.FAILED,
+            "gateway_code": payment_response_code,
+            "raw_response": data,
+            "decline_reason": None if is_success else get_error_message(payment_response_code)
+        }
 
+    @staticmethod
+    def interpret_notification(payload: dict, currency: str, amount) -> Optional[Dict[str, Any]]:
+        """
+        Map an MPGS transaction notification to our payment status. Only an approved
+        payment for the amount and currency we expect settles the order on its own;
+        a notification describes one attempt, and after a decline the payer can still
+        pay on the same order, so anything else returns None and the order is verified.
+        """
+        order = payload.get("order", {})
 
+        if not _is_approved_payment(payload):
+            return None
 
+        try:
+            if order.get("currency") != currency or Decimal(str(order.get("amount"))) != Decimal(str(amount)):
+                return None
+        except InvalidOperation:
+            return None
 
+        return {
+            "status": PaymentStatus.COMPLETED,
+            "gateway_code": PaymentResponseCode.APPROVED,
+            "raw_response": payload,
+            "decline_reason": None
+        }
@@ -0,0 +1,213 @@
+import asyncio
+import time
+from datetime import timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import update, func, select, or_, and_
+
+from bin.config import settings
+from bin.db.postgresDB import AsyncSessionLocal
+from bin.enums.transaction_status import TransactionStatus
+from bin.models import pg_models
+from bin.services.db_services.donation_service import finalize_transactions, release_transaction_claims
+from bin.services.db_services.payment_service import GatewayOrderNotFound, PaymentService
+from bin.utils.rate_limiter import AsyncRateLimiter
+from bin.utils.response_codes import PaymentStatus
+
+# gateway_code recorded for orders the gateway has never heard of: checkout opened, never paid
+ORDER_NOT_FOUND = "ORDER_NOT_FOUND"
+
+
+class ReconciliationWorker:
+    """
+    Verifies transactions left in initiated (donor closed the tab before the MPGS
+    redirect) against the gateway. Batches are claimed with the same
+    initiated -> verifying compare-and-set as the payment callback, using
+    FOR UPDATE SKIP LOCKED, so any number of app workers can run it at once.
+    An order the gateway doesn't know is final (failed, ORDER_NOT_FOUND); other
+    lookup errors release the claim, up to RECONCILE_MAX_ATTEMPTS lookups.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._limiters: Dict[str, AsyncRateLimiter] = {}
+
+        self.runs = 0
+        self.claimed = 0
+        self.completed = 0
+        self.failed = 0
+        self.abandoned = 0
+        self.errors = 0
+        self.backlog = None
+        self.exhausted = None
+        self.last_run_seconds = None
+        self.last_run_throughput = None
+
+    def _window(self):
+        transactions = pg_models.Transaction.__table__
+        return and_(
+            transactions.c.created_at < func.now() - timedelta(minutes=settings.RECONCILE_MIN_AGE_MINUTES),
+            transactions.c.created_at > func.now() - timedelta(hours=settings.RECONCILE_MAX_AGE_HOURS)
+        )
+
+    def _limiter(self, currency: str) -> AsyncRateLimiter:
+        if currency not in self._limiters:
+            self._limiters[currency] = AsyncRateLimiter(
+                rate=settings.RECONCILE_RATE_PER_CURRENCY,
+                burst=settings.RECONCILE_CONCURRENCY
+            )
+        return self._limiters[currency]
+
+    async def count_backlog(self, db):
+        """(still to verify, out of attempts) among initiated transactions in the window."""
+        transactions = pg_models.Transaction.__table__
+        out_of_attempts = transactions.c.verify_attempts >= settings.RECONCILE_MAX_ATTEMPTS
+        row = (await db.execute(
+            select(
+                func.count().filter(~out_of_attempts),
+                func.count().filter(out_of_attempts)
+            ).select_from(transactions).where(
+                transactions.c.status == TransactionStatus.INITIATED.value,
+                self._window()
+            )
+        )).first()
+        await db.commit()
+        return row[0], row[1]
+
+    async def claim_batch(self, db, skip_ids=()):
+        transactions = pg_models.Transaction.__table__
+        stale = (
+            select(transactions.c.id)
+            .where(
+                self._window(),
+                transactions.c.id.not_in(skip_ids),
+                transactions.c.verify_attempts < settings.RECONCILE_MAX_ATTEMPTS,
+                or_(
+                    transactions.c.status == TransactionStatus.INITIATED.value,
+                    and_(
+                        transactions.c.status == TransactionStatus.VERIFYING.value,
+                        transactions.c.verification_started_at
+                        < func.now() - timedelta(seconds=settings.PAYMENT_VERIFY_CLAIM_TIMEOUT)
+                    )
+                )
+            )
+            .order_by(transactions.c.created_at)
+            .limit(settings.RECONCILE_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = (await db.execute(
+            update(transactions)
+            .where(transactions.c.id.in_(stale))
+            .values(
+                status=TransactionStatus.VERIFYING.value,
+                verification_started_at=func.now(),
+                verify_attempts=transactions.c.verify_attempts + 1
+            )
+            .returning(transactions.c.id, transactions.c.mpgs_order_id, transactions.c.currency)
+        )).all()
+        await db.commit()
+        return claimed
+
+    async def _verify(self, transaction, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            await self._limiter(transaction.currency).acquire()
+            # verify_payment may log through the session, so each concurrent call gets its own
+            async with AsyncSessionLocal() as log_db:
+                try:
+                    payment_details = await PaymentService.verify_payment(
+                        transaction.mpgs_order_id,
+                        transaction.currency,
+                        log_db
+                    )
+                except GatewayOrderNotFound:
+                    return {"id": transaction.id, "status": PaymentStatus.FAILED, "gateway_code": ORDER_NOT_FOUND}
+                except Exception as e:
+                    print(f"Reconciliation of transaction {transaction.id} failed: {str(e)}")
+                    return None
+
+        return {
+            "id": transaction.id,
+            "status": payment_details["status"],
+            "gateway_code": payment_details["gateway_code"]
+        }
+
+    async def run_batch(self, db, skip_ids: set) -> int:
+        # skip_ids holds transactions already tried in this run so released claims are not retried in a loop
+        claimed = await self.claim_batch(db, skip_ids)
+        if not claimed:
+            return 0
+        skip_ids.update(transaction.id for transaction in claimed)
+        self.claimed += len(claimed)
+
+        semaphore = asyncio.Semaphore(settings.RECONCILE_CONCURRENCY)
+        results = await asyncio.gather(*(self._verify(transaction, semaphore) for transaction in claimed))
+
+        outcomes = [result for result in results if result]
+        unresolved = [transaction.id for transaction, result in zip(claimed, results) if not result]
+
+        finalized = await finalize_transactions(outcomes, db)
+        if unresolved:
+            await release_transaction_claims(unresolved, db)
+
+        self.completed += sum(1 for row in finalized if row.status == PaymentStatus.COMPLETED.value)
+        self.failed += sum(1 for row in finalized if row.status == PaymentStatus.FAILED.value)
+        self.abandoned += sum(1 for row in finalized if row.gateway_code == ORDER_NOT_FOUND)
+        self.errors += len(unresolved)
+        return len(claimed)
+
+    async def run_once(self) -> int:
+        started = time.monotonic()
+        processed = 0
+        attempted = set()
+        async with AsyncSessionLocal() as db:
+            self.backlog, self.exhausted = await self.count_backlog(db)
+            while True:
+                batch = await self.run_batch(db, attempted)
+                processed += batch
+                if batch < settings.RECONCILE_BATCH_SIZE:
+                    break
+
+        self.runs += 1
+        self.last_run_seconds = time.monotonic() - started
+        self.last_run_throughput = processed / self.last_run_seconds if self.last_run_seconds else None
+        return processed
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Transaction reconciliation failed: {str(e)}")
+            await asyncio.sleep(settings.RECONCILE_INTERVAL_SECONDS)
+
+    def start(self):
+        if settings.RECONCILE_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.RECONCILE_ENABLED,
+            "running": self._task is not None and not self._task.done(),
+            "backlog": self.backlog,
+            "out_of_attempts": self.exhausted,
+            "runs": self.runs,
+            "claimed": self.claimed,
+            "completed": self.completed,
+            "failed": self.failed,
+            "abandoned": self.abandoned,
+            "errors": self.errors,
+            "last_run_seconds": self.last_run_seconds,
+            "last_run_transactions_per_second": self.last_run_throughput,
+        }
+
+
+reconciliation_worker = ReconciliationWorker()
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bin.config import settings
+from bin.models import pg_models
+from bin.response.response_model import ResponseModel
+from bin.utils.single_flight import SingleFlight
+
+
+@dataclass(frozen=True)
+class Currency:
+    currency_id: int
+    currency_name: str
+    currency_code: str
+
+
+@dataclass(frozen=True)
+class DonationType:
+    donation_id: int
+    donation_name: str
+    is_general_donation: bool
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """One immutable snapshot of the reference tables; replaced whole on reload."""
+    currencies: Tuple[Currency, ...]
+    currencies_by_id: Mapping[int, Currency]
+    currencies_by_code: Mapping[str, Currency]
+    donation_types: Tuple[DonationType, ...]
+    donation_types_by_id: Mapping[int, DonationType]
+    digest: str
+    generation: int
+    loaded_at: float
+    currency_list_body: bytes
+    donation_types_body: bytes
+
+
+def _serialize(data, message: str) -> bytes:
+    return json.dumps(ResponseModel([asdict(item) for item in data], message), separators=(",", ":")).encode()
+
+
+class ReferenceDataCache:
+    """
+    Currencies and donation types held in memory per worker. Reloaded after
+    REFERENCE_DATA_TTL_SECONDS or on invalidate(); generation only moves when the
+    content actually changed, so it can be used as a data version.
+    """
+
+    def __init__(self):
+        self._data: Optional[ReferenceData] = None
+        self._stale = False
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    @property
+    def generation(self) -> int:
+        return self._data.generation if self._data else 0
+
+    @property
+    def version(self) -> Optional[str]:
+        """Content digest of the current snapshot, None while it needs (re)loading."""
+        return None if self._expired() else self._data.digest
+
+    def _expired(self) -> bool:
+        return (
+            self._data is None
+            or self._stale
+            or time.monotonic() - self._data.loaded_at >= settings.REFERENCE_DATA_TTL_SECONDS
+        )
+
+    async def _load(self, db_session: AsyncSession) -> ReferenceData:
+        currency_rows = (await db_session.execute(
+            select(pg_models.CurrencyTable).order_by(pg_models.CurrencyTable.currency_id)
+        )).scalars().all()
+        donation_type_rows = (await db_session.execute(
+            select(pg_models.DonationTypeTable).order_by(pg_models.DonationTypeTable.donation_id)
+        )).scalars().all()
+        await db_session.commit()
+
+        currencies = tuple(
+            Currency(row.currency_id, row.currency_name, row.currency_code) for row in currency_rows
+        )
+        donation_types = tuple(
+            DonationType(row.donation_id, row.donation_name, row.is_general_donation) for row in donation_type_rows
+        )
+
+        digest = hashlib.sha256(
+            json.dumps([[asdict(c) for c in currencies], [asdict(d) for d in donation_types]]).encode()
+        ).hexdigest()
+        previous = self._data
+        generation = previous.generation if previous and previous.digest == digest else self.generation + 1
+
+        self._data = ReferenceData(
+            currencies=currencies,
+            currencies_by_id=MappingProxyType({c.currency_id: c for c in currencies}),
+            currencies_by_code=MappingProxyType({c.currency_code: c for c in currencies}),
+            donation_types=donation_types,
+            donation_types_by_id=MappingProxyType({d.donation_id: d for d in donation_types}),
+            digest=digest,
+            generation=generation,
+            loaded_at=time.monotonic(),
+            currency_list_body=_serialize(currencies, "All currency list"),
+            donation_types_body=_serialize(donation_types, "All donation types"),
+        )
+        self._stale = False
+        self.reloads += 1
+        return self._data
+
+    async def get(self, db_session: AsyncSession) -> ReferenceData:
+        if not self._expired():
+            self.hits += 1
+            return self._data
+        self.misses += 1
+        return await self._flight.do("load", lambda: self._load(db_session))
+
+    async def load(self, db_session: AsyncSession) -> ReferenceData:
+        """Force a reload, used at startup."""
+        return await self._flight.do("load", lambda: self._load(db_session))
+
+    def invalidate(self):
+        """Reload on next access. Other workers pick changes up when their TTL runs out."""
+        self._stale = True
+
+    async def currency(self, currency_id: int, db_session: AsyncSession) -> Optional[Currency]:
+        return (await self.get(db_session)).currencies_by_id.get(currency_id)
+
+    async def currency_by_code(self, currency_code: str, db_session: AsyncSession) -> Optional[Currency]:
+        return (await self.get(db_session)).currencies_by_code.get(currency_code)
+
+    def stats(self) -> dict:
+        return {
+            "generation": self.generation,
+            "age_seconds": time.monotonic() - self._data.loaded_at if self._data else None,
+            "currencies": len(self._data.currencies) if self._data else 0,
+            "donation_types": len(self._data.donation_types) if self._data else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+        }
+
+
+reference_data = ReferenceDataCache()
@@ -0,0 +1,103 @@
+import asyncio
+import random
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bin.config import settings
+from bin.db.postgresDB import AsyncSessionLocal
+from bin.helpers.conditional_get import data_versions
+from bin.models import pg_models
+
+
+async def add_rider_raises(amounts: Dict[int, float], db_session: AsyncSession):
+    """
+    *Add confirmed donation amounts to random counter slots, one row per rider.
+    Runs inside the caller's transaction and does not commit.
+    """
+    if not amounts:
+        return
+
+    stmt = insert(pg_models.RiderRaiseCounter).values([
+        {"rider_id": rider_id, "slot": random.randrange(settings.RIDER_COUNTER_SLOTS), "amount": amount}
+        for rider_id, amount in amounts.items()
+    ])
+    await db_session.execute(stmt.on_conflict_do_update(
+        index_elements=[pg_models.RiderRaiseCounter.rider_id, pg_models.RiderRaiseCounter.slot],
+        set_={"amount": pg_models.RiderRaiseCounter.amount + stmt.excluded.amount}
+    ))
+
+
+def pending_raise_subquery():
+    """Per-rider sum of counter slots that haven't been rolled up yet."""
+    return (
+        select(
+            pg_models.RiderRaiseCounter.rider_id,
+            func.sum(pg_models.RiderRaiseCounter.amount).label("pending_raise")
+        )
+        .group_by(pg_models.RiderRaiseCounter.rider_id)
+        .subquery()
+    )
+
+
+async def rollup_rider_counters(db_session: AsyncSession) -> int:
+    """
+    *Move counter slots into riders_info.rider_raise in one statement; the DELETE and the
+    UPDATE share a transaction, so readers adding both never see an amount twice or not at all
+    """
+    counters = pg_models.RiderRaiseCounter.__table__
+    riders = pg_models.RidersTable.__table__
+
+    drained = delete(counters).returning(counters.c.rider_id, counters.c.amount).cte("drained")
+    totals = (
+        select(drained.c.rider_id, func.sum(drained.c.amount).label("amount"))
+        .group_by(drained.c.rider_id)
+        .cte("totals")
+    )
+    result = await db_session.execute(
+        update(riders)
+        .where(riders.c.rider_id == totals.c.rider_id)
+        .values(rider_raise=riders.c.rider_raise + totals.c.amount)
+        .add_cte(drained)
+    )
+    await db_session.commit()
+    if result.rowcount:
+        await data_versions.advance(db_session, "riders")
+    return result.rowcount
+
+
+class RiderCounterRollup:
+    """Periodically folds rider_raise_counters into riders_info."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.riders_updated = 0
+
+    async def _run_forever(self):
+        while True:
+            await asyncio.sleep(settings.RIDER_COUNTER_ROLLUP_INTERVAL)
+            try:
+                async with AsyncSessionLocal() as db:
+                    self.riders_updated += await rollup_rider_counters(db)
+                self.runs += 1
+            except Exception as e:
+                print(f"Rider counter rollup failed: {str(e)}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+rider_counter_rollup = RiderCounterRollup()
@@ -1,6 +1,13 @@
+import base64
+import json
+from typing import List, Optional
+
 from bin.db.postgresDB import db_connection
+from bin.helpers.conditional_get import data_versions
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import Session
 from bin.models import pg_models
+from bin.services.db_services.rider_counter_service import pending_raise_subquery
 from sqlalchemy.exc import SQLAlchemyError
 from bin.response.response_model import ErrorResponseModel
 
@@ -20,6 +27,7 @@ def create_new_rider(request,img_name):
         db.add(data)
         db.commit()
         db.refresh(data)
+        data_versions.advance_sync(db, "riders")
         return data
 
     except SQLAlchemyError as e:
@@ -28,11 +36,92 @@ def create_new_rider(request,img_name):
 
 
 def all_riders():
+    """
+    *rider_raise is the rolled up column plus any counter slots not yet folded into it
+    """
     try:
-        data = db.query(
-            pg_models.RidersTable
+        pending = pending_raise_subquery()
+        rows = db.query(
+            pg_models.RidersTable,
+            func.coalesce(pending.c.pending_raise, 0)
+        ).outerjoin(
+            pending, pending.c.rider_id == pg_models.RidersTable.rider_id
         ).all()
+        db.commit()
 
-        return data
+        return [
+            {
+                "rider_id": rider.rider_id,
+                "rider_name": rider.rider_name,
+                "rider_email": rider.rider_email,
+                "mobile_no": rider.mobile_no,
+                "rider_goal": rider.rider_goal,
+                "rider_raise": (rider.rider_raise or 0) + pending_raise,
+                "rider_img": rider.rider_img,
+            }
+            for rider, pending_raise in rows
+        ]
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise ErrorResponseModel(str(e), 404)
+
+PUBLIC_RIDER_FIELDS = ("rider_id", "rider_name", "rider_goal", "rider_raise", "rider_img")
+RIDER_FIELDS = PUBLIC_RIDER_FIELDS + ("rider_email", "mobile_no")
+
+
+def encode_rider_cursor(rider_raise: float, rider_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([rider_raise, rider_id]).encode()).decode().rstrip("=")
+
+
+def decode_rider_cursor(cursor: str):
+    try:
+        rider_raise, rider_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(rider_raise), int(rider_id)
+    except (ValueError, TypeError):
+        raise ErrorResponseModel("Invalid cursor", 400)
+
+
+def list_riders(limit: int, cursor: Optional[str] = None, fields: Optional[List[str]] = None,
+                name_prefix: Optional[str] = None):
+    """
+    *One page of riders ordered by (rider_raise desc, rider_id desc), continuing after cursor.
+    rider_raise is the rolled up column, both for the order (so it can walk
+    ix_riders_info_raise_keyset) and in the response, so the cursor always matches what was
+    shown. It trails live donations by up to RIDER_COUNTER_ROLLUP_INTERVAL; the leaderboard
+    and the live feed are the up-to-date views.
+    """
+    fields = [field for field in (fields or PUBLIC_RIDER_FIELDS) if field in RIDER_FIELDS]
+    if "rider_id" not in fields:
+        fields.insert(0, "rider_id")
+
+    riders = pg_models.RidersTable.__table__
+    columns = [riders.c[field] for field in fields if field != "rider_raise"]
+    stmt = select(*columns, riders.c.rider_raise)
+
+    if name_prefix:
+        escaped = name_prefix.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = stmt.where(func.lower(riders.c.rider_name).like(f"{escaped}%", escape="\\"))
+
+    if cursor:
+        after_raise, after_id = decode_rider_cursor(cursor)
+        # both keys descend, so a row comparison is a single range scan on the index
+        stmt = stmt.where(tuple_(riders.c.rider_raise, riders.c.rider_id) < tuple_(after_raise, after_id))
+
+    stmt = stmt.order_by(riders.c.rider_raise.desc(), riders.c.rider_id.desc()).limit(limit + 1)
+
+    try:
+        rows = db.execute(stmt).all()
+        db.commit()
     except SQLAlchemyError as e:
-        raise ErrorResponseModel(str(e), 404)
\ No newline at end of file
+        db.rollback()
+        raise ErrorResponseModel(str(e), 404)
+
+    page = rows[:limit]
+    items = [{field: row._mapping[field] for field in fields} for row in page]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_rider_cursor(last.rider_raise, last.rider_id)
+
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,114 @@
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import FrozenSet, Iterable, Mapping, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from bin.config import settings
+from bin.db.postgresDB import AsyncSessionLocal
+from bin.models.pg_user_model import Role
+from bin.utils.single_flight import SingleFlight
+
+
+@dataclass(frozen=True)
+class RoleCatalogue:
+    """Immutable id <-> name view of the roles table; replaced whole on reload."""
+    names_by_id: Mapping[int, str]
+    ids_by_name: Mapping[str, int]
+    generation: int
+    loaded_at: float
+
+    def ids_for(self, names: Iterable[str]) -> FrozenSet[int]:
+        return frozenset(self.ids_by_name[name] for name in names if name in self.ids_by_name)
+
+
+class RoleCatalogueCache:
+    """
+    Roles held in memory per worker so authorization needs no DB access. Reloaded
+    after ROLE_CATALOGUE_TTL_SECONDS, or on invalidate(), which role writes committed
+    through any ORM session in this process trigger automatically.
+    """
+
+    def __init__(self):
+        self._catalogue: Optional[RoleCatalogue] = None
+        self._stale = False
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    @property
+    def generation(self) -> int:
+        return self._catalogue.generation if self._catalogue else 0
+
+    def _expired(self) -> bool:
+        return (
+            self._catalogue is None
+            or self._stale
+            or time.monotonic() - self._catalogue.loaded_at >= settings.ROLE_CATALOGUE_TTL_SECONDS
+        )
+
+    async def _load(self) -> RoleCatalogue:
+        # clear first so an invalidate() that lands while the query runs forces another reload
+        self._stale = False
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(select(Role.id, Role.name))).all()
+
+        names_by_id = {row.id: row.name for row in rows}
+        previous = self._catalogue
+        unchanged = previous is not None and dict(previous.names_by_id) == names_by_id
+        self._catalogue = RoleCatalogue(
+            names_by_id=MappingProxyType(names_by_id),
+            ids_by_name=MappingProxyType({name: role_id for role_id, name in names_by_id.items()}),
+            generation=previous.generation if unchanged else self.generation + 1,
+            loaded_at=time.monotonic(),
+        )
+        self.reloads += 1
+        return self._catalogue
+
+    async def get(self) -> RoleCatalogue:
+        if not self._expired():
+            self.hits += 1
+            return self._catalogue
+        self.misses += 1
+        return await self._flight.do("load", self._load)
+
+    async def load(self) -> RoleCatalogue:
+        """Force a reload, used at startup."""
+        return await self._flight.do("load", self._load)
+
+    def invalidate(self):
+        """Reload on next access. Other workers pick changes up when their TTL runs out."""
+        self._stale = True
+
+    def stats(self) -> dict:
+        return {
+            "generation": self.generation,
+            "age_seconds": time.monotonic() - self._catalogue.loaded_at if self._catalogue else None,
+            "roles": len(self._catalogue.names_by_id) if self._catalogue else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+        }
+
+
+role_catalogue = RoleCatalogueCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _note_role_writes(session, flush_context):
+    if any(isinstance(obj, Role) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["roles_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_role_commit(session):
+    if session.info.pop("roles_changed", False):
+        role_catalogue.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_role_writes(session):
+    session.info.pop("roles_changed", None)
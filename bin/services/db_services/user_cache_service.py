@@ -0,0 +1,105 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from bin.config import settings
+from bin.db.postgresDB import AsyncSessionLocal
+from bin.models.pg_user_model import User
+from bin.utils.single_flight import SingleFlight
+
+
+@dataclass(frozen=True)
+class UserState:
+    """The parts of a user a token is checked against."""
+    user_id: int
+    user_status: str
+    status_version: int
+
+
+class UserStateCache:
+    """
+    Bounded LRU of UserState with a short TTL, so checking a token against the
+    user's current status doesn't need a DB round trip per request. Entries are
+    dropped as soon as a status or role change for that user commits in this
+    process; other workers see it once USER_CACHE_TTL_SECONDS runs out.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def _load(self, user_id: int) -> Optional[UserState]:
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(
+                select(User.user_status, User.status_version).where(User.id == user_id)
+            )).first()
+
+        state = UserState(user_id, row.user_status, row.status_version or 0) if row else None
+        if settings.USER_CACHE_SIZE > 0:
+            self._entries[user_id] = (state, time.monotonic())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return state
+
+    async def get(self, user_id: int) -> Optional[UserState]:
+        entry = self._entries.get(user_id)
+        if entry is not None and time.monotonic() - entry[1] < settings.USER_CACHE_TTL_SECONDS:
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        return await self._flight.do(user_id, lambda: self._load(user_id))
+
+    def invalidate(self, user_ids: Iterable[int] = None):
+        """Drop the given users, or everyone when called without ids."""
+        if user_ids is None:
+            self._entries.clear()
+            return
+        for user_id in user_ids:
+            self._entries.pop(user_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": settings.USER_CACHE_SIZE,
+            "ttl_seconds": settings.USER_CACHE_TTL_SECONDS,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+user_cache = UserStateCache()
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_status_version(session, flush_context, instances):
+    # A status or role change invalidates every token issued before it
+    for obj in session.dirty:
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        if state.attrs.user_status.history.has_changes() or state.attrs.roles.history.has_changes():
+            obj.status_version = (obj.status_version or 0) + 1
+            session.info.setdefault("users_changed", set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_user_commit(session):
+    changed = session.info.pop("users_changed", None)
+    if changed:
+        user_cache.invalidate(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_user_changes(session):
+    session.info.pop("users_changed", None)
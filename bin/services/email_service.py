@@ -1,60 +1,54 @@
 from email.message import EmailMessage
-import os
-import smtplib
+from bin.config import settings
+from bin.helpers.template_renderer import template_renderer
 from bin.response.response_model import ResponseModel,ErrorResponseModel
-
-gmail_user = os.getenv("GMAIL_USER")
-gmail_pass = os.getenv("GMAIL_PASS")
-
-outlook_user = os.getenv("OUTLOOK_USER")
-outlook_pass = os.getenv("OUTLOOK_PASS")
+from bin.services.mail_pipeline import mail_pipeline
 
 
 def send_email(request):
     try:
         msg = EmailMessage()
         msg['Subject'] = request.subject
-        msg['From'] = outlook_user
-        msg['To'] = gmail_user
-
-        msg.set_content(f"""
-            New Message Submitted
+        msg['From'] = settings.CONTACT_SMTP_USER
+        msg['To'] = settings.CONTACT_INBOX
 
-            Name: {request.name}
-            E-mail: {request.email}
-            
-            message: {request.msg}
-            """)
+        msg.set_content(template_renderer.render(
+            "email/contact_message.txt",
+            name=request.name,
+            email=request.email,
+            msg=request.msg
+        ))
 
-        # Send email using Gmail
-        with smtplib.SMTP_SSL('mail.ambrumsolutions.com', 465) as smtp:
-            smtp.login(outlook_user, outlook_pass)
-            smtp.send_message(msg)
+        # Queued on the pooled contact mailbox; both messages normally go out in one session
+        sent = mail_pipeline.submit_threadsafe("contact", msg)
 
         # === Reply to Applicant ===
         confirmation = EmailMessage()
         confirmation['Subject'] = f"Your message is submitted - CCC Line"
-        confirmation['From'] = outlook_user
+        confirmation['From'] = settings.CONTACT_SMTP_USER
         confirmation['To'] = request.email
 
-        confirmation.set_content(f"""
-            Dear {request.name},
+        confirmation.set_content(template_renderer.render("email/contact_reply.txt", name=request.name))
 
-            Thank you for your message.
+        replied = mail_pipeline.submit_threadsafe("contact", confirmation)
 
-            We have forwarded your message to ccc-lines, we will contact you later for further information
+        # the futures resolve to None or the send error
+        error = sent.result(timeout=settings.CONTACT_MAIL_SEND_TIMEOUT)
 
-            Best regards,  
-            Team  
-            CCC Lines
-            """)
+    except TimeoutError:
+        return ErrorResponseModel("Timed out sending the message, please try again", 504)
+    except Exception as e:
+        return ErrorResponseModel(str(e), 400)
 
-        with smtplib.SMTP_SSL('mail.ambrumsolutions.com', 465) as smtp:
-            smtp.login(outlook_user, outlook_pass)
-            smtp.send_message(confirmation)
+    if error is not None:
+        return ErrorResponseModel(f"The message could not be sent: {error}", 502)
 
+    # The message reached the inbox, so a failed reply to the applicant is only logged
+    replied.add_done_callback(_log_reply_failure)
+    return " email sent "
 
-        return " email sent "
 
-    except Exception as e:
-        return ErrorResponseModel(str(e), 400)
\ No newline at end of file
+def _log_reply_failure(future):
+    error = future.exception() or future.result()
+    if error is not None:
+        print(f"Failed to send contact confirmation email: {str(error)}")
\ No newline at end of file
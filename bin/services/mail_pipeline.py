@@ -0,0 +1,132 @@
+import asyncio
+import concurrent.futures
+import time
+from email.message import Message
+from typing import Dict, Optional
+
+from bin.config import settings
+from bin.helpers.smtp_pool import SmtpConnectionPool, smtp_pools
+
+
+class MailPipeline:
+    """
+    Async front end for the SMTP pools. submit() queues a message and returns a
+    future straight away; MAIL_WORKERS tasks drain the queue, group up to
+    MAIL_BATCH_SIZE waiting messages per mailer and send each group over one
+    pooled session in a worker thread.
+    """
+
+    def __init__(self, pools: Dict[str, SmtpConnectionPool]):
+        self._pools = pools
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers = []
+        self._started_at = None
+
+        self.submitted = 0
+        self.rejected = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def submit(self, mailer: str, message: Message) -> asyncio.Future:
+        """Queue a message from the event loop. The future resolves to None or the send error."""
+        if mailer not in self._pools:
+            raise ValueError(f"Unknown mailer {mailer}")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((mailer, message, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        self.submitted += 1
+        return future
+
+    def submit_threadsafe(self, mailer: str, message: Message) -> concurrent.futures.Future:
+        """
+        *submit() for sync code running in a threadpool (sync routes, BackgroundTasks).
+        Without a running pipeline (scripts, CLI) the message is sent inline.
+        """
+        if not self.running:
+            result = concurrent.futures.Future()
+            result.set_result(self._pools[mailer].send_batch([message])[0])
+            return result
+
+        async def _submit():
+            return await self.submit(mailer, message)
+
+        return asyncio.run_coroutine_threadsafe(_submit(), self._loop)
+
+    async def _take_batch(self):
+        mailer, message, future = await self._queue.get()
+        batch = [(message, future)]
+        deferred = []
+        # pick up whatever else is already waiting for the same account
+        while len(batch) < settings.MAIL_BATCH_SIZE and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item[0] == mailer:
+                batch.append(item[1:])
+            else:
+                deferred.append(item)
+        for item in deferred:
+            self._queue.put_nowait(item)
+            self._queue.task_done()
+        return mailer, batch
+
+    async def _worker(self):
+        while True:
+            mailer, batch = await self._take_batch()
+            try:
+                results = await asyncio.to_thread(
+                    self._pools[mailer].send_batch,
+                    [message for message, _ in batch]
+                )
+            except Exception as e:
+                results = [e] * len(batch)
+            self.failed += sum(1 for error in results if error is not None)
+            for (_, future), error in zip(batch, results):
+                if not future.done():
+                    future.set_result(error)
+            for _ in batch:
+                self._queue.task_done()
+
+    async def start(self):
+        if self._workers:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=settings.MAIL_QUEUE_SIZE)
+        self._started_at = time.monotonic()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(settings.MAIL_WORKERS)]
+
+    async def stop(self):
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=settings.MAIL_SHUTDOWN_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"Mail pipeline stopped with {self._queue.qsize()} unsent messages")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for pool in self._pools.values():
+            await asyncio.to_thread(pool.close)
+
+    def stats(self) -> dict:
+        uptime = time.monotonic() - self._started_at if self._started_at else None
+        sent = sum(pool.sent for pool in self._pools.values())
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "sent": sent,
+            "sent_per_second": sent / uptime if uptime else None,
+            "pools": {name: pool.stats() for name, pool in self._pools.items()},
+        }
+
+
+mail_pipeline = MailPipeline(smtp_pools)
@@ -1,9 +1,9 @@
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, FrozenSet
 
 import jwt
 from jwt import PyJWTError as JWTError
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
@@ -12,24 +12,14 @@ from bin.config import settings
 from bin.db.postgresDB import db_connection
 from bin.models.pg_user_model import User
 from bin.response.user_response import UserResponse
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from bin.services.db_services.role_catalogue_service import role_catalogue
+from bin.services.db_services.user_cache_service import user_cache
+from bin.utils.password_utils import get_password_hash, verify_and_update_password, verify_password  # noqa: F401
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    """Create a hashed password."""
-    return pwd_context.hash(password)
-
-
 def create_access_token(
         data: Dict[str, Any],
         roles: list[int],
@@ -56,31 +46,68 @@ def create_access_token(
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-async def get_current_user(
-        token: str = Depends(oauth2_scheme),
-        db: Session = Depends(db_connection)
-) -> User:
-    """Get the current authenticated user from the JWT token."""
-    credentials_exception = HTTPException(
+@dataclass(frozen=True)
+class Principal:
+    """The caller as described by a verified access token; no DB access needed to build it."""
+    user_id: int
+    email: Optional[str]
+    email_verified: bool
+    role_ids: FrozenSet[int]
+    status_version: int
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> Principal:
+    """Build the Principal from the JWT claims alone."""
     try:
         payload = jwt.decode(
             token,
             settings.SECRET_KEY,
             algorithms=[settings.ALGORITHM]
         )
-        user_id: int = int(payload.get("sub"))  # Ensure user_id is an integer
-        if user_id is None:
-            raise credentials_exception
-    except (JWTError, ValueError) as e:
-        raise credentials_exception
+        if payload.get("token_type") == "refresh":
+            raise _credentials_exception()
+        return Principal(
+            user_id=int(payload.get("sub")),  # Ensure user_id is an integer
+            email=payload.get("email"),
+            email_verified=bool(payload.get("email_verified")),
+            role_ids=frozenset(payload.get("roles", [])),
+            status_version=payload.get("status_version", 0)
+        )
+    except (JWTError, TypeError, ValueError) as e:
+        raise _credentials_exception()
+
+
+async def get_current_active_principal(
+        principal: Principal = Depends(get_current_principal)
+) -> Principal:
+    """Verify the user is still active and the token predates no status or role change."""
+    user_state = await user_cache.get(principal.user_id)
+    if user_state is None or user_state.status_version != principal.status_version:
+        raise _credentials_exception()
+    if user_state.user_status != "active":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+    return principal
+
 
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_current_user(
+        principal: Principal = Depends(get_current_active_principal),
+        db: Session = Depends(db_connection)
+) -> User:
+    """Load the full User row, for handlers that need more than the Principal."""
+    user = db.query(User).filter(User.id == principal.user_id).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
     return user
 
@@ -99,16 +126,16 @@ async def get_current_active_user(
 
 async def check_user_role(
         required_roles: list[str],
-        current_user: User = Depends(get_current_active_user)
-) -> User:
+        principal: Principal = Depends(get_current_active_principal)
+) -> Principal:
     """Check if user has any of the required roles."""
-    user_roles = [role.name for role in current_user.roles]
-    if not any(role in user_roles for role in required_roles):
+    catalogue = await role_catalogue.get()
+    if catalogue.ids_for(required_roles).isdisjoint(principal.role_ids):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Insufficient permissions"
         )
-    return current_user
+    return principal
 
 
 def verify_token(token):
@@ -131,11 +158,11 @@ def verify_token(token):
 
 
 # Role-specific dependency shortcuts
-async def get_admin_user(current_user: User = Depends(get_current_active_user)):
+async def get_admin_user(principal: Principal = Depends(get_current_active_principal)):
     """Verify user has admin role."""
-    return await check_user_role(["admin"], current_user)
+    return await check_user_role(["admin"], principal)
 
 
-async def get_moderator_user(current_user: User = Depends(get_current_active_user)):
+async def get_moderator_user(principal: Principal = Depends(get_current_active_principal)):
     """Verify user has moderator or admin role."""
-    return await check_user_role(["moderator", "admin"], current_user)
\ No newline at end of file
+    return await check_user_role(["moderator", "admin"], principal)
\ No newline at end of file
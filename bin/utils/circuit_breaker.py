@@ -0,0 +1,128 @@
+import time
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. After `failure_threshold` failures in a row the
+    circuit opens and calls are rejected for `reset_timeout` seconds; then up to
+    `half_open_max_calls` probe calls are let through and the first result decides
+    whether the circuit closes again or re-opens.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+        self.trips = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Reserve a call slot. Every allowed call must be followed by record_success/record_failure."""
+        state = self.state
+        if state == self.HALF_OPEN:
+            if self._state == self.OPEN:
+                self._state = self.HALF_OPEN
+                self._half_open_calls = 0
+            if self._half_open_calls >= self.half_open_max_calls:
+                self.rejected += 1
+                return False
+            self._half_open_calls += 1
+            return True
+
+        if state == self.OPEN:
+            self.rejected += 1
+            return False
+
+        return True
+
+    def record_success(self):
+        self.successes += 1
+        self._consecutive_failures = 0
+        if self._state == self.HALF_OPEN:
+            self._state = self.CLOSED
+            self._half_open_calls = 0
+
+    def record_failure(self):
+        self.failures += 1
+        self._consecutive_failures += 1
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            self._trip()
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._half_open_calls = 0
+        self.trips += 1
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "trips": self.trips,
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of overall traffic: every request deposits `ratio` tokens,
+    every retry spends one, and `min_per_second` tokens trickle in so low traffic can
+    still retry. Keeps retries from multiplying load while the gateway is degraded.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float, max_tokens: float):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+
+        self.retries = 0
+        self.exhausted = 0
+
+    def _refill(self, amount: float = 0.0):
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + amount + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def record_request(self):
+        self._refill(self.ratio)
+
+    def try_spend(self) -> bool:
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            self.retries += 1
+            return True
+        self.exhausted += 1
+        return False
+
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            "available": round(self._tokens, 2),
+            "retries": self.retries,
+            "exhausted": self.exhausted,
+        }
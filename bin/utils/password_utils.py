@@ -0,0 +1,31 @@
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from bin.config import settings
+
+# Kept free of DB/model imports: the bcrypt process pool workers import only this module.
+# Password hashing. bcrypt only flags hashes whose cost falls outside min/max rounds, so
+# pinning both to BCRYPT_ROUNDS makes verify_and_update rehash anything made at another cost.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash."""
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; on success also return a new hash if the stored one is outdated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    """Create a hashed password."""
+    return pwd_context.hash(password)
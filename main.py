@@ -1,17 +1,80 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 from starlette.staticfiles import StaticFiles
 
+from bin.db.migrations import init_schema
+from bin.db.postgresDB import AsyncSessionLocal, engine
+from bin.helpers.conditional_get import data_versions
+from bin.helpers.http_client_registry import http_client_registry
+from bin.helpers.password_hasher import password_hasher
+from bin.helpers.template_renderer import template_renderer
 from bin.routers import donation_router,rider_router,information_router
+from bin.routers.analytics_router import analytics_router
 from bin.routers.auth_router import auth_router
+from bin.routers.export_router import export_router
+from bin.routers.metrics_router import metrics_router
 from bin.routers.role_router import role_router
+from bin.services.db_services.analytics_service import analytics_rollup
+from bin.services.db_services.api_log_retention import api_log_retention
+from bin.services.db_services.api_log_service import api_log_sink
+from bin.services.db_services.donation_totals_service import donation_totals
+from bin.services.db_services.email_outbox_service import email_outbox_worker
+from bin.services.db_services.leaderboard_service import rider_leaderboard
+from bin.services.db_services.live_feed_service import live_feed
+from bin.services.db_services.reference_data_service import reference_data
+from bin.services.db_services.role_catalogue_service import role_catalogue
+from bin.services.db_services.reconciliation_service import reconciliation_worker
+from bin.services.db_services.rider_counter_service import rider_counter_rollup
+from bin.services.mail_pipeline import mail_pipeline
 
 load_dotenv(override=True)
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(init_schema, engine)
+    template_renderer.load()
+    await http_client_registry.startup()
+    await api_log_sink.start()
+    await mail_pipeline.start()
+    password_hasher.start()
+    async with AsyncSessionLocal() as db:
+        await reference_data.load(db)
+        await donation_totals.ensure_backfilled(db)
+    await rider_leaderboard.load()
+    await role_catalogue.load()
+    data_versions.start()
+    api_log_retention.start()
+    reconciliation_worker.start()
+    rider_counter_rollup.start()
+    analytics_rollup.start()
+    live_feed.on_rider_deltas(rider_leaderboard.on_live_event)
+    live_feed.start()
+    rider_leaderboard.start()
+    email_outbox_worker.start()
+    yield
+    await email_outbox_worker.stop()
+    await rider_leaderboard.stop()
+    await live_feed.stop()
+    await analytics_rollup.stop()
+    await rider_counter_rollup.stop()
+    await reconciliation_worker.stop()
+    await api_log_retention.stop()
+    await data_versions.stop()
+    await http_client_registry.shutdown()
+    await password_hasher.stop()
+    await mail_pipeline.stop()
+    await api_log_sink.stop()
+
+
 app = FastAPI(
     title="CCC-Line",
+    lifespan=lifespan,
     contact={
         "name": "chamindika Kodithuwakku",
         "email": "chamindika.k@ambrumsolutions.com",
@@ -34,6 +97,9 @@ app.include_router(rider_router.router)
 app.include_router(information_router.router)
 app.include_router(role_router)
 app.include_router(auth_router)
+app.include_router(metrics_router)
+app.include_router(export_router)
+app.include_router(analytics_router)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8003, workers=1, reload=False)
@@ -0,0 +1,122 @@
+"""
+Protected-endpoint overhead of the Auth dependency: the cached role catalogue
+against the previous per-request path, which checked out a sync session and read
+the whole roles table on every call. Three routes on one in-process app (an
+unprotected baseline, Auth as it is now, and the old lookup) are driven through
+httpx's ASGI transport, and the benchmark reports requests/sec, p50/p99 and SQL
+statements per request for each.
+
+Runs against PG_URL / PG_ASYNC_URL with the app schema and an "Admin" role:
+
+    python scripts/bench_auth.py [--requests 5000] [--concurrency 32]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+import jwt  # noqa: E402
+from fastapi import Depends, FastAPI, HTTPException, Request  # noqa: E402
+from fastapi.security import HTTPBearer  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from bin.config import settings  # noqa: E402
+from bin.db.postgresDB import async_engine, engine  # noqa: E402
+from bin.helpers.auth_helper import Auth, Roles  # noqa: E402
+from bin.services.db_services.role_catalogue_service import role_catalogue  # noqa: E402
+from bin.services.db_services.role_service import RoleService  # noqa: E402
+
+
+class PerRequestAuth(HTTPBearer):
+    """Auth before the role catalogue: role names resolved from the roles table on every call."""
+
+    def __init__(self, required_roles):
+        self.required_roles = [role.value for role in required_roles]
+        super().__init__(auto_error=False)
+
+    async def __call__(self, request: Request, role_service: RoleService = Depends(RoleService)):
+        credentials = await super().__call__(request)
+        payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        role_id_to_name = {role.id: role.name for role in role_service.get_all_roles()}
+        user_role_names = [role_id_to_name[role_id] for role_id in payload.get("roles", [])
+                           if role_id in role_id_to_name]
+        if not any(role in user_role_names for role in self.required_roles):
+            raise HTTPException(status_code=403)
+        return payload
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/open")
+    async def open_route():
+        return {"ok": True}
+
+    @app.get("/cached", dependencies=[Depends(Auth([Roles.ADMIN]))])
+    async def cached_route():
+        return {"ok": True}
+
+    @app.get("/per-request", dependencies=[Depends(PerRequestAuth([Roles.ADMIN]))])
+    async def per_request_route():
+        return {"ok": True}
+
+    return app
+
+
+async def drive(client, path: str, token: str, requests: int, concurrency: int, statements: list):
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get(path, headers={"Authorization": f"Bearer {token}"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    statements[0] = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return (requests / elapsed, latencies[len(latencies) // 2] * 1000,
+            latencies[int(len(latencies) * 0.99)] * 1000, statements[0] / requests)
+
+
+async def main(args):
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", count)
+
+    catalogue = await role_catalogue.load()
+    admin_id = catalogue.ids_by_name.get(Roles.ADMIN.value)
+    if admin_id is None:
+        sys.exit(f"No {Roles.ADMIN.value} role in the roles table")
+    token = jwt.encode({"sub": "bench", "roles": [admin_id]}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+    transport = httpx.ASGITransport(app=build_app())
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            print(f"{args.requests} requests, concurrency {args.concurrency}")
+            print(f"{'route':<14} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'SQL/request':>12}")
+            for path in ("/open", "/cached", "/per-request"):
+                await drive(client, path, token, min(args.requests, 200), args.concurrency, statements)
+                rps, p50, p99, sql = await drive(client, path, token, args.requests, args.concurrency, statements)
+                print(f"{path:<14} {rps:>8.0f} {p50:>8.2f} {p99:>8.2f} {sql:>12.2f}")
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Auth dependency overhead, cached catalogue vs per-request lookup")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    asyncio.run(main(parser.parse_args()))
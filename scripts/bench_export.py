@@ -0,0 +1,112 @@
+"""
+Donation export benchmark: peak RSS and rows/sec of the streaming export
+(export_donations: server side cursor, chunked writes) against building the whole
+file in memory from fetchall(), the way a non-streaming export would. Each run happens
+in a fresh process so ru_maxrss is its own high-water mark.
+
+Runs against PG_URL. --seed inserts that many synthetic donations first (marked with
+the message "export-bench") and removes them afterwards:
+
+    python scripts/bench_export.py --seed 1000000 [--format csv] [--gzip]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SEED_MARKER = "export-bench"
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _streaming(export_format: str, compress: bool) -> int:
+    from bin.services.db_services.export_service import export_donations
+    size = 0
+    for chunk in export_donations(export_format, compress=compress):
+        size += len(chunk)
+    return size
+
+
+def _buffered(export_format: str, compress: bool) -> int:
+    import gzip
+    from bin.db.postgresDB import engine
+    from bin.services.db_services import export_service
+
+    with engine.connect() as conn:
+        rows = [tuple(row) for row in conn.execute(export_service._donation_export_query(None, None, None)).all()]
+    to_lines = export_service._csv_lines if export_format == "csv" else export_service._ndjson_lines
+    body = "".join(to_lines(iter(rows))).encode()
+    return len(gzip.compress(body) if compress else body)
+
+
+def _run(strategy: str, export_format: str, compress: bool, results):
+    from bin.db.postgresDB import engine
+    with engine.connect():
+        pass
+    baseline = _rss_mb()
+    started = time.perf_counter()
+    size = (_streaming if strategy == "streaming" else _buffered)(export_format, compress)
+    results.put((strategy, time.perf_counter() - started, _rss_mb(), _rss_mb() - baseline, size))
+
+
+def _count_rows() -> int:
+    from sqlalchemy import func, select
+    from bin.db.postgresDB import engine
+    from bin.models import pg_models
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(pg_models.DonationTable)).scalar()
+
+
+def _seed(rows: int):
+    from sqlalchemy import text
+    from bin.db.postgresDB import engine
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO donation (first_name, second_name, email, mobile_no, message, currency_id, amount, "
+            "donation_id, created_at, payment_done_at) "
+            "SELECT 'Bench', 'Donor ' || n, 'bench' || n || '@example.com', '0700000000', :marker, 1, "
+            "(n % 500) + 1, 1, now() - (n || ' seconds')::interval, now() "
+            "FROM generate_series(1, :rows) AS n"
+        ), {"marker": SEED_MARKER, "rows": rows})
+
+
+def _unseed():
+    from sqlalchemy import text
+    from bin.db.postgresDB import engine
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM donation WHERE message = :marker"), {"marker": SEED_MARKER})
+
+
+def main(args):
+    if args.seed:
+        _seed(args.seed)
+    try:
+        rows = _count_rows()
+        context = multiprocessing.get_context("spawn")
+        print(f"{rows} donations, {args.format}{' gzip' if args.gzip else ''}")
+        print(f"{'strategy':<10} {'seconds':>8} {'rows/s':>10} {'peak RSS MB':>12} {'growth MB':>10} {'bytes':>12}")
+        for strategy in ("streaming", "buffered"):
+            results = context.Queue()
+            process = context.Process(target=_run, args=(strategy, args.format, args.gzip, results))
+            process.start()
+            name, seconds, peak, growth, size = results.get()
+            process.join()
+            print(f"{name:<10} {seconds:>8.2f} {rows / seconds:>10.0f} {peak:>12.1f} {growth:>10.1f} {size:>12}")
+    finally:
+        if args.seed:
+            _unseed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="streaming vs buffered donation export")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic donations to insert first")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--gzip", action="store_true")
+    main(parser.parse_args())
@@ -0,0 +1,67 @@
+"""
+Leaderboard microbenchmark at 10k and 100k riders: the SortedList index
+(RiderLeaderboard.top/rank/apply_deltas) against re-sorting every rider per request,
+which is what serving the ranking from riders_info costs without the index.
+
+    python scripts/bench_leaderboard.py [--sizes 10000 100000] [--repeat 200]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bin.services.db_services.leaderboard_service import RiderLeaderboard  # noqa: E402
+
+
+def build(size: int) -> RiderLeaderboard:
+    leaderboard = RiderLeaderboard()
+    for rider_id in range(1, size + 1):
+        leaderboard._riders[rider_id] = {"rider_name": f"rider {rider_id}", "rider_goal": 1000, "rider_img": None}
+        leaderboard._set(rider_id, float(random.randint(0, 100_000)))
+    return leaderboard
+
+
+def per_call_us(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=repeat, repeat=3)) / repeat * 1e6
+
+
+def main(sizes, repeat: int):
+    print(f"{'riders':>8} {'operation':<22} {'resort (us)':>12} {'index (us)':>11} {'speedup':>8}")
+    for size in sizes:
+        leaderboard = build(size)
+        raises = dict(leaderboard._raise)
+        rider_ids = list(raises)
+
+        def resort_top():
+            return sorted(raises.items(), key=lambda item: (-item[1], item[0]))[:10]
+
+        def resort_rank():
+            rider_id = random.choice(rider_ids)
+            return sum(1 for other in raises.values() if other > raises[rider_id]) + 1
+
+        def resort_delta():
+            rider_id = random.choice(rider_ids)
+            raises[rider_id] += 10
+            return sorted(raises.items(), key=lambda item: (-item[1], item[0]))[:10]
+
+        cases = [
+            ("top(10)", resort_top, lambda: leaderboard.top(10)),
+            ("rank(rider)", resort_rank, lambda: leaderboard.rank(random.choice(rider_ids))),
+            ("delta + top(10)", resort_delta,
+             lambda: (leaderboard.apply_deltas({random.choice(rider_ids): 10}), leaderboard.top(10))),
+        ]
+        for name, before, after in cases:
+            before_us = per_call_us(before, max(repeat // 20, 3))
+            after_us = per_call_us(after, repeat)
+            print(f"{size:>8} {name:<22} {before_us:>12.1f} {after_us:>11.1f} {before_us / after_us:>7.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RiderLeaderboard microbenchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.sizes, args.repeat)
@@ -0,0 +1,113 @@
+"""
+Concurrency benchmark for rider fundraising totals: N simultaneous confirmed
+donations to one rider, credited either with a single-row
+`UPDATE riders_info SET rider_raise = rider_raise + x` or through the sharded
+rider_raise_counters slots (add_rider_raises), each in its own transaction.
+--hold-ms keeps every transaction open a little longer after the write, standing in
+for the rest of finalize_transactions; that is where the single row lock queues.
+
+Runs against PG_ASYNC_URL, so use a disposable database with the app schema:
+
+    python scripts/bench_rider_counters.py [--donations 500] [--hold-ms 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, select, update  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from bin.config import settings  # noqa: E402
+from bin.models import pg_models  # noqa: E402
+from bin.services.db_services.rider_counter_service import add_rider_raises, rollup_rider_counters  # noqa: E402
+
+RIDER_ID = 987654
+AMOUNT = 10.0
+
+
+async def single_row(db, hold: float):
+    await db.execute(
+        update(pg_models.RidersTable)
+        .where(pg_models.RidersTable.rider_id == RIDER_ID)
+        .values(rider_raise=pg_models.RidersTable.rider_raise + AMOUNT)
+    )
+    await asyncio.sleep(hold)
+
+
+async def sharded(db, hold: float):
+    await add_rider_raises({RIDER_ID: AMOUNT}, db)
+    await asyncio.sleep(hold)
+
+
+async def reset(sessions, recreate: bool = True):
+    async with sessions() as db:
+        await db.execute(delete(pg_models.RiderRaiseCounter).where(pg_models.RiderRaiseCounter.rider_id == RIDER_ID))
+        await db.execute(delete(pg_models.RidersTable).where(pg_models.RidersTable.rider_id == RIDER_ID))
+        if recreate:
+            db.add(pg_models.RidersTable(rider_id=RIDER_ID, rider_name="bench rider", rider_goal=0, rider_raise=0))
+        await db.commit()
+
+
+async def total(sessions) -> float:
+    async with sessions() as db:
+        await rollup_rider_counters(db)
+        return (await db.execute(
+            select(pg_models.RidersTable.rider_raise).where(pg_models.RidersTable.rider_id == RIDER_ID)
+        )).scalar_one()
+
+
+async def run(name: str, credit, sessions, donations: int, hold: float):
+    await reset(sessions)
+    start = asyncio.Event()
+    latencies = []
+
+    async def donation():
+        await start.wait()
+        started = time.perf_counter()
+        async with sessions() as db:
+            await credit(db, hold)
+            await db.commit()
+        latencies.append(time.perf_counter() - started)
+
+    tasks = [asyncio.create_task(donation()) for _ in range(donations)]
+    await asyncio.sleep(0.1)
+    started = time.perf_counter()
+    start.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    credited = await total(sessions)
+    latencies.sort()
+    print(f"{name:<12} {elapsed:>8.2f} {donations / elapsed:>9.0f} "
+          f"{latencies[len(latencies) // 2] * 1000:>8.1f} {latencies[int(len(latencies) * 0.99)] * 1000:>8.1f} "
+          f"{'ok' if credited == donations * AMOUNT else f'MISMATCH {credited}'}")
+
+
+async def main(args):
+    # the app's own pool size, so donations queue for connections the way they would in a worker
+    engine = create_async_engine(
+        str(settings.PG_ASYNC_URL), pool_size=args.connections, max_overflow=0, pool_timeout=300
+    )
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+    try:
+        print(f"{args.donations} donations to one rider over {args.connections} connections, "
+              f"{settings.RIDER_COUNTER_SLOTS} slots, hold {args.hold_ms} ms")
+        print(f"{'strategy':<12} {'wall (s)':>8} {'tx/s':>9} {'p50 ms':>8} {'p99 ms':>8} total")
+        await run("single row", single_row, sessions, args.donations, args.hold_ms / 1000)
+        await run("sharded", sharded, sessions, args.donations, args.hold_ms / 1000)
+        await reset(sessions, recreate=False)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="single-row vs sharded rider counter contention")
+    parser.add_argument("--donations", type=int, default=500)
+    parser.add_argument("--hold-ms", type=float, default=5)
+    parser.add_argument("--connections", type=int,
+                        default=settings.DB_ASYNC_POOL_SIZE + settings.DB_ASYNC_MAX_OVERFLOW)
+    asyncio.run(main(parser.parse_args()))
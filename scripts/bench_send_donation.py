@@ -0,0 +1,97 @@
+"""
+Load benchmark for POST /ccc-line/send-donation: requests/sec and p50/p95/p99 latency
+at a fixed number of concurrent clients. Run it once against a server on the old sync
+database path and once against the async one (or pass both with --compare-url).
+Every request creates a donation and a gateway session, so point the server at the
+MPGS test merchant or a stub and at a disposable database.
+
+    python scripts/bench_send_donation.py --base-url http://127.0.0.1:8003 \
+        --concurrency 64 --seconds 30 [--compare-url http://127.0.0.1:8004]
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+
+
+def _summary(latencies, statuses, seconds):
+    ordered = sorted(latencies)
+
+    def percentile(fraction):
+        return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000, 1) if ordered else None
+
+    return {
+        "requests": len(ordered),
+        "rps": round(len(ordered) / seconds, 1),
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "statuses": statuses,
+    }
+
+
+def _donation(args, n: int) -> dict:
+    return {
+        "first_name": "Load",
+        "second_name": f"Test {n}",
+        "email": f"loadtest+{n}@example.com",
+        "phone_number": "0700000000",
+        "currency_id": args.currency_id,
+        "amount": 10,
+        "donation_id": args.donation_type_id,
+        "rider_id": args.rider_id,
+        "message": "benchmark",
+    }
+
+
+async def run(base_url: str, args) -> dict:
+    latencies = []
+    statuses = {}
+    counter = iter(range(sys.maxsize))
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        async def user(stop_at: float, record: bool):
+            while time.perf_counter() < stop_at:
+                started = time.perf_counter()
+                response = await client.post("/ccc-line/send-donation", json=_donation(args, next(counter)))
+                if record:
+                    latencies.append(time.perf_counter() - started)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        warmup_until = time.perf_counter() + args.warmup_seconds
+        await asyncio.gather(*(user(warmup_until, False) for _ in range(args.concurrency)))
+        started = time.perf_counter()
+        await asyncio.gather(*(user(started + args.seconds, True) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return _summary(latencies, statuses, elapsed)
+
+
+async def main(args) -> int:
+    results = {args.base_url: await run(args.base_url, args)}
+    if args.compare_url:
+        results[args.compare_url] = await run(args.compare_url, args)
+
+    for url, summary in results.items():
+        print(f"{url}: {summary}")
+    if args.compare_url:
+        before, after = results[args.base_url], results[args.compare_url]
+        print(f"rps x{after['rps'] / max(before['rps'], 0.1):.2f}, "
+              f"p99 {before['p99_ms']} -> {after['p99_ms']} ms")
+    return 0 if all(set(summary["statuses"]) <= {200} for summary in results.values()) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/send-donation throughput and tail latency")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8003")
+    parser.add_argument("--compare-url", help="second server to run the same load against, e.g. the new build")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--warmup-seconds", type=float, default=5)
+    parser.add_argument("--currency-id", type=int, default=1)
+    parser.add_argument("--donation-type-id", type=int, default=1)
+    parser.add_argument("--rider-id", type=int, default=1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
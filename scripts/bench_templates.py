@@ -0,0 +1,87 @@
+"""
+Email rendering microbenchmark: the donation confirmation built from the old inline
+f-string against the shared Jinja2 template (MailTemplate.build, one message at a
+time and build_batch for a bulk send), plus the worker start-up cost of load()
+from template sources against a TEMPLATE_PRECOMPILED_DIR built by
+`python -m bin.helpers.template_renderer compile`.
+
+    python scripts/bench_templates.py [--batch 500] [--repeat 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bin.config import settings  # noqa: E402
+from bin.helpers.template_renderer import TemplateRenderer, template_renderer  # noqa: E402
+from bin.services.db_services.email_service import MAIL_TEMPLATES  # noqa: E402
+
+CONTEXT = {"first_name": "Ada", "second_name": "Lovelace", "amount": 250.0, "currency_code": "LKR"}
+
+
+def fstring_mail(email: str, first_name: str, second_name: str, amount: float, currency_code: str):
+    # the builder the template replaced
+    msg = MIMEMultipart()
+    msg['From'] = settings.SMTP_SENDER_MAIL
+    msg['To'] = email
+    msg['Subject'] = "Thank you for your donation!"
+    body = f"""
+           <html>
+               <body>
+                   <h2>Thank you for your generous donation!</h2>
+                   <p>Dear {first_name} {second_name},</p>
+                   <p>We have successfully received your donation of {amount} {currency_code}.</p>
+                   <p>Your support means the world to us.</p>
+                   <p>With gratitude,<br/>CCC Foundation Team</p>
+               </body>
+           </html>
+           """
+    msg.attach(MIMEText(body, 'html'))
+    return msg.as_bytes()
+
+
+def per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6
+
+
+def startup_ms(precompiled_dir) -> float:
+    original = settings.TEMPLATE_PRECOMPILED_DIR
+    settings.TEMPLATE_PRECOMPILED_DIR = precompiled_dir
+    try:
+        return per_call_us(lambda: TemplateRenderer().load(), 20) / 1000
+    finally:
+        settings.TEMPLATE_PRECOMPILED_DIR = original
+
+
+def main(batch: int, repeat: int):
+    template_renderer.load()
+    template = MAIL_TEMPLATES["donation_confirmation"]
+    items = [(f"donor{i}@example.com", CONTEXT) for i in range(batch)]
+
+    fstring_us = per_call_us(lambda: fstring_mail("donor@example.com", **CONTEXT), repeat)
+    template_us = per_call_us(lambda: template.build("donor@example.com", CONTEXT).as_bytes(), repeat)
+    batch_us = per_call_us(lambda: [msg.as_bytes() for msg in template.build_batch(items)], max(repeat // batch, 3)) / batch
+
+    print(f"{'donation confirmation':<28} {'us/message':>11}")
+    print(f"{'f-string + MIMEMultipart':<28} {fstring_us:>11.1f}")
+    print(f"{'MailTemplate.build':<28} {template_us:>11.1f}")
+    print(f"{f'MailTemplate.build_batch({batch})':<28} {batch_us:>11.1f}")
+
+    with tempfile.TemporaryDirectory() as precompiled_dir:
+        template_renderer.compile(precompiled_dir)
+        print(f"\n{'worker start-up load()':<28} {'ms':>11}")
+        print(f"{'from sources':<28} {startup_ms(None):>11.2f}")
+        print(f"{'from precompiled modules':<28} {startup_ms(precompiled_dir):>11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="email template rendering microbenchmark")
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.batch, args.repeat)
@@ -0,0 +1,89 @@
+"""
+Load test for the bcrypt process pool: measures a non-auth sync endpoint before and
+during a login storm and fails when its p95 latency degrades past --max-slowdown.
+
+    python scripts/login_storm.py --base-url http://127.0.0.1:8003 \
+        --email loadtest@example.com --password secret --logins 500 --concurrency 64
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+
+def _summary(latencies):
+    ordered = sorted(latencies)
+    return {
+        "n": len(ordered),
+        "p50_ms": round(statistics.median(ordered) * 1000, 1),
+        "p95_ms": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+async def _probe(client, path, stop: asyncio.Event, interval: float, latencies: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+async def _login_storm(client, args, statuses: dict):
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def login():
+        async with semaphore:
+            response = await client.post("/ccc-line/login", json={"email": args.email, "password": args.password})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(login() for _ in range(args.logins)))
+
+
+async def main(args) -> int:
+    limits = httpx.Limits(max_connections=args.concurrency + 8)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        baseline = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(client, args.probe_path, stop, args.probe_interval, baseline))
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        await probe
+
+        during = []
+        statuses = {}
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(client, args.probe_path, stop, args.probe_interval, during))
+        started = time.perf_counter()
+        await _login_storm(client, args, statuses)
+        storm_seconds = time.perf_counter() - started
+        stop.set()
+        await probe
+
+    baseline_stats, during_stats = _summary(baseline), _summary(during)
+    print(f"probe {args.probe_path}")
+    print(f"  baseline:     {baseline_stats}")
+    print(f"  during storm: {during_stats}")
+    print(f"logins: {args.logins} in {storm_seconds:.1f}s ({args.logins / storm_seconds:.1f}/s), statuses {statuses}")
+
+    slowdown = during_stats["p95_ms"] / max(baseline_stats["p95_ms"], 0.1)
+    print(f"p95 slowdown x{slowdown:.2f} (allowed x{args.max_slowdown})")
+    return 0 if slowdown <= args.max_slowdown else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="non-auth latency during a login storm")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8003")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--probe-path", default="/ccc-line/get-riders-list?limit=50")
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    parser.add_argument("--baseline-seconds", type=float, default=10)
+    parser.add_argument("--max-slowdown", type=float, default=1.5)
+    sys.exit(asyncio.run(main(parser.parse_args())))
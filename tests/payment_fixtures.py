@@ -0,0 +1,59 @@
+"""One donation to a rider with one gateway transaction, and what paying it changed (Postgres tests)."""
+from sqlalchemy import delete, func, select
+
+from bin.db.postgresDB import AsyncSessionLocal
+from bin.enums.transaction_status import TransactionStatus
+from bin.models import pg_models
+
+RIDER_ID = 9001
+AMOUNT = 250.0
+CURRENCY = "USD"
+ORDER_ID = "race-order"
+RESULT_INDICATOR = "race-indicator"
+
+# payment_effects() once the donation has been paid exactly once
+PAID_ONCE = {
+    "status": TransactionStatus.COMPLETED.value,
+    "paid": 1,
+    "rider_pending": AMOUNT,
+    "donation_count": 1,
+    "emails": 1,
+}
+
+
+async def seed_payment(status: TransactionStatus) -> int:
+    async with AsyncSessionLocal() as db:
+        for table in (pg_models.Transaction, pg_models.RiderDonation, pg_models.DonationTable,
+                      pg_models.RidersTable, pg_models.RiderRaiseCounter, pg_models.DonationTotal,
+                      pg_models.EmailOutbox, pg_models.GatewayNotification):
+            await db.execute(delete(table))
+        db.add(pg_models.RidersTable(rider_id=RIDER_ID, rider_name="Race", rider_goal=1000, rider_raise=0))
+        donation = pg_models.DonationTable(first_name="Ada", second_name="L", email="ada@example.com",
+                                           currency_id=1, amount=AMOUNT, donation_id=1)
+        db.add(donation)
+        await db.flush()
+        db.add(pg_models.RiderDonation(rider_id=RIDER_ID, donation_id=donation.record_id))
+        transaction = pg_models.Transaction(donation_id=donation.record_id, mpgs_order_id=ORDER_ID,
+                                            success_indicator=RESULT_INDICATOR, status=status.value,
+                                            amount=AMOUNT, currency=CURRENCY)
+        db.add(transaction)
+        await db.commit()
+        return transaction.id
+
+
+async def payment_effects() -> dict:
+    async with AsyncSessionLocal() as db:
+        return {
+            "status": (await db.execute(select(pg_models.Transaction.status))).scalar_one(),
+            "paid": (await db.execute(
+                select(func.count()).where(pg_models.DonationTable.payment_done_at.is_not(None))
+            )).scalar_one(),
+            "rider_pending": (await db.execute(
+                select(func.coalesce(func.sum(pg_models.RiderRaiseCounter.amount), 0))
+                .where(pg_models.RiderRaiseCounter.rider_id == RIDER_ID)
+            )).scalar_one(),
+            "donation_count": (await db.execute(
+                select(func.coalesce(func.sum(pg_models.DonationTotal.donation_count), 0))
+            )).scalar_one(),
+            "emails": (await db.execute(select(func.count()).select_from(pg_models.EmailOutbox))).scalar_one(),
+        }
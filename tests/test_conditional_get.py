@@ -0,0 +1,65 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from bin.db.postgresDB import async_engine, engine
+from bin.helpers.conditional_get import _etag, data_versions
+from main import app
+
+
+@pytest.fixture
+def statements():
+    """Every SQL statement executed on either engine while the test runs."""
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    targets = (engine, async_engine.sync_engine)
+    for target in targets:
+        event.listen(target, "before_cursor_execute", count)
+    yield executed
+    for target in targets:
+        event.remove(target, "before_cursor_execute", count)
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    monkeypatch.setattr(data_versions, "_versions", {"riders": 7, "donation_totals": 42})
+    monkeypatch.setattr(data_versions, "_refreshed_at", time.monotonic())
+
+
+def _expected_etag(path: str, query: str, version: str) -> str:
+    return _etag(version, SimpleNamespace(url=SimpleNamespace(path=path, query=query)))
+
+
+@pytest.mark.parametrize("path, query, version", [
+    ("/ccc-line/get-riders-list", "limit=50", "riders:7"),
+    ("/ccc-line/get-total-general-donations", "", "donation_totals:42"),
+])
+def test_revalidation_is_answered_without_database(statements, versions, path, query, version):
+    etag = _expected_etag(path, query, version)
+    client = TestClient(app)
+
+    response = client.get(f"{path}?{query}" if query else path, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert statements == []
+
+
+def test_token_depends_only_on_shared_version(versions, monkeypatch):
+    before = data_versions.token("riders")
+    # no wall clock or per-process component: an hour later, or on another worker, it is the same
+    monkeypatch.setattr(time, "time", lambda: 10 ** 10)
+
+    assert data_versions.token("riders") == before == "riders:7"
+
+
+def test_no_token_once_versions_are_stale(versions, monkeypatch):
+    monkeypatch.setattr(data_versions, "_refreshed_at", time.monotonic() - 3600)
+
+    assert data_versions.token("riders") is None
@@ -0,0 +1,44 @@
+import concurrent.futures
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from bin.services import email_service
+from bin.services.email_service import send_email
+
+REQUEST = SimpleNamespace(subject="Hello", name="Ada", email="ada@example.com", msg="Count me in")
+
+
+def _submit_with(monkeypatch, *results):
+    outcomes = iter(results)
+
+    def submit_threadsafe(mailer, message):
+        future = concurrent.futures.Future()
+        future.set_result(next(outcomes))
+        return future
+
+    monkeypatch.setattr(email_service.mail_pipeline, "submit_threadsafe", submit_threadsafe)
+
+
+def test_reports_success_once_the_message_is_sent(monkeypatch):
+    _submit_with(monkeypatch, None, None)
+
+    assert send_email(REQUEST) == " email sent "
+
+
+def test_send_failure_is_returned_to_the_caller(monkeypatch):
+    _submit_with(monkeypatch, ConnectionRefusedError("smtp down"), None)
+
+    with pytest.raises(HTTPException) as error:
+        send_email(REQUEST)
+
+    assert error.value.status_code == 502
+    assert "smtp down" in error.value.detail
+
+
+def test_failed_reply_to_applicant_is_logged_only(monkeypatch, capsys):
+    _submit_with(monkeypatch, None, ConnectionRefusedError("smtp down"))
+
+    assert send_email(REQUEST) == " email sent "
+    assert "contact confirmation email" in capsys.readouterr().out
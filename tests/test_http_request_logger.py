@@ -0,0 +1,41 @@
+import asyncio
+
+import httpx
+
+from bin.helpers import http_request_logger
+from bin.helpers.http_request_logger import HttpRequestLogger
+
+
+class _Sink:
+    running = True
+
+    def __init__(self):
+        self.records = []
+
+    def submit(self, record):
+        self.records.append(record)
+
+
+def _post(monkeypatch, response: httpx.Response):
+    sink = _Sink()
+    monkeypatch.setattr(http_request_logger, "api_log_sink", sink)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: response))
+    logger = HttpRequestLogger(base_url="https://gateway.test", client=client)
+    logged = asyncio.run(logger.set_api("/session").set_payload({"a": 1}).post())
+    return logged, sink.records
+
+
+def test_json_response_body_is_logged(monkeypatch):
+    response, records = _post(monkeypatch, httpx.Response(200, json={"result": "SUCCESS"}))
+
+    assert response.status_code == 200
+    assert records[0]["response_body"] == {"result": "SUCCESS"}
+    assert records[0]["error"] is None
+
+
+def test_non_json_response_is_returned_and_logged_as_text(monkeypatch):
+    response, records = _post(monkeypatch, httpx.Response(502, text="<html>Bad Gateway</html>"))
+
+    assert response.status_code == 502
+    assert len(records) == 1
+    assert records[0]["response_body"] == "<html>Bad Gateway</html>"
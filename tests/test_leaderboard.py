@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+from bin.services.db_services import leaderboard_service
+from bin.services.db_services.leaderboard_service import RiderLeaderboard, TxSnapshot
+
+
+def test_snapshot_visibility():
+    snapshot = TxSnapshot.parse("100:105:101,103")
+
+    assert snapshot.includes(99)
+    assert snapshot.includes(100) and snapshot.includes(102) and snapshot.includes(104)
+    assert not snapshot.includes(101) and not snapshot.includes(103)
+    assert not snapshot.includes(105) and not snapshot.includes(200)
+
+
+class _FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def connection(self, **kwargs):
+        return None
+
+    async def execute(self, statement):
+        return SimpleNamespace(scalar=lambda: "100:105:102")
+
+    async def commit(self):
+        return None
+
+
+def _row(rider_id, rider_raise):
+    return SimpleNamespace(rider_id=rider_id, rider_name=f"r{rider_id}", rider_goal=0, rider_img=None,
+                           rider_raise=rider_raise)
+
+
+def test_reload_replays_only_deltas_missing_from_snapshot(monkeypatch):
+    leaderboard = RiderLeaderboard()
+    leaderboard._riders = {1: {}, 2: {}}
+    leaderboard._set(1, 90)
+    leaderboard._set(2, 50)
+
+    async def read_riders(db_session):
+        # NOTIFYs delivered while the snapshot query is running
+        leaderboard.on_live_event({1: 10}, False, 99)   # committed before the snapshot: already in the rows
+        leaderboard.on_live_event({2: 5}, False, 102)   # in progress at snapshot time: not in the rows
+        leaderboard.on_live_event({1: 1}, False, 107)   # committed after the snapshot
+        return [_row(1, 100), _row(2, 50)]
+
+    monkeypatch.setattr(leaderboard_service, "AsyncSessionLocal", _FakeSession)
+    monkeypatch.setattr(leaderboard, "_read_riders", read_riders)
+
+    asyncio.run(leaderboard.load())
+
+    assert leaderboard.rank(1)["rider_raise"] == 101
+    assert leaderboard.rank(2)["rider_raise"] == 55
+    assert leaderboard.deltas_in_snapshot == 1
+    assert [entry["rider_id"] for entry in leaderboard.top(2)] == [1, 2]
@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bin.db.postgresDB import AsyncSessionLocal, async_engine
+from bin.enums.transaction_status import TransactionStatus
+from bin.services.db_services import notification_service
+from bin.services.db_services.notification_service import process_gateway_notification
+from bin.services.db_services.payment_service import PaymentService
+from bin.utils.response_codes import PaymentStatus
+from tests.payment_fixtures import AMOUNT, CURRENCY, ORDER_ID, PAID_ONCE, payment_effects, seed_payment
+
+
+def _attempt(transaction_id: str, result: str, gateway_code: str) -> dict:
+    return {
+        "result": result,
+        "response": {"gatewayCode": gateway_code},
+        "order": {"id": ORDER_ID, "currency": CURRENCY, "amount": AMOUNT},
+        "transaction": {"id": transaction_id, "type": "PAYMENT"},
+    }
+
+
+DECLINED = _attempt("1", "FAILURE", "DECLINED")
+APPROVED = _attempt("2", "SUCCESS", "APPROVED")
+
+
+def test_declined_notification_is_not_final():
+    assert PaymentService.interpret_notification(DECLINED, CURRENCY, AMOUNT) is None
+    assert PaymentService.interpret_notification(APPROVED, CURRENCY, AMOUNT)["status"] == PaymentStatus.COMPLETED
+
+
+def test_order_paid_on_a_retry_after_a_decline_is_completed():
+    order = {"result": "SUCCESS", "transaction": [DECLINED, APPROVED]}
+
+    assert PaymentService.interpret_order(order)["status"] == PaymentStatus.COMPLETED
+    assert PaymentService.interpret_order({"result": "FAILURE", "transaction": [DECLINED]})["status"] \
+        == PaymentStatus.FAILED
+
+
+def _deliver_in_order(monkeypatch, initial_status: TransactionStatus):
+    attempts = []
+
+    async def verify_payment(order_id, currency, db):
+        return PaymentService.interpret_order({"result": "FAILURE", "transaction": list(attempts)})
+
+    gateway = SimpleNamespace(merchant_id="M")
+    monkeypatch.setattr(notification_service, "_authenticate", lambda headers, payload: gateway)
+    monkeypatch.setattr(PaymentService, "verify_payment", staticmethod(verify_payment))
+
+    async def scenario():
+        try:
+            await seed_payment(initial_status)
+            outcomes = []
+            for notification in (DECLINED, APPROVED):
+                attempts.append(notification)
+                async with AsyncSessionLocal() as db:
+                    outcomes.append((await process_gateway_notification({}, notification, db))["status"])
+            return outcomes, await payment_effects()
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.postgres
+def test_decline_then_successful_retry_pays_the_donation(schema, monkeypatch):
+    outcomes, effects = _deliver_in_order(monkeypatch, TransactionStatus.INITIATED)
+
+    assert outcomes == ["declined", PaymentStatus.COMPLETED.value]
+    assert effects == PAID_ONCE
+
+
+@pytest.mark.postgres
+def test_successful_retry_pays_an_order_already_failed(schema, monkeypatch):
+    outcomes, effects = _deliver_in_order(monkeypatch, TransactionStatus.FAILED)
+
+    assert outcomes == ["already_final", PaymentStatus.COMPLETED.value]
+    assert effects == PAID_ONCE
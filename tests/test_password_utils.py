@@ -0,0 +1,42 @@
+from passlib.hash import bcrypt
+
+from bin.config import settings
+from bin.utils.password_utils import get_password_hash, verify_and_update_password, verify_password
+
+
+def _rounds(hashed: str) -> int:
+    return bcrypt.from_string(hashed).rounds
+
+
+def test_new_hashes_use_configured_rounds():
+    assert _rounds(get_password_hash("secret")) == settings.BCRYPT_ROUNDS
+
+
+def test_hash_at_lower_cost_is_rehashed_on_verify():
+    old_hash = bcrypt.using(rounds=settings.BCRYPT_ROUNDS - 1).hash("secret")
+
+    valid, new_hash = verify_and_update_password("secret", old_hash)
+
+    assert valid
+    assert new_hash is not None and _rounds(new_hash) == settings.BCRYPT_ROUNDS
+    assert verify_password("secret", new_hash)
+
+
+def test_hash_at_higher_cost_is_rehashed_on_verify():
+    old_hash = bcrypt.using(rounds=settings.BCRYPT_ROUNDS + 1).hash("secret")
+
+    valid, new_hash = verify_and_update_password("secret", old_hash)
+
+    assert valid and _rounds(new_hash) == settings.BCRYPT_ROUNDS
+
+
+def test_current_hash_is_not_rehashed():
+    valid, new_hash = verify_and_update_password("secret", get_password_hash("secret"))
+
+    assert valid and new_hash is None
+
+
+def test_wrong_password_is_not_rehashed():
+    old_hash = bcrypt.using(rounds=settings.BCRYPT_ROUNDS - 1).hash("secret")
+
+    assert verify_and_update_password("wrong", old_hash) == (False, None)
@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+import pytest
+
+from bin.services.db_services import payment_service
+from bin.services.db_services.payment_service import PaymentService
+from bin.utils.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(name="USD", failure_threshold=5, reset_timeout=30)
+    monkeypatch.setitem(payment_service.gateway_breakers, "USD", breaker)
+    monkeypatch.setattr(payment_service.settings, "MPGS_RETRY_BASE_DELAY", 0)
+    return breaker
+
+
+def _call(responses):
+    calls = []
+
+    async def send():
+        calls.append(None)
+        return responses[min(len(calls), len(responses)) - 1]
+
+    response = asyncio.run(PaymentService._call_gateway("USD", 5, send))
+    return response, len(calls)
+
+
+def test_declined_order_is_not_a_gateway_failure(breaker):
+    order = httpx.Response(200, json={"result": "FAILURE", "response": {"gatewayCode": "TIMED_OUT"}})
+
+    response, calls = _call([order])
+
+    assert response is order and calls == 1
+    assert breaker.failures == 0 and breaker.successes == 1
+
+
+def test_server_busy_is_retried(breaker):
+    busy = httpx.Response(200, json={"result": "ERROR", "error": {"cause": "SERVER_BUSY"}})
+    order = httpx.Response(200, json={"result": "SUCCESS", "response": {"gatewayCode": "APPROVED"}})
+
+    response, calls = _call([busy, order])
+
+    assert response is order and calls == 2
+    assert breaker.failures == 1 and breaker.successes == 1
+
+
+@pytest.mark.parametrize("error", [httpx.DecodingError("bad gzip"), asyncio.CancelledError()])
+def test_unexpected_error_frees_the_half_open_probe(breaker, error):
+    breaker.half_open_max_calls = 1
+    breaker._trip()
+    breaker._opened_at -= breaker.reset_timeout
+
+    async def send():
+        raise error
+
+    with pytest.raises(type(error)):
+        asyncio.run(PaymentService._call_gateway("USD", 5, send))
+
+    # the failed probe re-opens the circuit; once it resets, calls get through again
+    assert breaker.state == CircuitBreaker.OPEN
+    breaker._opened_at -= breaker.reset_timeout
+    order = httpx.Response(200, json={"result": "SUCCESS", "response": {"gatewayCode": "APPROVED"}})
+    response, calls = _call([order])
+    assert response is order and breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from bin.services.db_services import payment_service, reconciliation_service
+from bin.utils.circuit_breaker import CircuitBreaker
+from bin.services.db_services.payment_service import GatewayOrderNotFound, PaymentService
+from bin.services.db_services.reconciliation_service import ORDER_NOT_FOUND, ReconciliationWorker
+from bin.utils.response_codes import PaymentStatus
+
+
+class _FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def _verify_with(monkeypatch, error):
+    async def verify_payment(order_id, currency, db):
+        raise error
+
+    monkeypatch.setattr(reconciliation_service, "AsyncSessionLocal", _FakeSession)
+    monkeypatch.setattr(PaymentService, "verify_payment", staticmethod(verify_payment))
+    transaction = SimpleNamespace(id=7, mpgs_order_id="order-7", currency="USD")
+    return asyncio.run(ReconciliationWorker()._verify(transaction, asyncio.Semaphore(1)))
+
+
+def test_unknown_order_is_final(monkeypatch):
+    outcome = _verify_with(monkeypatch, GatewayOrderNotFound("no such order"))
+
+    assert outcome == {"id": 7, "status": PaymentStatus.FAILED, "gateway_code": ORDER_NOT_FOUND}
+
+
+def test_transient_error_releases_the_claim(monkeypatch):
+    assert _verify_with(monkeypatch, HTTPException(status_code=400, detail="gateway unavailable")) is None
+    assert _verify_with(monkeypatch, TimeoutError()) is None
+
+
+class _Gateway:
+    """Stands in for the pooled GatewayClient, answering every request with one response."""
+    merchant_id = "TESTMERCHANT"
+    auth_header = "Basic test"
+
+    def __init__(self, response: httpx.Response):
+        self._response = response
+
+    async def get(self, url, **kwargs):
+        return self._response
+
+
+def _lookup_answered_with(monkeypatch, status_code: int, error: dict):
+    class _LogSink:
+        running = True
+
+        def submit(self, record):
+            pass
+
+    gateway = _Gateway(httpx.Response(status_code, json={"result": "ERROR", "error": error},
+                                      request=httpx.Request("GET", "https://gateway.test")))
+    monkeypatch.setattr(payment_service.http_client_registry, "get", lambda currency: gateway)
+    monkeypatch.setitem(payment_service.gateway_breakers, "USD",
+                        CircuitBreaker(name="USD", failure_threshold=5, reset_timeout=30))
+    monkeypatch.setattr("bin.helpers.http_request_logger.api_log_sink", _LogSink())
+    monkeypatch.setattr(reconciliation_service, "AsyncSessionLocal", _FakeSession)
+    transaction = SimpleNamespace(id=7, mpgs_order_id="order-7", currency="USD")
+    return asyncio.run(ReconciliationWorker()._verify(transaction, asyncio.Semaphore(1)))
+
+
+@pytest.mark.parametrize("status_code, error", [
+    (400, {"cause": "INVALID_REQUEST", "explanation": "Unable to find order for merchant"}),
+    (404, {"cause": "INVALID_REQUEST", "explanation": "Order not found", "field": "orderId"}),
+])
+def test_gateway_reporting_an_unknown_order_fails_it(monkeypatch, status_code, error):
+    outcome = _lookup_answered_with(monkeypatch, status_code, error)
+
+    assert outcome == {"id": 7, "status": PaymentStatus.FAILED, "gateway_code": ORDER_NOT_FOUND}
+
+
+@pytest.mark.parametrize("status_code, error", [
+    (400, {"cause": "INVALID_REQUEST", "explanation": "Invalid credentials."}),
+    (400, {"cause": "INVALID_REQUEST", "explanation": "Unsupported API version", "field": "version"}),
+    (401, {"cause": "INVALID_REQUEST", "explanation": "Invalid credentials."}),
+    (404, {}),
+])
+def test_other_client_errors_leave_the_order_pending(monkeypatch, status_code, error):
+    assert _lookup_answered_with(monkeypatch, status_code, error) is None
@@ -0,0 +1,35 @@
+from jinja2 import ChoiceLoader, FileSystemLoader
+
+from bin.config import settings
+from bin.helpers.template_renderer import TemplateRenderer
+
+CONTEXT = {"first_name": "Ada", "second_name": "<L>", "amount": 250.0, "currency_code": "LKR"}
+
+
+def test_precompiled_modules_render_like_sources(tmp_path, monkeypatch):
+    from_source = TemplateRenderer().render("email/donation_confirmation.html", **CONTEXT)
+    TemplateRenderer().compile(str(tmp_path))
+    monkeypatch.setattr(settings, "TEMPLATE_PRECOMPILED_DIR", str(tmp_path))
+
+    renderer = TemplateRenderer()
+
+    assert isinstance(renderer.env.loader, ChoiceLoader)
+    assert renderer.render("email/donation_confirmation.html", **CONTEXT) == from_source
+    assert "&lt;L&gt;" in from_source
+
+
+def test_startup_never_writes_the_precompiled_dir(tmp_path, monkeypatch):
+    missing = tmp_path / "precompiled"
+    monkeypatch.setattr(settings, "TEMPLATE_PRECOMPILED_DIR", str(missing))
+
+    renderer = TemplateRenderer()
+    renderer.load()
+
+    assert isinstance(renderer.env.loader, FileSystemLoader)
+    assert not missing.exists()
+
+
+def test_templates_can_take_a_name_variable():
+    body = TemplateRenderer().render("email/contact_reply.txt", name="Ada")
+
+    assert "Dear Ada" in body
@@ -0,0 +1,127 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from bin.config import settings
+from bin.db.postgresDB import AsyncSessionLocal, async_engine
+from bin.enums.transaction_status import TransactionStatus
+from bin.services.db_services.donation_service import finalize_transaction, payment_callback_function
+from bin.services.db_services.payment_service import PaymentService
+from bin.utils.response_codes import PaymentResponseCode, PaymentStatus
+from tests.payment_fixtures import PAID_ONCE, RESULT_INDICATOR, payment_effects, seed_payment
+
+pytestmark = pytest.mark.postgres
+
+APPROVED = {"status": PaymentStatus.COMPLETED, "gateway_code": PaymentResponseCode.APPROVED}
+
+
+def _callback_request():
+    return SimpleNamespace(query_params={"resultIndicator": RESULT_INDICATOR})
+
+
+def _verify_with(monkeypatch, outcomes):
+    """Stand-in verify_payment answering with outcomes in turn (exceptions are raised); returns its call log."""
+    calls = []
+
+    async def verify_payment(order_id, currency, db):
+        calls.append(order_id)
+        # long enough that the other callbacks find the claim taken and wait for it
+        await asyncio.sleep(0.2)
+        outcome = outcomes[min(len(calls), len(outcomes)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(PaymentService, "verify_payment", staticmethod(verify_payment))
+    return calls
+
+
+async def _race_callbacks(racers: int):
+    async def callback(start: asyncio.Event):
+        # each callback has its own session, as parallel requests or workers would
+        async with AsyncSessionLocal() as db:
+            await start.wait()
+            return await payment_callback_function(_callback_request(), db)
+
+    start = asyncio.Event()
+    tasks = [asyncio.create_task(callback(start)) for _ in range(racers)]
+    await asyncio.sleep(0)
+    start.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.mark.parametrize("racers", [2, 20])
+def test_parallel_callbacks_finalize_once(schema, monkeypatch, racers):
+    calls = _verify_with(monkeypatch, [APPROVED])
+
+    async def scenario():
+        try:
+            await seed_payment(TransactionStatus.INITIATED)
+            return await _race_callbacks(racers), await payment_effects()
+        finally:
+            await async_engine.dispose()
+
+    results, effects = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert sum(result["finalized"] for result in results) == 1
+    assert all(result["status"] == PaymentStatus.COMPLETED for result in results)
+    assert effects == PAID_ONCE
+
+
+@pytest.mark.parametrize("racers", [2, 20])
+def test_failed_verification_releases_the_claim_for_a_later_callback(schema, monkeypatch, racers):
+    monkeypatch.setattr(settings, "PAYMENT_CALLBACK_WAIT_SECONDS", 1.0)
+    calls = _verify_with(monkeypatch, [HTTPException(status_code=504, detail="Payment gateway timed out"), APPROVED])
+
+    async def scenario():
+        try:
+            await seed_payment(TransactionStatus.INITIATED)
+            racing = await _race_callbacks(racers)
+            released = await payment_effects()
+            async with AsyncSessionLocal() as db:
+                retried = await payment_callback_function(_callback_request(), db)
+            return racing, released, retried, await payment_effects()
+        finally:
+            await async_engine.dispose()
+
+    racing, released, retried, effects = asyncio.run(scenario())
+
+    errors = [result for result in racing if isinstance(result, HTTPException)]
+    assert len(errors) == 1 and errors[0].status_code == 504
+    # the rest waited for the claimer, saw the transaction handed back and gave up as pending
+    assert all(result["status"] == PaymentStatus.PENDING and not result["finalized"]
+               for result in racing if not isinstance(result, HTTPException))
+    assert released["status"] == TransactionStatus.INITIATED.value and released["paid"] == 0
+
+    assert retried["finalized"] and retried["status"] == PaymentStatus.COMPLETED
+    assert len(calls) == 2
+    assert effects == PAID_ONCE
+
+
+@pytest.mark.parametrize("racers", [2, 20])
+def test_concurrent_finalize_applies_side_effects_once(schema, racers):
+    # every caller holds a claim (e.g. one whose claim timed out and was taken over)
+    async def finalize(transaction_id: int, start: asyncio.Event):
+        async with AsyncSessionLocal() as db:
+            await start.wait()
+            return await finalize_transaction(transaction_id, PaymentStatus.COMPLETED, "APPROVED", db)
+
+    async def scenario():
+        try:
+            transaction_id = await seed_payment(TransactionStatus.VERIFYING)
+            start = asyncio.Event()
+            tasks = [asyncio.create_task(finalize(transaction_id, start)) for _ in range(racers)]
+            await asyncio.sleep(0)
+            start.set()
+            results = await asyncio.gather(*tasks)
+            return results, await payment_effects()
+        finally:
+            await async_engine.dispose()
+
+    results, effects = asyncio.run(scenario())
+
+    assert sum(result is not None for result in results) == 1
+    assert effects == PAID_ONCE